@@ -0,0 +1,273 @@
+import getopt, json, os, platform, subprocess, sys, time, tracemalloc
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'SIMPLEX'))
+sys.path.insert(0, os.path.join(ROOT, 'BRANCH-AND-BOUND'))
+from simplex import SimplexSolver
+from branchAndBound import branch_and_bound
+
+# Famílias de problemas. Cada gerador recebe um tamanho e uma semente e
+# retorna um dicionário com A, b, c e prob (e ineq, se houver); 'integer'
+# indica que o problema vai para o branch_and_bound.
+
+def random_dense(size, seed):
+    rng = np.random.default_rng(seed)
+    m, n = size, int(size * 1.5)
+    return {'A': rng.integers(1, 10, (m, n)).tolist(),
+            'b': rng.integers(10 * n, 50 * n, m).tolist(),
+            'c': rng.integers(1, 10, n).tolist(), 'prob': 'max'}
+
+
+def random_sparse(size, seed):
+    from scipy.sparse import csr_matrix, random as sparse_random
+    rng = np.random.default_rng(seed)
+    m, n = size, size * 5
+    A = sparse_random(m, n, density=min(1.0, 10.0 / n), format='csr',
+                      random_state=seed, data_rvs=lambda k: rng.integers(1, 10, k))
+    # Every column needs an entry, otherwise the LP is unbounded.
+    A = A + csr_matrix((np.ones(n), (np.arange(n) % m, np.arange(n))),
+                       shape=(m, n))
+    return {'A': A, 'b': rng.integers(100, 1000, m).tolist(),
+            'c': rng.integers(1, 10, n).tolist(), 'prob': 'max'}
+
+
+def knapsack(size, seed):
+    rng = np.random.default_rng(seed)
+    weights = rng.integers(10, 60, size)
+    A = [weights.tolist()] + np.eye(size, dtype=int).tolist()
+    return {'A': A, 'b': [int(weights.sum() // 2)] + [1] * size,
+            'c': rng.integers(10, 60, size).tolist(), 'prob': 'max',
+            'integer': True}
+
+
+def assignment(size, seed):
+    ''' Problema de atribuição size x size (restrições de igualdade).
+    '''
+    rng = np.random.default_rng(seed)
+    n = size * size
+    A = []
+    for i in range(size):
+        A.append([1 if k // size == i else 0 for k in range(n)])
+    for j in range(size):
+        A.append([1 if k % size == j else 0 for k in range(n)])
+    return {'A': A, 'b': [1] * (2 * size), 'c': rng.integers(1, 20, n).tolist(),
+            'prob': 'min', 'ineq': ['='] * (2 * size)}
+
+
+def klee_minty(size, seed):
+    ''' Cubo de Klee-Minty: o Dantzig visita os 2^n vértices.
+    '''
+    A = [[2 ** (i - j + 1) if j < i else (1 if j == i else 0)
+          for j in range(size)] for i in range(size)]
+    return {'A': A, 'b': [5 ** (i + 1) for i in range(size)],
+            'c': [2 ** (size - j - 1) for j in range(size)], 'prob': 'max'}
+
+
+def brewery(size, seed):
+    ''' Variantes da cervejaria: size cervejas e size // 2 + 2 recursos.
+    '''
+    rng = np.random.default_rng(seed)
+    m = size // 2 + 2
+    A = rng.integers(1, 8, (m, size))
+    b = (A.sum(axis=1) * rng.integers(5, 15, m)).tolist()
+    return {'A': A.tolist(), 'b': b, 'c': rng.integers(3, 9, size).tolist(),
+            'prob': 'max', 'integer': True}
+
+
+FAMILIES = {
+    'dense': (random_dense, {'small': [10, 20], 'medium': [50, 100],
+                             'large': [200, 400]}),
+    'sparse': (random_sparse, {'small': [20], 'medium': [200],
+                               'large': [2000]}),
+    'knapsack': (knapsack, {'small': [10], 'medium': [25], 'large': [40]}),
+    'assignment': (assignment, {'small': [4], 'medium': [8], 'large': [15]}),
+    'klee_minty': (klee_minty, {'small': [4, 6], 'medium': [8],
+                                'large': [10]}),
+    'brewery': (brewery, {'small': [3, 6], 'medium': [10], 'large': [20]}),
+}
+
+
+def measure(run, memory=True, repeat=3):
+    ''' Executa run() repeat vezes e fica com o menor tempo; com
+    memory=True, executa mais uma vez sob tracemalloc para obter o pico de
+    memória (em bytes) sem afetar a medida de tempo.
+    '''
+    elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        run_time = time.perf_counter() - start
+        elapsed = run_time if elapsed is None else min(elapsed, run_time)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _matrix(problem, backend):
+    # Sparse input always goes to the revised simplex; the other backends
+    # get a dense copy so every family is compared across backends.
+    A = problem['A']
+    if hasattr(A, 'nnz') and backend != 'revised':
+        A = A.toarray().tolist()
+    return A
+
+
+def solve_lp(problem, backend):
+    solver = SimplexSolver()
+    solution = solver.run_simplex(_matrix(problem, backend), problem['b'],
+                                  problem['c'],
+                                  prob=problem['prob'],
+                                  ineq=problem.get('ineq', []),
+                                  backend=backend)
+    objective = float(solution['z']) if solution is not None else None
+    return {'status': solver.status, 'objective': objective,
+            'pivots': solver.stats['iterations']}
+
+
+def solve_ip(problem, backend):
+    _, profit, stats = branch_and_bound(problem['c'], _matrix(problem, backend),
+                                        problem['b'], backend=backend)
+    optimal = stats['status'] == 'optimal'
+    return {'status': stats['status'],
+            'objective': float(profit) if optimal else None,
+            'nodes': stats['nodes'], 'gap': float(stats['gap'])}
+
+
+# Escalas em que o backend exato (frações) também roda; nas maiores ele
+# levaria minutos por instância.
+FRACTION_SCALES = ('small',)
+
+
+def run_benchmarks(families, scale='small',
+                   backends=('fraction', 'float', 'revised'), seed=0,
+                   memory=True, repeat=3, tol=1e-6):
+    ''' Roda cada instância em cada backend (o 'fraction' só nas escalas
+    de FRACTION_SCALES). Retorna a lista de resultados e a lista de
+    instâncias em que os backends discordam do status ou do valor ótimo.
+    '''
+    results, mismatches = [], []
+    for family in families:
+        generator, sizes = FAMILIES[family]
+        for size in sizes[scale]:
+            problem = generator(size, seed)
+            integer = problem.get('integer', False)
+            objectives, statuses = {}, {}
+            for backend in backends:
+                if backend == 'fraction' and scale not in FRACTION_SCALES:
+                    continue
+                solve = solve_ip if integer else solve_lp
+                record, elapsed, peak = measure(
+                    lambda: solve(problem, backend), memory, repeat)
+                record.update({'family': family, 'size': size,
+                               'backend': backend, 'time': elapsed,
+                               'peak_memory': peak})
+                results.append(record)
+                objectives[backend] = record['objective']
+                statuses[backend] = record['status']
+                print("%-10s %5d %-8s %-10s %10.4fs %s" % (
+                    family, size, backend, record['status'], elapsed,
+                    record.get('pivots', record.get('nodes'))))
+            values = [v for v in objectives.values() if v is not None]
+            if (len(set(statuses.values())) > 1 or
+                    len(set(v is None for v in objectives.values())) > 1 or
+                    (values and max(values) - min(values) >
+                     tol * max(1.0, abs(max(values))))):
+                mismatches.append({'family': family, 'size': size,
+                                   'statuses': statuses,
+                                   'objectives': objectives})
+    return results, mismatches
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=ROOT, stderr=subprocess.DEVNULL)
+        commit = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(results, baseline, threshold=0.2, min_time=1e-2):
+    ''' Compara com um arquivo de resultados anterior; retorna as
+    instâncias em que o tempo piorou mais que threshold (fração).
+    Instâncias mais rápidas que min_time segundos são só ruído e ficam de
+    fora.
+    '''
+    key = lambda r: (r['family'], r['size'], r['backend'])
+    previous = dict((key(r), r) for r in baseline['results'])
+    regressions = []
+    for record in results:
+        old = previous.get(key(record))
+        if old is None or max(old['time'], record['time']) < min_time:
+            continue
+        ratio = record['time'] / old['time']
+        if ratio > 1 + threshold:
+            regressions.append({'family': record['family'],
+                                'size': record['size'],
+                                'backend': record['backend'],
+                                'ratio': ratio})
+    return regressions
+
+
+if __name__ == '__main__':
+    families = list(FAMILIES)
+    scale = 'small'
+    backends = ['fraction', 'float', 'revised']
+    output = 'benchmark.json'
+    baseline = None
+    memory = True
+    repeat = 3
+    usage = ('benchmark.py [--families dense,sparse,...] '
+             '[--scale small|medium|large] [--backends fraction,float,revised] '
+             '[--output <arquivo>] [--compare <arquivo>] [--repeat <n>] '
+             '[--no-memory]')
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h", [
+            "families=", "scale=", "backends=", "output=", "compare=",
+            "repeat=", "no-memory"])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            print('Famílias: %s.' % ', '.join(FAMILIES))
+            sys.exit()
+        elif opt == "--families":
+            families = arg.split(',')
+        elif opt == "--scale":
+            scale = arg.strip()
+        elif opt == "--backends":
+            backends = arg.split(',')
+        elif opt == "--output":
+            output = arg.strip()
+        elif opt == "--compare":
+            with open(arg) as f:
+                baseline = json.load(f)
+        elif opt == "--repeat":
+            repeat = int(arg)
+        elif opt == "--no-memory":
+            memory = False
+
+    results, mismatches = run_benchmarks(families, scale, backends,
+                                         memory=memory, repeat=repeat)
+    report = {'environment': environment(), 'scale': scale,
+              'results': results, 'mismatches': mismatches}
+    if baseline is not None:
+        report['regressions'] = compare(results, baseline)
+        for regression in report['regressions']:
+            print("Regressão: %(family)s %(size)d %(backend)s "
+                  "%(ratio).2fx mais lento" % regression)
+    for mismatch in mismatches:
+        print("Backends discordam: %s" % mismatch)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    sys.exit(1 if mismatches else 0)
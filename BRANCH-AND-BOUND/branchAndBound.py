@@ -1,54 +1,764 @@
+import copy, getopt, heapq, os, pickle, random, shutil, sys, tempfile, time
+from array import array
+from collections import OrderedDict
 import numpy as np
 
-# Função para verificar a viabilidade de uma solução
-def is_feasible(solution, constraints, bounds):
-    for constraint, bound in zip(constraints, bounds):
-        if np.dot(constraint, solution) > bound:
+# Importado como módulo, quem importa põe SIMPLEX no caminho (como
+# benchmark.py, service.py e os testes); só a linha de comando o faz aqui.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    '..', 'SIMPLEX'))
+from simplex import SimplexSolver, UNBOUNDED
+from cuts import add_root_cuts
+from heuristics import greedy, round_solution, dive, matrix_columns
+from cache import problem_keys
+
+# Função para verificar a viabilidade de uma solução: um único produto
+# matriz-vetor e uma comparação vetorizada (constraints pode ser uma lista
+# de listas, um array NumPy ou uma matriz esparsa CSR/CSC)
+def is_feasible(solution, constraints, bounds, tol=0):
+    if not _is_sparse(constraints):
+        constraints = np.asarray(constraints)
+    return bool(np.all(constraints @ np.asarray(solution) <= np.asarray(bounds) + tol))
+
+
+# Propagação de limites nas restrições sem coeficientes negativos. Cada nó
+# guarda os limites inferiores lo das variáveis e o vetor de atividade
+# mínima A lo dessas linhas; quando o limite de uma variável sobe (ramo
+# x_j >= ceil(v)), só as linhas da coluna j são atualizadas e verificadas.
+# Os arrays de um nó nunca são alterados no lugar, então filhos podem
+# compartilhá-los com o pai.
+class BoundPropagation():
+    def __init__(self, constraints, bounds, tol=1e-6):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.tol = tol
+        if _is_sparse(constraints):
+            A = constraints.tocsc()
+            rows_ok = np.ones(A.shape[0], dtype=bool)
+            rows_ok[A.indices[A.data < 0]] = False
+            self.columns = []
+            for j in range(A.shape[1]):
+                rows = A.indices[A.indptr[j]:A.indptr[j + 1]]
+                values = A.data[A.indptr[j]:A.indptr[j + 1]]
+                keep = rows_ok[rows] & (values > 0)
+                self.columns.append((rows[keep], values[keep].astype(np.float64)))
+        else:
+            A = np.asarray(constraints, dtype=np.float64)
+            rows_ok = (A >= 0).all(axis=1)
+            self.columns = []
+            for j in range(A.shape[1]):
+                rows = np.flatnonzero(rows_ok & (A[:, j] > 0))
+                self.columns.append((rows, A[rows, j]))
+        self.m, self.n = A.shape
+
+    def root(self):
+        return np.zeros(self.n), np.zeros(self.m)
+
+    # Maior valor de x_j compatível com a atividade mínima das demais.
+    def max_value(self, state, j):
+        lower, activity = state
+        rows, values = self.columns[j]
+        if not len(rows):
+            return np.inf
+        return lower[j] + np.min((self.bounds[rows] - activity[rows]) / values)
+
+    # Novo estado com lo_j = value; None se alguma linha fica violada.
+    def raise_lower(self, state, j, value):
+        lower, activity = state
+        delta = value - lower[j]
+        if delta <= 0:
+            return state
+        rows, values = self.columns[j]
+        activity = activity.copy()
+        activity[rows] += values * delta
+        if np.any(activity[rows] > self.bounds[rows] + self.tol):
+            return None
+        lower = lower.copy()
+        lower[j] = value
+        return lower, activity
+
+# Converte o resultado do SimplexSolver em (solução, valor).
+def relaxation_values(result, n):
+    return [float(result['x_%d' % (j + 1)]) for j in range(n)], float(result['z'])
+
+
+# Escolhe a variável mais fracionária entre as inteiras (todas, se integer
+# for None); retorna None se a solução for inteira.
+def most_fractional(solution, tol=1e-6, integer=None):
+    best, best_frac = None, tol
+    for j in (range(len(solution)) if integer is None else integer):
+        value = solution[j]
+        frac = min(value - np.floor(value), np.ceil(value) - value)
+        if frac > best_frac:
+            best, best_frac = j, frac
+    return best
+
+
+# Nós da árvore guardados de forma compacta: cada nó criado ocupa uma
+# posição nos arrays parent/var/sense/limit/bound (cerca de 30 bytes), com
+# o pai e a mudança de limite (x_var <= limit ou x_var >= limit) que o
+# gerou; os limites de um nó são os do caminho até a raiz (nó 0). Os nós
+# abertos ficam num heap de (chave, desempate, nó). Só os `keep` nós
+# abertos mais recentes guardam solver, solução e estado da propagação
+# (partida a quente); os demais têm o LP refeito a partir da raiz
+# (restore_node) quando são retirados.
+#
+# Seleção: 'best' (maior limitante), 'depth' (o nó mais recente primeiro)
+# ou 'estimate' (maior estimativa do melhor inteiro do nó, ver
+# PseudoCosts). Empates entre chaves são desfeitos por uma sequência
+# pseudoaleatória com semente fixa, o que mantém a busca determinística.
+#
+# Com max_open, quando há mais que max_open nós abertos na memória, a
+# metade com pior chave é gravada em disco (em directory ou num diretório
+# temporário) e recarregada quando passa a ter a melhor chave.
+class NodePool():
+    def __init__(self, selection='best', seed=0, keep=256, max_open=None,
+                 directory=None):
+        if selection not in ('best', 'depth', 'estimate'):
+            raise ValueError("Seleção de nós desconhecida: %s" % selection)
+        self.selection = selection
+        self.rng = random.Random(seed)
+        self.keep = keep
+        self.max_open = max_open
+        self.directory = directory
+        self.owned = False
+        self.parent = array('q')
+        self.var = array('i')
+        self.sense = array('b')
+        self.limit = array('d')
+        self.bound = array('d')
+        self.heap = []
+        # Fora da seleção 'best' o heap não é ordenado pelo limitante: um
+        # segundo heap (-limitante, nó) dá o maior limitante aberto. Nós já
+        # retirados ou levados ao disco só saem dele ao chegar ao topo.
+        self.by_bound = []
+        self.open = set()
+        self.warm = OrderedDict()
+        # Lotes em disco: (melhor chave, maior limitante, tamanho, arquivo).
+        self.spilled = []
+        self.spilled_nodes = 0
+
+    # Novo nó filho de parent (-1 na raiz) pela mudança (j, sentido, limite).
+    def add(self, parent, change, bound):
+        j, sense, limit = change if change is not None else (-1, '', 0)
+        self.parent.append(parent)
+        self.var.append(j)
+        self.sense.append(1 if sense == '<=' else -1 if sense == '>=' else 0)
+        self.limit.append(limit)
+        self.bound.append(bound)
+        return len(self.bound) - 1
+
+    # Mudanças de limite da raiz até o nó, na ordem em que foram feitas.
+    def changes(self, node):
+        changes = []
+        while self.parent[node] >= 0:
+            changes.append((self.var[node], '<=' if self.sense[node] > 0 else '>=',
+                            int(self.limit[node])))
+            node = self.parent[node]
+        changes.reverse()
+        return changes
+
+    def push(self, node, estimate=None, warm=None):
+        if self.selection == 'best' or estimate is None and self.selection == 'estimate':
+            key = -self.bound[node]
+        elif self.selection == 'estimate':
+            key = -estimate
+        else:
+            key = -node
+        heapq.heappush(self.heap, (key, self.rng.random(), node))
+        self._track(node)
+        if warm is not None and self.keep:
+            self.warm[node] = warm
+            if len(self.warm) > self.keep:
+                self.warm.popitem(last=False)
+        if self.max_open is not None and len(self.heap) > self.max_open:
+            self._spill()
+
+    # Retorna (nó, limitante, (solver, solução, estado) ou None).
+    def pop(self):
+        if self.spilled and (not self.heap or
+                             min(batch[0] for batch in self.spilled) < self.heap[0][0]):
+            self._reload()
+        node = heapq.heappop(self.heap)[2]
+        self.open.discard(node)
+        return node, self.bound[node], self.warm.pop(node, None)
+
+    def best_bound(self):
+        bounds = [batch[1] for batch in self.spilled]
+        if self.selection == 'best':
+            if self.heap:
+                bounds.append(-self.heap[0][0])
+        else:
+            while self.by_bound and self.by_bound[0][1] not in self.open:
+                heapq.heappop(self.by_bound)
+            if self.by_bound:
+                bounds.append(-self.by_bound[0][0])
+        return max(bounds)
+
+    def _track(self, node):
+        if self.selection != 'best':
+            heapq.heappush(self.by_bound, (-self.bound[node], node))
+            self.open.add(node)
+            # Entradas velhas demais: refaz o heap com os nós abertos.
+            if len(self.by_bound) > 2 * len(self.open) + 64:
+                self.by_bound = [(-self.bound[node], node) for node in self.open]
+                heapq.heapify(self.by_bound)
+
+    def _spill(self):
+        # Uma lista ordenada também é um heap.
+        self.heap.sort()
+        half = len(self.heap) // 2
+        batch = self.heap[half:]
+        del self.heap[half:]
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='bb-nodes-')
+            self.owned = True
+        fd, path = tempfile.mkstemp(suffix='.pkl', dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+        self.spilled.append((batch[0][0], max(self.bound[node] for _, _, node in batch),
+                             len(batch), path))
+        self.spilled_nodes += len(batch)
+        for _, _, node in batch:
+            self.warm.pop(node, None)
+            self.open.discard(node)
+
+    def _reload(self):
+        index = min(range(len(self.spilled)), key=lambda i: self.spilled[i][0])
+        path = self.spilled.pop(index)[3]
+        with open(path, 'rb') as f:
+            batch = pickle.load(f)
+        os.remove(path)
+        for entry in batch:
+            heapq.heappush(self.heap, entry)
+            self._track(entry[2])
+
+    # Apaga os lotes que ainda estão em disco.
+    def close(self):
+        for batch in self.spilled:
+            if os.path.exists(batch[3]):
+                os.remove(batch[3])
+        self.spilled = []
+        if self.owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory, self.owned = None, False
+
+    def __len__(self):
+        return len(self.heap) + sum(batch[2] for batch in self.spilled)
+
+
+# Pseudocustos: perda média do limitante por unidade de distância ao
+# inteiro, por variável e sentido do ramo, medida a cada filho resolvido.
+# A estimativa do melhor inteiro de um nó é o limitante menos, para cada
+# variável fracionária, a menor perda esperada entre arredondar para baixo
+# e para cima (variáveis ainda não ramificadas usam a média geral).
+class PseudoCosts():
+    def __init__(self, n):
+        self.total = {'<=': np.zeros(n), '>=': np.zeros(n)}
+        self.count = {'<=': np.zeros(n), '>=': np.zeros(n)}
+
+    def update(self, j, sense, degradation, distance):
+        if distance > 0:
+            self.total[sense][j] += max(degradation, 0.0) / distance
+            self.count[sense][j] += 1
+
+    def _costs(self, sense):
+        total, count = self.total[sense], self.count[sense]
+        mean = total.sum() / count.sum() if count.sum() else 0.0
+        return np.where(count > 0, total / np.maximum(count, 1), mean)
+
+    def estimate(self, bound, solution, integer=None, tol=1e-6):
+        x = np.asarray(solution, dtype=np.float64)
+        index = np.arange(len(x)) if integer is None else np.asarray(integer, dtype=int)
+        down = x[index] - np.floor(x[index])
+        fractional = (down > tol) & (down < 1 - tol)
+        if not fractional.any():
+            return bound
+        index, down = index[fractional], down[fractional]
+        loss = np.minimum(self._costs('<=')[index] * down,
+                          self._costs('>=')[index] * (1 - down))
+        return bound - float(loss.sum())
+
+
+# Refaz o LP de um nó a partir do solver da raiz, aplicando as mudanças de
+# limite do caminho e re-otimizando pelo simplex dual. Com basis (de
+# SimplexSolver.basis(), a base ótima do nó) o tableau é levado direto a
+# essa base e o simplex dual não precisa pivotar. Retorna (solver,
+# solução, estado da propagação) ou None se o nó ficar inviável.
+def restore_node(problem, root, changes, basis=None):
+    profits, constraints, bounds, propagation, integer = problem
+    solver = root.snapshot()
+    state = propagation.root()
+    for j, sense, limit in changes:
+        if not solver.set_bound(j, limit, sense):
+            return None
+        if sense == '>=':
+            state = propagation.raise_lower(state, j, limit)
+            if state is None:
+                return None
+    if basis is not None and not solver.set_basis(basis):
+        return restore_node(problem, root, changes)
+    result = solver.dual_simplex()
+    if result is None:
+        return None
+    return solver, relaxation_values(result, len(profits))[0], state
+
+
+# Processa um nó: se a relaxação é inteira, retorna a candidata a
+# incumbente; senão ramifica na variável mais fracionária e retorna os
+# filhos (limitante, solver, solução, estado da propagação, (j, sentido,
+# limite, distância de x_j ao limite)) que ainda superam a incumbente. O
+# ramo x_j >= ceil(v) é descartado sem resolver o LP quando ceil(v) passa
+# do maior valor viável de x_j pela propagação. Com timers (dicionário),
+# acumula o tempo de is_feasible e das re-otimizações ('lp').
+def expand_node(problem, solver, solution, best_profit, tol=1e-6, timers=None,
+                state=None):
+    profits, constraints, bounds, propagation, integer = problem
+    n = len(profits)
+    if state is None:
+        state = propagation.root()
+    j = most_fractional(solution, tol, integer)
+    if j is None:
+        if integer is None:
+            candidate = [int(round(v)) for v in solution]
+        else:
+            candidate = list(solution)
+            for k in integer:
+                candidate[k] = int(round(candidate[k]))
+        if timers is not None:
+            start = time.perf_counter()
+        # A mesma tolerância das heurísticas: o arredondamento de uma
+        # relaxação viável pode passar de uma linha por erro de ponto
+        # flutuante.
+        feasible = is_feasible(candidate, constraints, bounds, tol)
+        if timers is not None:
+            timers['is_feasible'] += time.perf_counter() - start
+        if feasible:
+            return candidate, []
+        # Mesmo com a tolerância a candidata não cabe (coeficientes
+        # grandes): em vez de descartar o nó, ramifica na variável mais
+        # distante de um inteiro. Só com a relaxação já inteira o nó é
+        # inviável.
+        j = most_fractional(solution, 0, integer)
+        if j is None:
+            return None, []
+
+    # Ramificação na variável fracionária j (partida a quente)
+    children = []
+    value = solution[j]
+    for sense, limit in (('<=', int(np.floor(value))), ('>=', int(np.ceil(value)))):
+        child_state = state
+        if sense == '>=':
+            if limit > propagation.max_value(state, j) + tol:
+                continue
+            child_state = propagation.raise_lower(state, j, limit)
+            if child_state is None:
+                continue
+        if timers is not None:
+            start = time.perf_counter()
+        child = solver.snapshot()
+        # O limite muda na própria coluna de x_j: o tableau do filho tem o
+        # mesmo tamanho do pai, qualquer que seja a profundidade.
+        result = child.dual_simplex() if child.set_bound(j, limit, sense) else None
+        if timers is not None:
+            timers['lp'] += time.perf_counter() - start
+        if result is None:
+            continue
+        child_solution, child_bound = relaxation_values(result, n)
+        if child_bound > best_profit + tol:
+            children.append((child_bound, child, child_solution, child_state,
+                             (j, sense, limit, abs(limit - value))))
+    return None, children
+
+
+# Estado de cada processo do pool: o problema e o solver da raiz são
+# enviados uma única vez.
+_worker_problem = None
+_worker_root = None
+
+def _init_worker(problem, root):
+    global _worker_problem, _worker_root
+    _worker_problem, _worker_root = problem, root
+
+# Um nó vai para o worker só como as mudanças de limite do caminho e a
+# base ótima (None: refeito pelo simplex dual a partir da raiz); os filhos
+# voltam com a base no lugar do solver e sem o estado da propagação, que
+# o worker refaz a partir das mudanças.
+def _expand_in_worker(changes, basis, best_profit, tol):
+    warm = restore_node(_worker_problem, _worker_root, changes, basis)
+    if warm is None:
+        return None, []
+    solver, solution, state = warm
+    candidate, children = expand_node(_worker_problem, solver, solution, best_profit, tol,
+                                      None, state)
+    return candidate, [(bound, child.basis(), child_solution, None, change)
+                       for bound, child, child_solution, _, change in children]
+
+
+# Algoritmo Branch and Bound: resolve a relaxação linear em cada nó, poda
+# nós cujo limitante não supera a incumbente e ramifica em variáveis
+# fracionárias (x_j <= floor(v) e x_j >= ceil(v)). Cada filho parte do
+# tableau ótimo do pai, com o novo limite de x_j tratado como limite da
+# variável (sem linhas novas), e é re-otimizado pelo simplex dual.
+#
+# stats['status'] é 'optimal', 'infeasible', 'unbounded' (relaxação da
+# raiz ilimitada; best_bound e gap são infinitos) ou 'aborted'.
+#
+# Os nós abertos ficam num NodePool: node_selection é 'best', 'depth' ou
+# 'estimate'; só os keep_solvers nós abertos mais recentes guardam o solver
+# (os outros têm o LP refeito a partir da raiz ao serem retirados,
+# contados em stats['restored']) e, com max_open, o excesso de nós abertos
+# vai para o disco (em spill_dir ou num diretório temporário; contados em
+# stats['spilled']).
+#
+# Com workers > 1 os nós são expandidos em um pool de processos que
+# mantém até `workers` nós em andamento: cada resultado é incorporado
+# assim que chega e libera o envio do próximo nó, podado com a incumbente
+# daquele momento. Os nós abertos guardam a base em vez do solver. A ordem
+# de chegada depende do tempo de cada nó, então a busca paralela não é
+# determinística (o ótimo é o mesmo).
+#
+# callback(event, info) é chamado a cada nova incumbente ('incumbent', com
+# solution, profit e nodes) e a cada resultado de nós incorporado ('node',
+# com nodes, best_profit, best_bound e open); se retornar um valor verdadeiro
+# a busca para e stats['aborted'] fica True. Com profile=True,
+# stats['timers'] traz o tempo gasto no processamento dos nós ('node'), em
+# is_feasible e nas re-otimizações ('lp', só no modo serial) e
+# stats['simplex_timers'] os tempos do simplex (precificação, teste da
+# razão e atualização das linhas).
+#
+# Com cut_rounds > 0, antes de ramificar são feitas até cut_rounds rodadas
+# de cortes de Gomory e de cobertura na raiz (ver cuts.py); os cortes
+# ficam em todos os nós e stats['cuts'] traz quantos foram adicionados.
+#
+# integer lista os índices das variáveis inteiras (None: todas). Com
+# variáveis contínuas só se ramifica nas inteiras e os cortes, que supõem
+# todas as variáveis inteiras, não são usados.
+#
+# cache é um cache.SolutionCache opcional: um problema já resolvido com as
+# mesmas opções devolve o resultado guardado, e a relaxação da raiz passa
+# pelo cache (partida a quente a partir de um problema com a mesma matriz
+# e outros bounds/profits).
+#
+# Com heuristics=True, heurísticas primais (ver heuristics.py) procuram
+# incumbentes sem esperar por folhas inteiras: o preenchimento guloso antes
+# da raiz, o arredondamento (completado pelo guloso) e um mergulho a partir
+# da relaxação da raiz, o arredondamento da relaxação de cada filho e, a
+# cada dive_every nós (0 desliga), um mergulho a partir do melhor filho da
+# rodada. stats['heuristic_incumbents'] conta as incumbentes achadas por
+# elas e o evento 'incumbent' traz em 'heuristic' o nome da heurística
+# (None para folhas da árvore); com profile=True, stats['timers'] traz o
+# tempo gasto nelas ('heuristics').
+def branch_and_bound(profits, constraints, bounds, tol=1e-6, backend='float',
+                     node_selection='best', workers=None, seed=0,
+                     callback=None, profile=False, cut_rounds=0, integer=None,
+                     cache=None, heuristics=True, dive_every=100, keep_solvers=256,
+                     max_open=None, spill_dir=None):
+    n = len(profits)
+    if integer is not None:
+        integer = sorted(integer)
+        if len(integer) == n:
+            integer = None
+    if cache is not None:
+        _, key, _, _ = problem_keys(constraints, bounds, profits, 'max', None, integer, {
+            'branch_and_bound': True, 'tol': tol, 'backend': backend,
+            'node_selection': node_selection, 'workers': workers, 'seed': seed,
+            'cut_rounds': cut_rounds, 'heuristics': heuristics, 'dive_every': dive_every,
+            'keep_solvers': keep_solvers})
+        record = cache.get(key)
+        if record is not None:
+            cache.stats['hits'] += 1
+            cache.last = 'hit'
+            return copy.deepcopy(record['result'])
+    # Matriz convertida uma única vez para as verificações vetorizadas.
+    matrix = constraints if _is_sparse(constraints) else np.asarray(constraints)
+    propagation = BoundPropagation(matrix, bounds, tol)
+    problem = (profits, matrix, np.asarray(bounds), propagation, integer)
+    best_solution = [0] * n
+    best_profit = 0 if is_feasible(best_solution, matrix, bounds, tol) else -np.inf
+    nodes = pruned = incumbents = heuristic_incumbents = restored = 0
+    aborted = False
+    timers = {'node': 0.0, 'is_feasible': 0.0, 'lp': 0.0,
+              'heuristics': 0.0} if profile else None
+    columns = matrix_columns(matrix) if heuristics else None
+
+    # Nova candidata (solução, lucro) vinda de uma folha (heuristic None)
+    # ou de uma heurística; retorna True se o callback pedir para parar.
+    def offer(found, heuristic=None):
+        nonlocal best_solution, best_profit, incumbents, heuristic_incumbents
+        if found is None or found[1] <= best_profit:
             return False
-    return True
-
-# Algoritmo Branch and Bound
-def branch_and_bound(profits, constraints, bounds, current_solution=None, best_solution=None, best_profit=0, level=0):
-    if current_solution is None:
-        current_solution = [0] * len(profits)
-
-    if best_solution is None:
-        best_solution = current_solution[:]
-
-    if level == len(profits):
-        if is_feasible(current_solution, constraints, bounds):
-            current_profit = np.dot(profits, current_solution)
-            if current_profit > best_profit:
-                best_solution = current_solution[:]
-                best_profit = current_profit
-        return best_solution, best_profit
-
-    # Ramificação: iterar sobre todos os possíveis valores inteiros para a variável atual
-    for value in range(bounds[level] + 1):
-        new_solution = current_solution[:]
-        new_solution[level] = value
-
-        if is_feasible(new_solution, constraints, bounds):
-            best_solution, best_profit = branch_and_bound(profits, constraints, bounds, new_solution, best_solution, best_profit, level + 1)
-
-    return best_solution, best_profit
-
-# Dados do problema
-profits = [5, 5, 5]  # Lucros das cervejas A, B, C
-constraints = [
-    [6, 3, 5],  # Moagem
-    [5, 4, 3],  # Aquecimento
-    [3, 2, 2],  # Pasteurização
-    [0, 0, 1]   # Demanda da cerveja C
-]
-bounds = [500, 350, 150, 20]  # Limites das restrições
-
-# Resolve o problema usando o algoritmo Branch and Bound
-best_solution, best_profit = branch_and_bound(profits, constraints, bounds)
-
-# Imprime os resultados
-print("Melhor solução encontrada:")
-print("Cerveja A produzida:", best_solution[0])
-print("Cerveja B produzida:", best_solution[1])
-print("Cerveja C produzida:", best_solution[2])
-print("Lucro total:", best_profit)
+        best_solution, best_profit = found
+        incumbents += 1
+        if heuristic is not None:
+            heuristic_incumbents += 1
+        return bool(callback is not None and callback('incumbent', {
+            'solution': best_solution, 'profit': best_profit, 'nodes': nodes,
+            'heuristic': heuristic}))
+
+    if heuristics:
+        if timers is not None:
+            start = time.perf_counter()
+        aborted = offer(greedy(profits, matrix, bounds, integer, tol=tol,
+                               columns=columns), 'greedy')
+        if timers is not None:
+            timers['heuristics'] += time.perf_counter() - start
+
+    if cache is not None:
+        result, root = cache.solve(constraints, bounds, profits, prob='max', backend=backend,
+                                   profile=profile)
+        if root is None:
+            root = SimplexSolver()
+    else:
+        root = SimplexSolver()
+        result = root.run_simplex(constraints, bounds, profits, prob='max', backend=backend,
+                                  profile=profile)
+    cuts = 0
+    if result is not None and cut_rounds > 0 and integer is None:
+        root_state = propagation.root()
+        upper = [propagation.max_value(root_state, j) for j in range(n)]
+        result, cuts = add_root_cuts(root, result, matrix, bounds, upper, cut_rounds,
+                                     tol=tol)
+    open_nodes = NodePool(node_selection, seed, keep_solvers, max_open, spill_dir)
+    pseudo = PseudoCosts(n)
+    parallel = workers is not None and workers > 1
+    if result is not None:
+        solution, bound = relaxation_values(result, n)
+        open_nodes.push(open_nodes.add(-1, None, bound), None,
+                        (root.basis() if parallel else root, solution, propagation.root()))
+        if heuristics and not aborted:
+            if timers is not None:
+                start = time.perf_counter()
+            aborted = offer(round_solution(solution, profits, matrix, bounds, integer, tol,
+                                           fill=True, columns=columns), 'rounding')
+            if not aborted and root.method != 'dual':
+                aborted = offer(dive(root, solution, profits, matrix, bounds, integer, tol,
+                                     best_profit), 'diving')
+            if timers is not None:
+                timers['heuristics'] += time.perf_counter() - start
+    next_dive = dive_every
+
+    pool = None
+    # Nós enviados ao pool e ainda sem resultado: future -> (nó, limitante).
+    running = {}
+    if parallel:
+        # Importado só aqui: o import do módulo fica barato.
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(problem, root))
+
+    # Maior limitante entre a incumbente, os nós abertos e os em andamento.
+    def open_bound():
+        bounds = [best_profit] + [bound for _, bound in running.values()]
+        if open_nodes:
+            bounds.append(open_nodes.best_bound())
+        return max(bounds)
+
+    try:
+        while (open_nodes or running) and not aborted:
+            batch = []
+            while open_nodes and len(batch) + len(running) < (workers if pool else 1):
+                node, bound, warm = open_nodes.pop()
+                # Poda por limitante
+                if bound > best_profit + tol:
+                    batch.append((node, bound, warm))
+                else:
+                    pruned += 1
+            nodes += len(batch)
+            restored += sum(1 for _, _, warm in batch if warm is None)
+            if timers is not None:
+                start = time.perf_counter()
+            if pool:
+                for node, bound, warm in batch:
+                    future = pool.submit(_expand_in_worker, open_nodes.changes(node),
+                                         None if warm is None else warm[0], best_profit, tol)
+                    running[future] = (node, bound)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                results = [(running.pop(future), future.result())
+                           for future in sorted(done, key=lambda future: running[future][0])]
+            else:
+                results = []
+                for node, bound, warm in batch:
+                    if warm is None:
+                        if timers is not None:
+                            lp_start = time.perf_counter()
+                        warm = restore_node(problem, root, open_nodes.changes(node))
+                        if timers is not None:
+                            timers['lp'] += time.perf_counter() - lp_start
+                    results.append(((node, bound), (None, []) if warm is None else
+                                    expand_node(problem, warm[0], warm[1], best_profit, tol,
+                                                timers, warm[2])))
+            if timers is not None:
+                timers['node'] += time.perf_counter() - start
+
+            best_child = None
+            # Em paralelo, child é a base do filho e não o seu solver.
+            for (node, bound), (candidate, children) in results:
+                if candidate is not None and offer((candidate, np.dot(profits, candidate))):
+                    aborted = True
+                if heuristics and not aborted:
+                    if timers is not None:
+                        start = time.perf_counter()
+                    for child_bound, child, child_solution, child_state, change in children:
+                        if offer(round_solution(child_solution, profits, matrix, bounds,
+                                                integer, tol), 'rounding'):
+                            aborted = True
+                            break
+                        if best_child is None or child_bound > best_child[0]:
+                            best_child = (child_bound, child, child_solution, node, change)
+                    if timers is not None:
+                        timers['heuristics'] += time.perf_counter() - start
+                # Filhos empilhados em ordem inversa: na busca em
+                # profundidade o ramo x_j <= floor(v) é explorado primeiro.
+                for child_bound, child, child_solution, child_state, change in reversed(children):
+                    j, sense, limit, distance = change
+                    pseudo.update(j, sense, bound - child_bound, distance)
+                    if child_bound > best_profit + tol:
+                        estimate = None
+                        if node_selection == 'estimate':
+                            estimate = pseudo.estimate(child_bound, child_solution, integer, tol)
+                        open_nodes.push(open_nodes.add(node, (j, sense, limit), child_bound),
+                                        estimate, (child, child_solution, child_state))
+                    else:
+                        pruned += 1
+
+            if dive_every and nodes >= next_dive and best_child is not None and not aborted \
+                    and best_child[0] > best_profit + tol:
+                next_dive = nodes + dive_every
+                if timers is not None:
+                    start = time.perf_counter()
+                solver = best_child[1]
+                if pool:
+                    j, sense, limit, _ = best_child[4]
+                    warm = restore_node(problem, root, open_nodes.changes(best_child[3]) +
+                                        [(j, sense, limit)], solver)
+                    solver = None if warm is None else warm[0]
+                if solver is not None:
+                    aborted = offer(dive(solver, best_child[2], profits, matrix, bounds,
+                                         integer, tol, best_profit), 'diving')
+                if timers is not None:
+                    timers['heuristics'] += time.perf_counter() - start
+
+            if callback is not None and not aborted and callback('node', {
+                    'nodes': nodes, 'best_profit': best_profit,
+                    'best_bound': open_bound(), 'open': len(open_nodes)}):
+                aborted = True
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        # Lotes em disco e nós interrompidos entram no limitante antes de
+        # serem apagados.
+        best_bound = open_bound()
+        spilled = open_nodes.spilled_nodes
+        open_nodes.close()
+
+    # Relaxação da raiz ilimitada: não há limitante finito. Sem incumbente
+    # (problema inviável ou busca interrompida antes da primeira) o gap
+    # também é infinito.
+    unbounded = root.status == UNBOUNDED
+    if unbounded:
+        best_bound = np.inf
+    gap = (best_bound - best_profit) / max(1.0, abs(best_profit)) \
+        if best_profit > -np.inf and not unbounded else np.inf
+    if aborted:
+        status = 'aborted'
+    elif unbounded:
+        status = 'unbounded'
+    elif best_profit == -np.inf:
+        status = 'infeasible'
+    else:
+        status = 'optimal'
+    stats = {'status': status, 'best_bound': best_bound, 'gap': gap, 'nodes': nodes,
+             'pruned': pruned, 'incumbents': incumbents, 'aborted': aborted,
+             'cuts': cuts, 'heuristic_incumbents': heuristic_incumbents,
+             'restored': restored, 'spilled': spilled}
+    if profile:
+        stats['timers'] = timers
+        stats['simplex_timers'] = root.timers
+    if cache is not None and not aborted:
+        cache.put(key, {'result': copy.deepcopy((best_solution, best_profit, stats))})
+    return best_solution, best_profit, stats
+
+
+def _is_sparse(M):
+    return hasattr(M, 'tocsr') and hasattr(M, 'nnz')
+
+if __name__ == '__main__':
+    model = None
+    backend = 'float'
+    node_selection = 'best'
+    workers = None
+    cut_rounds = 0
+    usage = ('branchAndBound.py [--model <arquivo.mps|.lp>] '
+             '[--backend fraction|float|revised] [--nodes best|depth|estimate] '
+             '[--workers <n>] [--cuts <rodadas>]')
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h", [
+            "model=", "backend=", "nodes=", "workers=", "cuts="])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            print('model: arquivo MPS livre ou LP; as variáveis inteiras são '
+                  'as da seção de inteiras (marcadores INTORG/INTEND no MPS, '
+                  'General/Binary no LP) ou todas, se o arquivo não tiver '
+                  'essa seção. Sem --model resolve o exemplo das cervejas.')
+            sys.exit()
+        elif opt == "--model":
+            model = arg.strip()
+        elif opt == "--backend":
+            backend = arg.strip()
+        elif opt == "--nodes":
+            node_selection = arg.strip()
+        elif opt == "--workers":
+            workers = int(arg)
+        elif opt == "--cuts":
+            cut_rounds = int(arg)
+
+    if model is not None:
+        # Modelo lido de arquivo, na forma max c x, A x <= b, x >= 0
+        from modelio import read_model
+        model = read_model(model)
+        profits, constraints, bounds = model.canonical(sparse=backend == 'revised')
+        integer = sorted(model.integer) if model.integer else None
+        best_solution, best_profit, stats = branch_and_bound(
+            profits, constraints, bounds, backend=backend,
+            node_selection=node_selection, workers=workers,
+            cut_rounds=cut_rounds, integer=integer)
+        sign = -1 if model.prob == 'min' else 1
+        print("Melhor solução encontrada:")
+        for j, name in enumerate(model.columns):
+            if best_solution[j]:
+                print("%s = %s" % (name, best_solution[j]))
+        print("Objetivo:", sign * best_profit + model.offset)
+        print("Melhor limitante:", sign * stats['best_bound'] + model.offset)
+        print("Gap de otimalidade:", stats['gap'])
+        print("Nós explorados:", stats['nodes'])
+        sys.exit()
+
+    # Dados do problema
+    profits = [5, 5, 5]  # Lucros das cervejas A, B, C
+    constraints = [
+        [6, 3, 5],  # Moagem
+        [5, 4, 3],  # Aquecimento
+        [3, 2, 2],  # Pasteurização
+        [0, 0, 1]   # Demanda da cerveja C
+    ]
+    bounds = [500, 350, 150, 20]  # Limites das restrições
+
+    # Resolve o problema usando o algoritmo Branch and Bound
+    best_solution, best_profit, stats = branch_and_bound(profits, constraints, bounds)
+
+    # Imprime os resultados
+    print("Melhor solução encontrada:")
+    print("Cerveja A produzida:", best_solution[0])
+    print("Cerveja B produzida:", best_solution[1])
+    print("Cerveja C produzida:", best_solution[2])
+    print("Lucro total:", best_profit)
+    print("Melhor limitante:", stats['best_bound'])
+    print("Gap de otimalidade:", stats['gap'])
+    print("Nós explorados:", stats['nodes'])
@@ -0,0 +1,193 @@
+import math
+from fractions import Fraction
+import numpy as np
+
+
+# Planos de corte para a raiz do branch and bound. Os cortes são gerados a
+# partir do tableau ótimo de um SimplexSolver 'max' na forma padrão
+# (A x <= b, x >= 0, todas as variáveis x inteiras) e acrescentados ao LP
+# com add_row; o simplex dual re-otimiza depois de cada rodada.
+#
+# Linhas do LP: as restrições originais (matrix, bounds) seguidas dos
+# cortes já adicionados. A folga s_k de cada linha é usada para escrever os
+# cortes de volta em função de x: s_k = rhs_k - row_k x.
+class CutPool():
+    def __init__(self, matrix, bounds):
+        self.matrix = matrix
+        self.bounds = [_python(x) for x in bounds]
+        self.cuts = []
+        self.m, self.n = matrix.shape
+        # Uma folga é inteira se sua linha tem coeficientes e lado direito
+        # inteiros.
+        if hasattr(matrix, 'nnz'):
+            integral = np.ones(self.m, dtype=bool)
+            coo = matrix.tocoo()
+            integral[coo.row[coo.data != np.round(coo.data)]] = False
+        else:
+            integral = (np.asarray(matrix) == np.round(matrix)).all(axis=1)
+        self.integral_rows = [bool(integral[i]) and
+                              float(self.bounds[i]) == round(float(self.bounds[i]))
+                              for i in range(self.m)]
+
+    def add(self, solver, coeffs, rhs):
+        solver.add_row(coeffs, rhs)
+        self.cuts.append((coeffs, rhs))
+        self.integral_rows.append(all(float(x) == round(float(x)) for x in coeffs)
+                                  and float(rhs) == round(float(rhs)))
+
+    # Reescreve sum_j g_j x_j + sum_k h_k s_k >= 1 como coeffs . x <= rhs.
+    def to_row(self, g, h):
+        g = list(g)
+        h_orig = h[:self.m]
+        if any(h_orig):
+            if isinstance(h_orig[0], Fraction):
+                for i, weight in enumerate(h_orig):
+                    if weight:
+                        row = self.matrix[i]
+                        for j in range(self.n):
+                            g[j] -= weight * Fraction(_python(row[j]))
+            else:
+                g = np.asarray(g, dtype=np.float64) - \
+                    np.asarray(self.matrix.T @ np.asarray(h_orig, dtype=np.float64)).ravel()
+                g = list(g)
+        constant = sum(weight * self.bounds[i] for i, weight in enumerate(h_orig) if weight)
+        for k, weight in enumerate(h[self.m:]):
+            if weight:
+                coeffs, rhs = self.cuts[k]
+                for j in range(self.n):
+                    g[j] -= weight * coeffs[j]
+                constant += weight * rhs
+        # g x >= 1 - constant  <=>  -g x <= constant - 1
+        return [-x for x in g], constant - 1
+
+
+# Escalares NumPy viram int/float do Python (Fraction com numeradores
+# int64 estoura).
+def _python(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _frac(value):
+    return value - math.floor(value)
+
+
+# Linhas do tableau com (coeficientes sem b, lado direito), exatas no
+# backend 'fraction'.
+def _tableau_rows(solver):
+    if solver.backend == 'revised':
+        for r in range(len(solver.departing)):
+            yield solver.revised.row(r), solver.revised.x_B[r]
+    else:
+        for row in solver.tableau[:-1]:
+            yield row[:-1], row[len(row) - 1]
+
+
+# Cortes de Gomory inteiros-mistos: para cada linha cuja variável básica é
+# inteira e fracionária (f0), sum f_j/f0 x_j + sum (1-f_j)/(1-f0) x_j >= 1
+# nas variáveis não básicas inteiras e a_j/f0 ou -a_j/(1-f0) nas
+# contínuas (folgas de linhas não inteiras).
+def gomory_cuts(solver, pool, max_cuts=10, tol=1e-6):
+    exact = solver.backend == 'fraction'
+    # Longe de 0 e 1 para evitar cortes numericamente instáveis.
+    away = 0 if exact else 0.01
+    n = pool.n
+    position = dict((var, j) for j, var in enumerate(solver.entering))
+    basic = set(position[var] for var in solver.departing)
+    integer = [True] * n + pool.integral_rows
+    candidates = []
+    for r, (row, value) in enumerate(_tableau_rows(solver)):
+        if not integer[position[solver.departing[r]]]:
+            continue
+        f0 = _frac(value)
+        if f0 <= away + (0 if exact else tol) or f0 >= 1 - away - (0 if exact else tol):
+            continue
+        candidates.append((min(f0, 1 - f0), r, row, f0))
+    candidates.sort(key=lambda item: -item[0])
+
+    cuts = []
+    for _, r, row, f0 in candidates[:max_cuts]:
+        one = Fraction(1) if exact else 1.0
+        g = [0 * one] * len(integer)
+        for j in range(len(integer)):
+            if j in basic:
+                continue
+            a = row[j]
+            if integer[j]:
+                f = _frac(a)
+                g[j] = f / f0 if f <= f0 else (1 - f) / (1 - f0)
+            else:
+                g[j] = a / f0 if a >= 0 else -a / (1 - f0)
+            if not exact and abs(g[j]) < 1e-9:
+                g[j] = 0.0
+        coeffs, rhs = pool.to_row(g[:n], g[n:])
+        if not exact:
+            # Folga pequena contra erros de arredondamento.
+            rhs += tol
+        cuts.append((coeffs, rhs))
+    return cuts
+
+
+# Cortes de cobertura: numa linha com coeficientes não negativos, um
+# conjunto C de variáveis binárias com sum_C a_j > b não cabe inteiro, logo
+# sum_C x_j <= |C| - 1. A cobertura é escolhida gulosamente por
+# (1 - x_j) / a_j e só é usada se o ponto atual viola o corte.
+def cover_cuts(pool, solution, binary, tol=1e-6):
+    matrix = pool.matrix
+    cuts = []
+    for i in range(pool.m):
+        row = matrix.getrow(i).toarray().ravel() if hasattr(matrix, 'nnz') \
+            else np.asarray(matrix[i], dtype=np.float64)
+        if (row < 0).any():
+            continue
+        items = [j for j in range(pool.n) if row[j] > 0 and binary[j]]
+        capacity = float(pool.bounds[i])
+        if sum(row[j] for j in items) <= capacity:
+            continue
+        items.sort(key=lambda j: (1 - solution[j]) / row[j])
+        cover, weight = [], 0.0
+        for j in items:
+            cover.append(j)
+            weight += row[j]
+            if weight > capacity + tol:
+                break
+        # Cobertura mínima: tira quem tem menor x_j enquanto ainda cobre.
+        for j in sorted(cover, key=lambda j: solution[j]):
+            if weight - row[j] > capacity + tol:
+                cover.remove(j)
+                weight -= row[j]
+        if sum(solution[j] for j in cover) > len(cover) - 1 + tol:
+            coeffs = [0] * pool.n
+            for j in cover:
+                coeffs[j] = 1
+            cuts.append((coeffs, len(cover) - 1))
+    return cuts
+
+
+# Rodadas de cortes na raiz: gera cortes de Gomory e de cobertura a partir
+# da solução atual, acrescenta-os ao solver e re-otimiza pelo simplex dual.
+# upper[j] é o maior valor viável de x_j (binária se upper[j] <= 1).
+# Retorna (resultado do LP, número de cortes); o resultado é None se o LP
+# com cortes ficou inviável.
+def add_root_cuts(solver, result, matrix, bounds, upper, rounds=5, max_cuts=10,
+                  tol=1e-6):
+    # Os cortes supõem x >= 0 sem limites complementados no tableau.
+    if solver.method != 'standard' or solver.prob != 'max' or \
+            solver.lower is not None:
+        return result, 0
+    pool = CutPool(matrix, bounds)
+    n = pool.n
+    binary = [upper[j] <= 1 for j in range(n)]
+    for _ in range(rounds):
+        solution = [float(result['x_%d' % (j + 1)]) for j in range(n)]
+        if all(abs(v - round(v)) <= tol for v in solution):
+            break
+        cuts = cover_cuts(pool, solution, binary, tol)
+        cuts += gomory_cuts(solver, pool, max_cuts, tol)
+        if not cuts:
+            break
+        for coeffs, rhs in cuts:
+            pool.add(solver, coeffs, rhs)
+        result = solver.dual_simplex()
+        if result is None:
+            break
+    return result, len(pool.cuts)
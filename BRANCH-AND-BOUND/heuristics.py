@@ -0,0 +1,157 @@
+import numpy as np
+
+
+# Heurísticas primais do branch and bound: constroem soluções inteiras
+# viáveis (incumbentes) sem esperar por uma folha inteira da árvore, para
+# que a poda por limitante funcione desde o início. O problema é o do
+# branch_and_bound: max profits x, constraints x <= bounds, x >= 0, com as
+# variáveis de integer inteiras (todas, se integer for None).
+#
+# Todas retornam (solução, lucro) ou None. Nas soluções as variáveis
+# inteiras são ints do Python, como nas folhas da árvore, e a viabilidade
+# é verificada com a mesma tolerância tol (absoluta, por linha) que o
+# expand_node usa nas folhas: um ponto aceito por uma heurística também é
+# aceito quando a árvore chega nele, e vice-versa.
+
+
+def _feasible(x, matrix, bounds, tol):
+    return bool(np.all(matrix @ x <= np.asarray(bounds) + tol))
+
+
+def _candidate(x, integer):
+    candidate = [float(v) for v in x]
+    for j in (range(len(candidate)) if integer is None else integer):
+        candidate[j] = int(round(candidate[j]))
+    return candidate
+
+
+def matrix_columns(matrix):
+    # Colunas (linhas, valores) da matriz, densa ou esparsa.
+    if hasattr(matrix, 'tocsc'):
+        A = matrix.tocsc()
+        return [(A.indices[A.indptr[j]:A.indptr[j + 1]],
+                 A.data[A.indptr[j]:A.indptr[j + 1]].astype(np.float64))
+                for j in range(A.shape[1])]
+    A = np.asarray(matrix, dtype=np.float64)
+    columns = []
+    for j in range(A.shape[1]):
+        rows = np.flatnonzero(A[:, j])
+        columns.append((rows, A[rows, j]))
+    return columns
+
+
+# Preenchimento guloso: a partir de start (x = 0 por padrão, que precisa
+# ser viável), aumenta cada variável de lucro positivo o máximo possível,
+# em ordem decrescente de lucro por recurso consumido (soma de a_ij / b_i
+# nas linhas com a_ij > 0). Variáveis inteiras sobem em passos inteiros.
+def greedy(profits, matrix, bounds, integer=None, start=None, tol=1e-6,
+           columns=None):
+    n = len(profits)
+    profits = np.asarray(profits, dtype=np.float64)
+    bounds = np.asarray(bounds, dtype=np.float64)
+    x = np.zeros(n) if start is None else np.array(start, dtype=np.float64)
+    slack = bounds - matrix @ x
+    if np.any(slack < -tol):
+        return None
+    if columns is None:
+        columns = matrix_columns(matrix)
+    is_integer = np.ones(n, dtype=bool) if integer is None else \
+        np.isin(np.arange(n), integer)
+    scale = np.where(np.abs(bounds) > tol, np.abs(bounds), 1.0)
+    order = []
+    for j in np.flatnonzero(profits > 0):
+        rows, values = columns[j]
+        used = np.sum(values[values > 0] / scale[rows[values > 0]])
+        order.append((-profits[j] / used if used > 0 else -np.inf, j))
+    order.sort()
+    for _, j in order:
+        rows, values = columns[j]
+        positive = values > 0
+        step = np.inf
+        if positive.any():
+            step = np.min(np.maximum(slack[rows[positive]], 0) / values[positive])
+        if not np.isfinite(step):
+            # Variável sem limite: o LP seria ilimitado.
+            continue
+        if is_integer[j]:
+            step = np.floor(step + tol)
+        if step <= 0:
+            continue
+        x[j] += step
+        slack[rows] -= values * step
+    if not _feasible(x, matrix, bounds, tol):
+        return None
+    candidate = _candidate(x, integer)
+    return candidate, float(np.dot(profits, candidate))
+
+
+# Arredondamento da solução de uma relaxação: tenta o arredondamento para
+# o inteiro mais próximo e para baixo nas variáveis inteiras (as contínuas
+# ficam como estão); com fill=True o arredondamento para baixo é depois
+# completado pelo guloso. Retorna a melhor candidata viável.
+def round_solution(solution, profits, matrix, bounds, integer=None, tol=1e-6,
+                   fill=False, columns=None):
+    x = np.asarray(solution, dtype=np.float64)
+    index = np.arange(len(x)) if integer is None else np.asarray(integer, dtype=int)
+    best = None
+    nearest = x.copy()
+    nearest[index] = np.round(x[index])
+    down = x.copy()
+    down[index] = np.floor(x[index] + tol)
+    for trial in (nearest, down):
+        if np.any(trial < 0) or not _feasible(trial, matrix, bounds, tol):
+            continue
+        candidate = _candidate(trial, integer)
+        profit = float(np.dot(profits, candidate))
+        if best is None or profit > best[1]:
+            best = candidate, profit
+    if fill:
+        filled = greedy(profits, matrix, bounds, integer, down, tol=tol,
+                        columns=columns)
+        if filled is not None and (best is None or filled[1] > best[1]):
+            best = filled
+    return best
+
+
+# Mergulho (diving) a partir do LP de um nó: fixa repetidamente a variável
+# inteira menos fracionária no inteiro mais próximo (x_j <= floor ou
+# x_j >= ceil, como limite da variável) e re-otimiza pelo simplex dual,
+# até a relaxação ficar inteira. Se o lado escolhido for inviável tenta o
+# outro; desiste quando ambos são inviáveis, após max_depth fixações ou
+# quando o LP não supera mais best_profit.
+def dive(solver, solution, profits, matrix, bounds, integer=None, tol=1e-6,
+         best_profit=-np.inf, max_depth=None):
+    n = len(profits)
+    columns = range(n) if integer is None else integer
+    current = solver.snapshot()
+    depth = 0
+    while True:
+        fractional = []
+        for j in columns:
+            value = solution[j]
+            frac = min(value - np.floor(value), np.ceil(value) - value)
+            if frac > tol:
+                fractional.append((frac, j))
+        if not fractional:
+            candidate = _candidate(solution, integer)
+            if not _feasible(np.asarray(candidate, dtype=np.float64), matrix, bounds, tol):
+                return None
+            return candidate, float(np.dot(profits, candidate))
+        if max_depth is not None and depth >= max_depth:
+            return None
+        _, j = min(fractional)
+        value = solution[j]
+        down, up = ('<=', int(np.floor(value))), ('>=', int(np.ceil(value)))
+        result = None
+        for sense, limit in ((down, up) if value - np.floor(value) < 0.5 else (up, down)):
+            trial = current.snapshot()
+            if not trial.set_bound(j, limit, sense):
+                continue
+            result = trial.dual_simplex()
+            if result is not None:
+                break
+        if result is None or float(result['z']) <= best_profit + tol:
+            return None
+        current = trial
+        solution = [float(result['x_%d' % (k + 1)]) for k in range(n)]
+        depth += 1
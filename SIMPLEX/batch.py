@@ -0,0 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simplex import SimplexSolver, OPTIMAL, ITERATION_LIMIT, TIME_LIMIT, ABORTED
+
+
+def solve_batch(A, bs, cs, prob='max', workers=None, chunksize=16,
+                **options):
+    ''' Resolve vários cenários que compartilham a matriz A e diferem só
+    em b e/ou c. bs e cs são listas de vetores do mesmo tamanho (ou com
+    um único vetor, usado em todos os cenários).
+
+    A é preparada uma única vez (por processo) e cada cenário parte da
+    base ótima do anterior. Com workers > 1 os cenários são divididos em
+    blocos de chunksize e distribuídos em um pool de processos. É um
+    gerador de tuplas (índice, solução, status), produzidas à medida que
+    os cenários terminam. As demais opções vão para run_simplex; com
+    presolve=True cada cenário é resolvido do zero (o problema reduzido
+    depende de b e c).
+    '''
+    options.setdefault('backend', 'float')
+    count = max(len(bs), len(cs))
+    scenarios = [(index, bs[index] if len(bs) > 1 else bs[0],
+                  cs[index] if len(cs) > 1 else cs[0])
+                 for index in range(count)]
+
+    if workers is None or workers <= 1:
+        for result in _solve_scenarios(A, scenarios, prob, options):
+            yield result
+        return
+
+    chunks = [scenarios[start:start + chunksize]
+              for start in range(0, count, chunksize)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(A,)) as pool:
+        futures = [pool.submit(_solve_chunk, chunk, prob, options)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+
+
+def warm_resolve(solver, b, c, cold):
+    ''' Leva um solver com solução ótima para novos b e/ou c (None quando
+    não mudam), dados como em run_simplex, com partida a quente: c entra
+    primeiro (a base continua primal viável) e b depois (continua dual
+    viável), cada um re-otimizado. Se o problema intermediário (c novo, b
+    antigo) não tem ótimo, seu status não vale para o problema final e a
+    base não serve para o simplex dual: o problema é resolvido do zero
+    por cold(), que retorna (solução, solver). Retorna (solução, solver).
+    '''
+    solution = solver.get_current_solution()
+    if c is not None:
+        solver.update_problem(c=c)
+        solution = solver.reoptimize()
+        if b is None or solver.status in (ITERATION_LIMIT, TIME_LIMIT,
+                                          ABORTED):
+            return solution, solver
+        if solver.status != OPTIMAL:
+            return cold()
+    if b is not None:
+        solver.update_problem(b=b)
+        solution = solver.reoptimize()
+    return solution, solver
+
+
+def _solve_scenarios(A, scenarios, prob, options):
+    ''' Resolve os cenários em sequência, com partida a quente.
+    '''
+    solver = None
+    previous_b = previous_c = None
+    for index, b, c in scenarios:
+        def cold():
+            fresh = SimplexSolver()
+            return fresh.run_simplex(A, b, c, prob=prob, **options), fresh
+
+        # Presolved solvers work on the reduced problem, so their basis
+        # cannot take a new b or c.
+        if solver is None or solver.status != OPTIMAL or \
+                options.get('presolve'):
+            solution, solver = cold()
+        else:
+            solution, solver = warm_resolve(
+                solver, b if list(b) != previous_b else None,
+                c if list(c) != previous_c else None, cold)
+        previous_b, previous_c = list(b), list(c)
+        yield index, solution, solver.status
+
+
+# Matriz A de cada processo do pool, enviada uma única vez.
+_worker_A = None
+
+
+def _init_worker(A):
+    global _worker_A
+    _worker_A = A
+
+
+def _solve_chunk(scenarios, prob, options):
+    return list(_solve_scenarios(_worker_A, scenarios, prob, options))
@@ -0,0 +1,230 @@
+import copy, hashlib, os, pickle, tempfile
+from collections import OrderedDict
+from fractions import Fraction
+
+from simplex import SimplexSolver, OPTIMAL, INFEASIBLE, UNBOUNDED
+from batch import warm_resolve
+
+# Options that only change how a solve is observed, not its result.
+_UNKEYED = ('enable_msg', 'latex', 'report', 'callback', 'profile')
+
+
+def _number(x):
+    ''' Texto canônico de um número: 3, 3.0 e Fraction(3) dão "3".
+    '''
+    x = Fraction(x)
+    return str(int(x.numerator)) if x.denominator == 1 else \
+        "%d/%d" % (x.numerator, x.denominator)
+
+
+def _update(digest, *parts):
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else
+                      str(part).encode())
+        digest.update(b'\0')
+
+
+def _hash_matrix(digest, A):
+    if hasattr(A, 'tocsr') and hasattr(A, 'nnz'):
+        import numpy as np
+        A = A.tocsr(copy=True)
+        A.sum_duplicates()
+        A.eliminate_zeros()
+        A.sort_indices()
+        _update(digest, 'sparse', A.shape,
+                A.indptr.astype(np.int64).tobytes(),
+                A.indices.astype(np.int64).tobytes(),
+                A.data.astype(np.float64).tobytes())
+        return
+    _update(digest, 'dense', len(A))
+    for row in A:
+        _update(digest, len(row), ' '.join(
+            "%d:%s" % (j, _number(x)) for j, x in enumerate(row) if x != 0))
+
+
+def problem_keys(A, b, c, prob='max', ineq=None, integer=None,
+                 options=None):
+    ''' Chaves (estrutura, completa) de um problema. A estrutura cobre A,
+    prob, ineq, a integralidade e as opções do solver; a chave completa
+    acrescenta b e c. Problemas que diferem só em b e/ou c têm a mesma
+    estrutura. ineq vazio equivale ao padrão de run_simplex ('<=' em
+    'max', '>=' em 'min').
+    '''
+    if not ineq:
+        ineq = ['<=' if prob == 'max' else '>='] * len(b)
+    options = options or {}
+    digest = hashlib.sha256()
+    _update(digest, prob, ','.join(ineq),
+            'all' if integer is None else ','.join(map(str, sorted(integer))))
+    for name in sorted(options):
+        if name in _UNKEYED:
+            continue
+        value = options[name]
+        _update(digest, name, getattr(value, 'name', value))
+    _hash_matrix(digest, A)
+    structure = digest.hexdigest()
+    b_key = tuple(_number(x) for x in b)
+    c_key = tuple(_number(x) for x in c)
+    digest = hashlib.sha256(structure.encode())
+    _update(digest, ' '.join(b_key), ' '.join(c_key))
+    return structure, digest.hexdigest(), b_key, c_key
+
+
+class SolutionCache():
+    ''' Cache de soluções na frente do SimplexSolver e do
+    branch_and_bound.
+
+    Os problemas são identificados por problem_keys. Os registros ficam
+    num LRU em memória com até maxsize entradas e, se directory for
+    dado, também em disco (um arquivo pickle por problema, que sobrevive
+    entre processos). Um acerto exato devolve a solução guardada sem
+    rodar o simplex; um problema com a mesma estrutura e outro b e/ou c
+    (acerto próximo) parte de uma cópia do solver ótimo guardado e é
+    re-otimizado a partir da base dele, como em batch.solve_batch.
+
+    stats conta 'hits', 'near_hits' e 'misses'; last indica o tipo da
+    última consulta ('hit', 'near' ou 'miss') e status o status dela.
+    '''
+
+    def __init__(self, maxsize=128, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.entries = OrderedDict()
+        # Structure key -> full key of the latest entry with a solver.
+        self.latest = {}
+        self.stats = {'hits': 0, 'near_hits': 0, 'misses': 0}
+        self.last = None
+        self.status = None
+
+    def get(self, key):
+        ''' Registro da chave completa (memória, depois disco) ou None.
+        '''
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        record = self._load(key + '.pkl')
+        if record is not None:
+            self._remember(key, record)
+        return record
+
+    def put(self, key, record, structure=None):
+        self._remember(key, record)
+        if structure is not None and record.get('solver') is not None:
+            self.latest[structure] = key
+        if self.directory is not None:
+            self._dump(key + '.pkl', record)
+            if structure is not None and record.get('solver') is not None:
+                self._dump(structure + '.near', key)
+
+    def near(self, structure):
+        ''' Registro mais recente com a mesma estrutura e um solver
+        guardado, ou None.
+        '''
+        key = self.latest.get(structure)
+        if key is None:
+            key = self._load(structure + '.near')
+        if key is None:
+            return None
+        record = self.get(key)
+        return record if record and record.get('solver') is not None \
+            else None
+
+    def clear(self):
+        self.entries.clear()
+        self.latest.clear()
+
+    def _remember(self, key, record):
+        self.entries[key] = record
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _load(self, name):
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _dump(self, name, value):
+        # Written to a temporary file and renamed, so readers in other
+        # processes never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(self.directory, name))
+
+    def solve(self, A, b, c, prob='max', ineq=[], **options):
+        ''' Como SimplexSolver.run_simplex, mas consultando o cache.
+        Retorna (solução, solver); o solver é uma cópia própria do
+        chamador (pode ser re-otimizado ou ramificado) e é None quando o
+        problema não tem solução ótima. Com report ou latex o cache é
+        ignorado, pois o relatório precisa da execução completa.
+        '''
+        if options.get('report') is not None or options.get('latex'):
+            solver = SimplexSolver()
+            solution = solver.run_simplex(A, b, c, prob, ineq, **options)
+            self.status = solver.status
+            return solution, solver
+        structure, key, b_key, c_key = problem_keys(A, b, c, prob, ineq,
+                                                    None, options)
+        record = self.get(key)
+        if record is not None:
+            self.stats['hits'] += 1
+            self.last = 'hit'
+            self.status = record['status']
+            solver = record['solver']
+            return copy.copy(record['solution']), \
+                self._copy_solver(solver, options) if solver else None
+
+        def cold():
+            fresh = SimplexSolver()
+            return fresh.run_simplex(A, b, c, prob, ineq, **options), fresh
+
+        # Presolved solvers work on the reduced problem, so their basis
+        # cannot take a new b or c.
+        record = None if options.get('presolve') else self.near(structure)
+        if record is not None:
+            self.stats['near_hits'] += 1
+            self.last = 'near'
+            # Falls back to cold() when the new c alone has no optimum, so
+            # no status of a partial update is returned or stored.
+            solution, solver = warm_resolve(
+                self._copy_solver(record['solver'], options),
+                b if b_key != record['b'] else None,
+                c if c_key != record['c'] else None, cold)
+        else:
+            self.stats['misses'] += 1
+            self.last = 'miss'
+            solution, solver = cold()
+
+        self.status = solver.status
+        # Iteration/time limits and aborted runs are not final answers.
+        if solver.status in (OPTIMAL, INFEASIBLE, UNBOUNDED):
+            stored = self._copy_solver(solver) \
+                if solver.status == OPTIMAL else None
+            self.put(key, {'solution': copy.copy(solution),
+                           'status': solver.status, 'solver': stored,
+                           'b': b_key, 'c': c_key}, structure)
+        return solution, solver if solver.status == OPTIMAL else None
+
+    def run_simplex(self, A, b, c, prob='max', ineq=[], **options):
+        ''' Só a solução de solve (None se não houver ótimo).
+        '''
+        return self.solve(A, b, c, prob, ineq, **options)[0]
+
+    def _copy_solver(self, solver, options=None):
+        state = solver.snapshot()
+        # Statistics and pricing weights must not be shared with the
+        # stored copy; callbacks are usually closures and cannot be
+        # pickled.
+        state.stats = copy.deepcopy(solver.stats)
+        state.timers = state.stats.get('timers')
+        state.pricing = copy.deepcopy(solver.pricing)
+        state.callback = options.get('callback') if options else None
+        return state
@@ -0,0 +1,786 @@
+import getopt, gzip, re, sys
+from array import array
+from fractions import Fraction
+
+INF = float('inf')
+
+
+class Model():
+    ''' Modelo lido de um arquivo MPS livre ou LP (formato CPLEX).
+
+    Os coeficientes ficam em triplas (linha, coluna, valor) guardadas em
+    arrays compactos, sem listas de listas intermediárias; problem()
+    monta a matriz no formato pedido pelo SimplexSolver (esparsa do scipy
+    ou densa). lower e upper são os limites das variáveis (índice ->
+    valor, só os diferentes de 0 e +inf), integer o conjunto de índices
+    das variáveis inteiras e offset a constante do objetivo.
+    '''
+
+    def __init__(self, name=''):
+        self.name = name
+        self.prob = 'min'
+        self.objective_name = 'obj'
+        self.columns = []
+        self.column_index = {}
+        self.rows = []
+        self.row_index = {}
+        self.ineq = []
+        self.b = []
+        self.c = []
+        self.offset = 0.0
+        self.lower = {}
+        self.upper = {}
+        self.ranges = {}
+        self.integer = set()
+        self.entries_row = array('i')
+        self.entries_col = array('i')
+        self.entries_val = array('d')
+
+    @classmethod
+    def from_arrays(cls, A, b, c, prob='max', ineq=None, integer=(),
+                    name=''):
+        ''' Modelo a partir dos argumentos de run_simplex (A pode ser uma
+        lista de listas ou uma matriz esparsa do scipy).
+        '''
+        model = cls(name)
+        model.prob = prob
+        for j, cost in enumerate(c):
+            model.column('x_%d' % (j + 1))
+            model.c[j] = float(cost)
+        if not ineq:
+            ineq = ['<=' if prob == 'max' else '>='] * len(b)
+        for i, rhs in enumerate(b):
+            model.row('c_%d' % (i + 1), ineq[i])
+            model.b[i] = float(rhs)
+        if hasattr(A, 'tocoo') and hasattr(A, 'nnz'):
+            coo = A.tocoo()
+            for i, j, value in zip(coo.row, coo.col, coo.data):
+                model.add_entry(int(i), int(j), float(value))
+        else:
+            for i, values in enumerate(A):
+                for j, value in enumerate(values):
+                    if value != 0:
+                        model.add_entry(i, j, float(value))
+        model.integer = set(integer)
+        return model
+
+    def column(self, name):
+        j = self.column_index.get(name)
+        if j is None:
+            j = self.column_index[name] = len(self.columns)
+            self.columns.append(name)
+            self.c.append(0.0)
+        return j
+
+    def row(self, name, sense):
+        if name in self.row_index:
+            raise ValueError("Linha repetida: %s" % name)
+        i = self.row_index[name] = len(self.rows)
+        self.rows.append(name)
+        self.ineq.append(sense)
+        self.b.append(0.0)
+        return i
+
+    def add_entry(self, i, j, value):
+        self.entries_row.append(i)
+        self.entries_col.append(j)
+        self.entries_val.append(value)
+
+    @property
+    def nnz(self):
+        return len(self.entries_val)
+
+    def _bound_rows(self):
+        ''' Restrições extras (coluna, sentido, valor) para os limites das
+        variáveis; o simplex só conhece x >= 0.
+        '''
+        extra = []
+        for j in sorted(self.lower):
+            value = self.lower[j]
+            if value < 0:
+                raise ValueError("Limite inferior negativo (ou variável "
+                                 "livre) não suportado: %s" %
+                                 self.columns[j])
+            extra.append((j, '>=', value))
+        for j in sorted(self.upper):
+            extra.append((j, '<=', self.upper[j]))
+        return extra
+
+    def variable_bounds(self):
+        ''' Argumento bounds de run_simplex: um par (inferior, superior)
+        por coluna, com None onde o limite é o padrão (0 e sem limite).
+        '''
+        return [(self.lower.get(j), self.upper.get(j))
+                for j in range(len(self.columns))]
+
+    def problem(self, sparse=True, exact=False, bound_rows=True):
+        ''' Argumentos de run_simplex: (A, b, c, prob, ineq). Com
+        bound_rows os limites das variáveis viram linhas no fim; senão
+        ficam de fora e são passados por variable_bounds. Com sparse=True
+        A é uma csc_matrix do scipy; senão uma lista de listas (de frações
+        com exact=True, para o backend 'fraction').
+        '''
+        rows = array('i', self.entries_row)
+        cols = array('i', self.entries_col)
+        vals = array('d', self.entries_val)
+        ineq, b = list(self.ineq), list(self.b)
+        m = len(self.rows)
+        # The second side of a ranged row is a copy of the row.
+        copies = {}
+        for i in sorted(self.ranges):
+            low, high = self.ranges[i]
+            ineq[i], b[i] = '>=', low
+            ineq.append('<=')
+            b.append(high)
+            copies[i] = m
+            m += 1
+        if copies:
+            for i, j, value in zip(self.entries_row, self.entries_col,
+                                   self.entries_val):
+                if i in copies:
+                    rows.append(copies[i])
+                    cols.append(j)
+                    vals.append(value)
+        for j, sense, value in self._bound_rows() if bound_rows else ():
+            rows.append(m)
+            cols.append(j)
+            vals.append(1.0)
+            ineq.append(sense)
+            b.append(value)
+            m += 1
+        n = len(self.columns)
+        num = _exact if exact else _plain
+        c = [num(x) for x in self.c]
+        b = [num(x) for x in b]
+        if sparse:
+            import numpy as np
+            from scipy.sparse import csc_matrix
+            A = csc_matrix((np.frombuffer(vals, dtype=np.float64),
+                            (np.frombuffer(rows, dtype=np.int32),
+                             np.frombuffer(cols, dtype=np.int32))),
+                           shape=(m, n))
+        else:
+            A = [[0] * n for _ in range(m)]
+            for i, j, value in zip(rows, cols, vals):
+                A[i][j] += num(value)
+        return A, b, c, self.prob, ineq
+
+    def canonical(self, sparse=True):
+        ''' Forma do branch_and_bound: (profits, constraints, bounds) com
+        max profits x, constraints x <= bounds e x >= 0. Linhas '>=' são
+        negadas, '=' viram duas linhas e, em problemas 'min', o objetivo
+        é negado.
+        '''
+        A, b, c, prob, ineq = self.problem(sparse)
+        if prob == 'min':
+            c = [-x for x in c]
+        signs, index = [], []
+        for i, sense in enumerate(ineq):
+            if sense in ('<=', '='):
+                index.append(i)
+                signs.append(1.0)
+            if sense in ('>=', '='):
+                index.append(i)
+                signs.append(-1.0)
+        bounds = [sign * b[i] for sign, i in zip(signs, index)]
+        if sparse:
+            from scipy.sparse import diags
+            A = (diags(signs) @ A.tocsr()[index]).tocsr()
+        else:
+            A = [[sign * x for x in A[i]] for sign, i in zip(signs, index)]
+        return c, A, bounds
+
+
+def _plain(value):
+    return int(value) if value.is_integer() else value
+
+
+def _exact(value):
+    # repr() gives the shortest decimal, so 0.1 becomes 1/10.
+    return int(value) if value.is_integer() else Fraction(repr(value))
+
+
+def _open(source, mode='r'):
+    ''' Aceita um caminho (.gz é descomprimido em streaming) ou um
+    stream já aberto.
+    '''
+    if not isinstance(source, str):
+        return source, False
+    if source.endswith('.gz'):
+        return gzip.open(source, mode + 't'), True
+    return open(source, mode), True
+
+
+MPS_SENSE = {'L': '<=', 'G': '>=', 'E': '='}
+
+
+def read_mps(source):
+    ''' Lê um arquivo MPS livre (campos separados por espaços; nomes sem
+    espaços). Entende NAME, OBJSENSE, ROWS, COLUMNS (com os marcadores
+    INTORG/INTEND de variáveis inteiras), RHS, RANGES, BOUNDS e ENDATA.
+    '''
+    stream, owned = _open(source)
+    model = Model()
+    section = None
+    objective = None
+    free_rows = set()
+    integer = False
+    try:
+        for line in stream:
+            if not line.strip() or line[0] == '*':
+                continue
+            fields = line.split()
+            if line[0] not in ' \t':
+                section = fields[0].upper()
+                if section == 'NAME':
+                    model.name = fields[1] if len(fields) > 1 else ''
+                elif section == 'OBJSENSE' and len(fields) > 1:
+                    model.prob = _mps_sense(fields[1])
+                elif section == 'ENDATA':
+                    break
+                elif section not in ('ROWS', 'COLUMNS', 'RHS', 'RANGES',
+                                     'BOUNDS', 'OBJSENSE'):
+                    raise ValueError("Seção MPS desconhecida: %s" % section)
+                continue
+            if section == 'COLUMNS':
+                if len(fields) >= 3 and fields[1] == "'MARKER'":
+                    integer = fields[2] == "'INTORG'"
+                    continue
+                j = model.column(fields[0])
+                if integer:
+                    model.integer.add(j)
+                for k in range(1, len(fields) - 1, 2):
+                    name, value = fields[k], float(fields[k + 1])
+                    if name == objective:
+                        model.c[j] += value
+                    elif name in free_rows:
+                        continue
+                    else:
+                        model.add_entry(_row(model, name), j, value)
+            elif section == 'ROWS':
+                kind, name = fields[0].upper(), fields[1]
+                if kind == 'N':
+                    if objective is None:
+                        objective = model.objective_name = name
+                    else:
+                        free_rows.add(name)
+                else:
+                    model.row(name, MPS_SENSE[kind])
+            elif section == 'RHS':
+                start = 1 if len(fields) % 2 else 0
+                for k in range(start, len(fields) - 1, 2):
+                    name, value = fields[k], float(fields[k + 1])
+                    if name == objective:
+                        model.offset = -value
+                    elif name not in free_rows:
+                        model.b[_row(model, name)] = value
+            elif section == 'RANGES':
+                start = 1 if len(fields) % 2 else 0
+                for k in range(start, len(fields) - 1, 2):
+                    model.ranges[_row(model, fields[k])] = \
+                        float(fields[k + 1])
+            elif section == 'BOUNDS':
+                _mps_bound(model, fields)
+            elif section == 'OBJSENSE':
+                model.prob = _mps_sense(fields[0])
+    finally:
+        if owned:
+            stream.close()
+    _resolve_ranges(model)
+    return model
+
+
+def _row(model, name):
+    try:
+        return model.row_index[name]
+    except KeyError:
+        raise ValueError("Linha desconhecida: %s" % name)
+
+
+def _mps_sense(token):
+    token = token.upper()
+    if token in ('MAX', 'MAXIMIZE'):
+        return 'max'
+    if token in ('MIN', 'MINIMIZE'):
+        return 'min'
+    raise ValueError("OBJSENSE desconhecido: %s" % token)
+
+
+def _mps_bound(model, fields):
+    kind = fields[0].upper()
+    # The bound set name is optional in free MPS.
+    if kind in ('FR', 'MI', 'PL', 'BV'):
+        name = fields[-1] if fields[-1] in model.column_index else fields[-2]
+        value = None
+    else:
+        name, value = fields[-2], float(fields[-1])
+    j = model.column_index.get(name)
+    if j is None:
+        raise ValueError("Coluna desconhecida: %s" % name)
+    if kind == 'UP':
+        model.upper[j] = value
+        if value < 0 and j not in model.lower:
+            model.lower[j] = -INF
+    elif kind == 'LO':
+        model.lower[j] = value
+    elif kind == 'FX':
+        model.lower[j] = model.upper[j] = value
+    elif kind == 'FR':
+        model.lower[j] = -INF
+        model.upper.pop(j, None)
+    elif kind == 'MI':
+        model.lower[j] = -INF
+    elif kind == 'PL':
+        model.upper.pop(j, None)
+    elif kind == 'BV':
+        model.upper[j] = 1.0
+        model.integer.add(j)
+    elif kind in ('LI', 'UI'):
+        model.integer.add(j)
+        (model.lower if kind == 'LI' else model.upper)[j] = value
+    else:
+        raise ValueError("Tipo de limite não suportado: %s" % kind)
+    if model.lower.get(j) == 0:
+        del model.lower[j]
+
+
+def _resolve_ranges(model):
+    ''' Troca o valor R de RANGES pelos lados (baixo, alto) da linha.
+    '''
+    for i, r in list(model.ranges.items()):
+        rhs, sense = model.b[i], model.ineq[i]
+        if sense == '<=':
+            model.ranges[i] = (rhs - abs(r), rhs)
+        elif sense == '>=':
+            model.ranges[i] = (rhs, rhs + abs(r))
+        else:
+            model.ranges[i] = (rhs, rhs + r) if r >= 0 else (rhs + r, rhs)
+
+
+LP_SECTIONS = [
+    (re.compile(r'(maximi[sz]e|maximum|max)\b', re.I), 'max'),
+    (re.compile(r'(minimi[sz]e|minimum|min)\b', re.I), 'min'),
+    (re.compile(r'(subject\s+to|such\s+that|s\.\s*t\.|st)\b', re.I),
+     'constraints'),
+    (re.compile(r'bounds?\b', re.I), 'bounds'),
+    (re.compile(r'(generals?|gen|integers?)\b', re.I), 'general'),
+    (re.compile(r'(binary|binaries|bin)\b', re.I), 'binary'),
+    (re.compile(r'end\b', re.I), 'end'),
+]
+
+LP_TOKEN = re.compile(r'''
+    \s*(?:
+      (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<sense><=|=<|>=|=>|<|>|=)
+    | (?P<sign>[+-])
+    | (?P<label>[A-Za-z_!"\#$%&()/,.;?@`'{}|~][^\s:+\-<>=*^\[\]]*\s*:)
+    | (?P<name>[A-Za-z_!"\#$%&()/,.;?@`'{}|~][^\s:+\-<>=*^\[\]]*)
+    )''', re.X)
+
+LP_SENSE = {'<=': '<=', '=<': '<=', '<': '<=', '>=': '>=', '=>': '>=',
+            '>': '>=', '=': '='}
+
+
+def _lp_section(line):
+    for pattern, section in LP_SECTIONS:
+        match = pattern.match(line)
+        if match and (match.end() == len(line) or
+                      section in ('max', 'min', 'constraints')):
+            return section, line[match.end():]
+    return None, line
+
+
+def _lp_tokens(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = LP_TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError("Não foi possível ler: %s" % text[pos:])
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'label':
+            value = value[:-1].strip()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _LinearExpression():
+    ''' Acumula termos coeficiente * variável de uma linha do arquivo LP
+    (que pode se estender por várias linhas do arquivo). Números sem
+    variável somam em constant, em qualquer posição da expressão.
+    '''
+
+    def __init__(self):
+        self.label = None
+        self.terms = []
+        self.sense = None
+        self.rhs_sign = 1.0
+        self.rhs = None
+        self.sign = 1.0
+        self.coef = None
+        self.constant = 0.0
+
+    def feed(self, kind, value):
+        ''' Consome um token; retorna True quando a restrição termina (com
+        o lado direito).
+        '''
+        if kind == 'label' and not self.terms and self.sense is None:
+            self.label = value
+        elif self.sense is not None:
+            if kind == 'sign':
+                self.rhs_sign = -1.0 if value == '-' else 1.0
+            elif kind == 'number':
+                self.rhs = self.rhs_sign * float(value)
+                return True
+            elif kind == 'name' and value.lower() in ('inf', 'infinity'):
+                self.rhs = self.rhs_sign * INF
+                return True
+            else:
+                raise ValueError("Lado direito inválido: %s" % value)
+        elif kind == 'sign':
+            self._flush()
+            self.sign *= -1.0 if value == '-' else 1.0
+        elif kind == 'number':
+            self._flush()
+            self.coef = float(value)
+        elif kind == 'name':
+            coef = 1.0 if self.coef is None else self.coef
+            self.terms.append((value, self.sign * coef))
+            self.sign, self.coef = 1.0, None
+        elif kind == 'sense':
+            self._flush()
+            self.sense = LP_SENSE[value]
+        else:
+            raise ValueError("Token inesperado: %s" % value)
+        return False
+
+    def _flush(self):
+        ''' Um número ainda sem variável é uma constante.
+        '''
+        if self.coef is not None:
+            self.constant += self.sign * self.coef
+            self.sign, self.coef = 1.0, None
+
+
+def read_lp(source):
+    ''' Lê um arquivo no formato LP do CPLEX: objetivo (Maximize /
+    Minimize), Subject To, Bounds, General, Binary e End. Comentários
+    começam com '\\'.
+    '''
+    stream, owned = _open(source)
+    model = Model()
+    section = None
+    expression = None
+    try:
+        for line in stream:
+            line = line.split('\\', 1)[0].strip()
+            if not line:
+                continue
+            new_section, line = _lp_section(line)
+            if new_section is not None:
+                if new_section in ('max', 'min'):
+                    model.prob = new_section
+                    section = 'objective'
+                    expression = _LinearExpression()
+                else:
+                    if section == 'objective':
+                        _lp_objective(model, expression)
+                    section = new_section
+                    expression = _LinearExpression() \
+                        if section == 'constraints' else None
+                if section == 'end':
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+            if section in ('general', 'binary'):
+                for name in line.split():
+                    j = model.column(name)
+                    model.integer.add(j)
+                    if section == 'binary':
+                        model.upper[j] = 1.0
+            elif section == 'bounds':
+                _lp_bound(model, _lp_tokens(line))
+            elif section == 'objective':
+                for kind, value in _lp_tokens(line):
+                    if kind == 'label':
+                        model.objective_name = value
+                    elif expression.feed(kind, value):
+                        raise ValueError("Objetivo com lado direito")
+            elif section == 'constraints':
+                for kind, value in _lp_tokens(line):
+                    if expression.feed(kind, value):
+                        _lp_constraint(model, expression)
+                        expression = _LinearExpression()
+            else:
+                raise ValueError("Conteúdo fora de seção: %s" % line)
+        if section == 'objective':
+            _lp_objective(model, expression)
+    finally:
+        if owned:
+            stream.close()
+    return model
+
+
+def _lp_objective(model, expression):
+    expression._flush()
+    model.offset += expression.constant
+    for name, coef in expression.terms:
+        j = model.column(name)
+        model.c[j] += coef
+
+
+def _lp_constraint(model, expression):
+    name = expression.label or 'c_%d' % (len(model.rows) + 1)
+    i = model.row(name, expression.sense)
+    # Uma constante do lado esquerdo passa para o direito.
+    model.b[i] = expression.rhs - expression.constant
+    for column, coef in expression.terms:
+        model.add_entry(i, model.column(column), coef)
+
+
+def _lp_bound(model, tokens):
+    ''' Uma linha de Bounds: "x <= 4", "x >= 1", "x = 3", "2 <= x",
+    "2 <= x <= 8", "-inf <= x" ou "x free".
+    '''
+    values = []
+    sign = 1.0
+    for kind, value in tokens:
+        if kind == 'sign':
+            sign = -1.0 if value == '-' else 1.0
+        elif kind == 'number' or (kind == 'name' and
+                                  value.lower() in ('inf', 'infinity')):
+            values.append(sign * (INF if kind == 'name' else float(value)))
+            sign = 1.0
+        elif kind == 'sense':
+            values.append(LP_SENSE[value])
+        elif value.lower() == 'free':
+            values.append(None)
+        else:
+            values.append(model.column(value))
+    pattern = ''.join('f' if v is None else 'n' if isinstance(v, float) else
+                      's' if isinstance(v, str) else 'x' for v in values)
+    if pattern == 'xf':
+        j = values[0]
+        model.lower[j] = -INF
+        model.upper.pop(j, None)
+        return
+    if pattern == 'nsx':
+        # "v <= x" is "x >= v".
+        values = [values[2], {'<=': '>=', '>=': '<=', '=': '='}[values[1]],
+                  values[0]]
+        pattern = 'xsn'
+    if pattern == 'xsn':
+        j, sense, value = values
+        if sense in ('>=', '='):
+            model.lower[j] = value
+        if sense in ('<=', '='):
+            model.upper[j] = value
+    elif pattern == 'nsxsn' and values[1] == values[3] == '<=':
+        j = values[2]
+        model.lower[j] = values[0]
+        model.upper[j] = values[4]
+    else:
+        raise ValueError("Limite inválido: %s" %
+                         " ".join(str(v) for _, v in tokens))
+    if model.upper.get(j) == INF:
+        del model.upper[j]
+    if model.lower.get(j) == 0:
+        del model.lower[j]
+
+
+def _column_entries(model):
+    ''' Entradas agrupadas por coluna (ordem do MPS), sem montar a
+    matriz.
+    '''
+    order = sorted(range(model.nnz), key=lambda k: (model.entries_col[k],
+                                                   model.entries_row[k]))
+    columns = [[] for _ in model.columns]
+    for k in order:
+        columns[model.entries_col[k]].append((model.entries_row[k],
+                                              model.entries_val[k]))
+    return columns
+
+
+def _writefloat(value):
+    return '%d' % value if value.is_integer() else repr(value)
+
+
+def write_mps(model, target):
+    ''' Escreve o modelo em MPS livre.
+    '''
+    stream, owned = _open(target, 'w')
+    try:
+        stream.write("NAME %s\n" % (model.name or 'MODEL'))
+        if model.prob == 'max':
+            stream.write("OBJSENSE\n    MAX\n")
+        stream.write("ROWS\n N %s\n" % model.objective_name)
+        sense = {'<=': 'L', '>=': 'G', '=': 'E'}
+        for name, ineq in zip(model.rows, model.ineq):
+            stream.write(" %s %s\n" % (sense[ineq], name))
+        stream.write("COLUMNS\n")
+        integer = False
+        markers = 0
+        for j, entries in enumerate(_column_entries(model)):
+            if (j in model.integer) != integer:
+                integer = not integer
+                stream.write("    MARKER%d 'MARKER' '%s'\n" % (
+                    markers, 'INTORG' if integer else 'INTEND'))
+                markers += 1
+            name = model.columns[j]
+            if model.c[j] or not entries:
+                stream.write("    %s %s %s\n" % (name, model.objective_name,
+                                                 _writefloat(model.c[j])))
+            for i, value in entries:
+                stream.write("    %s %s %s\n" % (name, model.rows[i],
+                                                 _writefloat(value)))
+        if integer:
+            stream.write("    MARKER%d 'MARKER' 'INTEND'\n" % markers)
+        stream.write("RHS\n")
+        if model.offset:
+            stream.write("    RHS %s %s\n" % (model.objective_name,
+                                              _writefloat(-model.offset)))
+        for name, rhs in zip(model.rows, model.b):
+            if rhs:
+                stream.write("    RHS %s %s\n" % (name, _writefloat(rhs)))
+        if model.ranges:
+            stream.write("RANGES\n")
+            for i, (low, high) in sorted(model.ranges.items()):
+                r = high - low
+                if model.ineq[i] == '=' and model.b[i] == high:
+                    r = -r
+                stream.write("    RNG %s %s\n" % (model.rows[i],
+                                                  _writefloat(r)))
+        if model.lower or model.upper:
+            stream.write("BOUNDS\n")
+            for j in sorted(set(model.lower) | set(model.upper)):
+                name = model.columns[j]
+                low = model.lower.get(j, 0.0)
+                high = model.upper.get(j, INF)
+                if low == high:
+                    stream.write(" FX BND %s %s\n" % (name,
+                                                      _writefloat(low)))
+                    continue
+                if low == -INF:
+                    stream.write(" MI BND %s\n" % name)
+                elif low:
+                    stream.write(" LO BND %s %s\n" % (name,
+                                                      _writefloat(low)))
+                if high != INF:
+                    stream.write(" UP BND %s %s\n" % (name,
+                                                      _writefloat(high)))
+        stream.write("ENDATA\n")
+    finally:
+        if owned:
+            stream.close()
+
+
+def _lp_terms(terms):
+    text = []
+    for name, coef in terms:
+        sign = '-' if coef < 0 else '+'
+        coef = abs(coef)
+        text.append("%s %s%s" % (sign, '' if coef == 1 else
+                                 _writefloat(coef) + ' ', name))
+    line = " ".join(text) or "0 %s" % '+'
+    return line[2:] if line.startswith('+ ') else line
+
+
+def write_lp(model, target):
+    ''' Escreve o modelo no formato LP do CPLEX.
+    '''
+    stream, owned = _open(target, 'w')
+    try:
+        stream.write("\\ %s\n" % (model.name or 'MODEL'))
+        stream.write("%s\n" % ('Maximize' if model.prob == 'max'
+                               else 'Minimize'))
+        terms = [(name, cost) for name, cost in zip(model.columns, model.c)
+                 if cost]
+        objective = _lp_terms(terms) if terms else "0 %s" % model.columns[0]
+        if model.offset:
+            objective += " %s %s" % ('-' if model.offset < 0 else '+',
+                                     _writefloat(abs(model.offset)))
+        stream.write(" %s: %s\n" % (model.objective_name, objective))
+        stream.write("Subject To\n")
+        rows = [[] for _ in model.rows]
+        for i, j, value in zip(model.entries_row, model.entries_col,
+                               model.entries_val):
+            rows[i].append((model.columns[j], value))
+        for i, terms in enumerate(rows):
+            if i in model.ranges:
+                low, high = model.ranges[i]
+                stream.write(" %s_lo: %s >= %s\n" % (
+                    model.rows[i], _lp_terms(terms) or '0', _writefloat(low)))
+                stream.write(" %s: %s <= %s\n" % (
+                    model.rows[i], _lp_terms(terms) or '0', _writefloat(high)))
+                continue
+            stream.write(" %s: %s %s %s\n" % (model.rows[i],
+                                              _lp_terms(terms) or '0',
+                                              model.ineq[i],
+                                              _writefloat(model.b[i])))
+        if model.lower or model.upper:
+            stream.write("Bounds\n")
+            for j in sorted(set(model.lower) | set(model.upper)):
+                name = model.columns[j]
+                low = model.lower.get(j, 0.0)
+                high = model.upper.get(j, INF)
+                if low == -INF and high == INF:
+                    stream.write(" %s free\n" % name)
+                elif low == high:
+                    stream.write(" %s = %s\n" % (name, _writefloat(low)))
+                else:
+                    stream.write(" %s <= %s <= %s\n" % (
+                        '-inf' if low == -INF else _writefloat(low), name,
+                        'inf' if high == INF else _writefloat(high)))
+        if model.integer:
+            stream.write("General\n")
+            for j in sorted(model.integer):
+                stream.write(" %s\n" % model.columns[j])
+        stream.write("End\n")
+    finally:
+        if owned:
+            stream.close()
+
+
+def _format_of(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'lp' if name.lower().endswith('.lp') else 'mps'
+
+
+def read_model(source, format=None):
+    ''' Lê um modelo MPS ou LP; o formato vem da extensão do arquivo
+    (.mps, .lp, opcionalmente .gz) se não for dado.
+    '''
+    if format is None:
+        format = _format_of(source) if isinstance(source, str) else 'mps'
+    if format not in ('mps', 'lp'):
+        raise ValueError("Formato de modelo desconhecido: %s" % format)
+    return read_lp(source) if format == 'lp' else read_mps(source)
+
+
+def write_model(model, target, format=None):
+    if format is None:
+        format = _format_of(target) if isinstance(target, str) else 'mps'
+    if format not in ('mps', 'lp'):
+        raise ValueError("Formato de modelo desconhecido: %s" % format)
+    (write_lp if format == 'lp' else write_mps)(model, target)
+
+
+if __name__ == '__main__':
+    usage = 'modelio.py <entrada.mps|.lp> <saída.mps|.lp>'
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h")
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    if opts or len(args) != 2:
+        print(usage)
+        print('Converte modelos entre os formatos MPS livre e LP.')
+        sys.exit(0 if opts else 2)
+    model = read_model(args[0])
+    write_model(model, args[1])
+    print("%s: %d linhas, %d colunas, %d não nulos, %d inteiras" % (
+        model.name or args[0], len(model.rows), len(model.columns),
+        model.nnz, len(model.integer)))
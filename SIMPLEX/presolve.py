@@ -0,0 +1,239 @@
+from fractions import Fraction
+
+
+class Presolve():
+    ''' Redução do problema antes da montagem do tableau.
+
+    Remove linhas vazias, trata linhas singleton (x_j = v fixa a
+    variável; limites implicados por x >= 0 são descartados), substitui
+    variáveis fixas, elimina linhas duplicadas (múltiplos positivos uma da
+    outra, mantendo a mais apertada) e colunas dominadas (variáveis que
+    podem ser zeradas sem perder viabilidade nem piorar o objetivo).
+
+    reduced() devolve o problema menor e postsolve() leva a solução dele
+    de volta aos nomes x_j e s_i do problema original. Se a redução já
+    decide o problema, infeasible, unbounded ou solved ficam verdadeiros.
+    A pode ser uma lista de listas ou uma matriz esparsa do scipy.
+    '''
+
+    def __init__(self, A, b, c, prob='max', ineq=None, exact=True,
+                 tol=1e-9):
+        self.prob = prob
+        self.exact = exact
+        self.num = Fraction if exact else float
+        self.tol = 0 if exact else tol
+        self.sparse = hasattr(A, 'tocsr') and hasattr(A, 'nnz')
+        num = self.num
+        self.rows = self._row_dicts(A)
+        self.m, self.n = len(self.rows), len(c)
+        self.b = [num(x) for x in b]
+        self.c = [num(x) for x in c]
+        if not ineq:
+            ineq = ['<=' if prob == 'max' else '>='] * self.m
+        self.ineq = list(ineq)
+        # Original rows, kept for the slacks computed by postsolve.
+        self.original = [dict(row) for row in self.rows]
+        self.original_b = self.b[:]
+        self.fixed = {}
+        self.active_rows = set(range(self.m))
+        self.cols = [set() for _ in range(self.n)]
+        for i, row in enumerate(self.rows):
+            for j in row:
+                self.cols[j].add(i)
+        self.infeasible = self.unbounded = self.solved = False
+        self._reduce()
+        self.row_map = sorted(self.active_rows)
+        self.col_map = [j for j in range(self.n) if j not in self.fixed]
+        self._check_empty_problem()
+        self.stats = {'rows': self.m - len(self.row_map),
+                      'cols': self.n - len(self.col_map)}
+
+    def _row_dicts(self, A):
+        num = self.num
+        if self.sparse:
+            A = A.tocsr()
+            return [dict((int(j), num(float(v))) for j, v in
+                         zip(A.indices[A.indptr[i]:A.indptr[i + 1]],
+                             A.data[A.indptr[i]:A.indptr[i + 1]]) if v != 0)
+                    for i in range(A.shape[0])]
+        return [dict((j, num(v)) for j, v in enumerate(row) if v != 0)
+                for row in A]
+
+    def _reduce(self):
+        changed = True
+        while changed and not self.infeasible:
+            changed = self._row_pass()
+            changed = self._duplicate_pass() or changed
+            changed = self._dominated_pass() or changed
+
+    def _drop_row(self, i):
+        self.active_rows.discard(i)
+        for j in self.rows[i]:
+            self.cols[j].discard(i)
+
+    def _fix(self, j, value):
+        ''' Fixa x_j = value e substitui nas linhas ativas.
+        '''
+        self.fixed[j] = value
+        for i in self.cols[j]:
+            self.b[i] -= self.rows[i].pop(j) * value
+        self.cols[j] = set()
+
+    def _row_pass(self):
+        changed = False
+        for i in sorted(self.active_rows):
+            if i not in self.active_rows:
+                continue
+            row, rhs, sense = self.rows[i], self.b[i], self.ineq[i]
+            if not row:
+                # Empty row: 0 (sense) rhs.
+                if ((sense == '<=' and rhs < -self.tol) or
+                        (sense == '>=' and rhs > self.tol) or
+                        (sense == '=' and abs(rhs) > self.tol)):
+                    self.infeasible = True
+                    return False
+                self._drop_row(i)
+                changed = True
+            elif len(row) == 1:
+                changed = self._singleton_row(i) or changed
+                if self.infeasible:
+                    return False
+        return changed
+
+    def _singleton_row(self, i):
+        (j, a), = self.rows[i].items()
+        bound = self.b[i] / a
+        sense = self.ineq[i]
+        if sense != '=' and a < 0:
+            sense = '<=' if sense == '>=' else '>='
+        if sense == '=':
+            if bound < -self.tol:
+                self.infeasible = True
+                return False
+            self._drop_row(i)
+            self._fix(j, max(bound, self.num(0)))
+            return True
+        if sense == '>=' and bound <= self.tol:
+            # Implied by x_j >= 0.
+            self._drop_row(i)
+            return True
+        if sense == '<=' and bound < -self.tol:
+            self.infeasible = True
+            return False
+        if sense == '<=' and bound <= self.tol:
+            self._drop_row(i)
+            self._fix(j, self.num(0))
+            return True
+        return False
+
+    def _row_key(self, i):
+        row = self.rows[i]
+        scale = abs(row[min(row)])
+        values = [(j, row[j] / scale) for j in sorted(row)]
+        if not self.exact:
+            values = [(j, round(v, 9)) for j, v in values]
+        return (self.ineq[i], tuple(values)), scale
+
+    def _duplicate_pass(self):
+        changed = False
+        seen = {}
+        for i in sorted(self.active_rows):
+            if not self.rows[i]:
+                continue
+            key, scale = self._row_key(i)
+            if key not in seen:
+                seen[key] = (i, scale)
+                continue
+            k, k_scale = seen[key]
+            rhs_i, rhs_k = self.b[i] / scale, self.b[k] / k_scale
+            sense = key[0]
+            if sense == '=':
+                if abs(rhs_i - rhs_k) > self.tol:
+                    self.infeasible = True
+                    return False
+                keep = k
+            elif sense == '<=':
+                keep = k if rhs_k <= rhs_i else i
+            else:
+                keep = k if rhs_k >= rhs_i else i
+            drop = i if keep == k else k
+            self._drop_row(drop)
+            seen[key] = (keep, scale if keep == i else k_scale)
+            changed = True
+        return changed
+
+    def _dominated_pass(self):
+        ''' x_j pode ser zerada se não melhora o objetivo e só aparece com
+        coeficiente >= 0 em linhas '<=' e <= 0 em linhas '>='.
+        '''
+        changed = False
+        for j in range(self.n):
+            if j in self.fixed:
+                continue
+            cost = self.c[j] if self.prob == 'max' else -self.c[j]
+            if cost > 0:
+                continue
+            if all((self.ineq[i] == '<=' and self.rows[i][j] >= 0) or
+                   (self.ineq[i] == '>=' and self.rows[i][j] <= 0)
+                   for i in self.cols[j]):
+                self._fix(j, self.num(0))
+                changed = True
+        return changed
+
+    def _check_empty_problem(self):
+        ''' Sem linhas restantes, x = 0 nas colunas livres é ótimo, a não
+        ser que alguma delas melhore o objetivo (ilimitado).
+        '''
+        if self.infeasible or self.row_map:
+            return
+        for j in self.col_map:
+            cost = self.c[j] if self.prob == 'max' else -self.c[j]
+            if cost > self.tol:
+                self.unbounded = True
+                return
+        for j in self.col_map:
+            self.fixed[j] = self.num(0)
+        self.col_map = []
+        self.solved = True
+
+    def reduced(self):
+        ''' Problema reduzido (A, b, c, ineq), no mesmo formato de A.
+        '''
+        col_index = dict((j, k) for k, j in enumerate(self.col_map))
+        if self.sparse:
+            from scipy.sparse import csc_matrix
+            entries = [(r, col_index[j], float(value))
+                       for r, i in enumerate(self.row_map)
+                       for j, value in self.rows[i].items()]
+            rows, cols, values = zip(*entries) if entries else ((), (), ())
+            A = csc_matrix((values, (rows, cols)),
+                           shape=(len(self.row_map), len(self.col_map)))
+        else:
+            A = [[self.num(0)] * len(self.col_map) for _ in self.row_map]
+            for r, i in enumerate(self.row_map):
+                for j, value in self.rows[i].items():
+                    A[r][col_index[j]] = value
+        b = [self.b[i] for i in self.row_map]
+        c = [self.c[j] for j in self.col_map]
+        ineq = [self.ineq[i] for i in self.row_map]
+        return A, b, c, ineq
+
+    def postsolve(self, solution):
+        ''' Solução do problema original a partir da do reduzido: x_j,
+        folgas/excessos s_i das linhas '<=' e '>=' e z.
+        '''
+        x = [self.num(0)] * self.n
+        for j, value in self.fixed.items():
+            x[j] = value
+        for k, j in enumerate(self.col_map):
+            x[j] = self.num(solution["x_%s" % str(k + 1)])
+        result = dict(("x_%s" % str(j + 1), value)
+                      for j, value in enumerate(x))
+        for i, row in enumerate(self.original):
+            activity = sum(value * x[j] for j, value in row.items())
+            if self.ineq[i] == '<=':
+                result["s_%s" % str(i + 1)] = self.original_b[i] - activity
+            elif self.ineq[i] == '>=':
+                result["s_%s" % str(i + 1)] = activity - self.original_b[i]
+        result['z'] = sum(cost * value for cost, value in zip(self.c, x))
+        return result
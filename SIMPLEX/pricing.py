@@ -0,0 +1,138 @@
+import numpy as np
+
+
+class PricingRule():
+    ''' Regra de escolha da variável de entrada do SimplexSolver.
+
+    start() é chamado uma vez antes do primeiro pivô, select() deve
+    retornar o índice da coluna que entra (ou -1 se nenhuma melhora o
+    objetivo) e update() é chamado com o pivô escolhido, antes de o
+    tableau ser atualizado.
+    '''
+    name = None
+
+    def start(self, solver):
+        pass
+
+    def select(self, solver):
+        raise NotImplementedError
+
+    def update(self, solver, enter_index, depart_index):
+        pass
+
+    def _candidates(self, solver, reduced):
+        return reduced < -solver.price_tol()
+
+
+class DantzigPricing(PricingRule):
+    ''' Custo reduzido mais negativo (regra original do SimplexSolver).
+    '''
+    name = 'dantzig'
+
+    def select(self, solver):
+        return solver.get_entering_var()
+
+
+class PartialPricing(PricingRule):
+    ''' Precificação parcial: percorre as colunas em blocos de tamanho
+    `block`, de forma cíclica, e escolhe a mais negativa do primeiro bloco
+    que tiver candidatas.
+    '''
+    name = 'partial'
+
+    def __init__(self, block=None):
+        self.block = block
+        self.position = 0
+
+    def start(self, solver):
+        width = solver.num_columns()
+        self.size = self.block or max(1, int(np.sqrt(width)) * 4)
+        self.position = 0
+
+    def select(self, solver):
+        width = solver.num_columns()
+        for _ in range(0, width, self.size):
+            cols = np.arange(self.position, self.position + self.size) % width
+            self.position = (self.position + self.size) % width
+            reduced = solver.reduced_costs(cols)
+            candidates = self._candidates(solver, reduced)
+            if candidates.any():
+                return int(cols[np.argmin(reduced)])
+        return -1
+
+
+class DevexPricing(PricingRule):
+    ''' Devex (Forrest e Goldfarb): maximiza d_j^2 / w_j com pesos de
+    referência atualizados a partir da linha do pivô.
+    '''
+    name = 'devex'
+
+    def start(self, solver):
+        self.weights = np.ones(solver.num_columns())
+
+    def select(self, solver):
+        reduced = solver.reduced_costs()
+        candidates = self._candidates(solver, reduced)
+        if not candidates.any():
+            return -1
+        score = np.where(candidates, reduced ** 2 / self.weights, -1.0)
+        return int(np.argmax(score))
+
+    def update(self, solver, enter_index, depart_index):
+        alpha = solver.tableau_row(depart_index)
+        ratio = alpha / alpha[enter_index]
+        w_q = self.weights[enter_index]
+        leaving = solver.entering.index(solver.departing[depart_index])
+        self.weights = np.maximum(self.weights, ratio ** 2 * w_q)
+        self.weights[leaving] = max(w_q / alpha[enter_index] ** 2, 1.0)
+
+
+class SteepestEdgePricing(PricingRule):
+    ''' Steepest edge: maximiza d_j^2 / gamma_j, com gamma_j = 1 +
+    ||B^-1 a_j||^2 mantido pelas fórmulas de atualização de Goldfarb e
+    Reid.
+    '''
+    name = 'steepest'
+
+    def start(self, solver):
+        self.weights = 1.0 + solver.tableau_column_norms()
+
+    def select(self, solver):
+        reduced = solver.reduced_costs()
+        candidates = self._candidates(solver, reduced)
+        if not candidates.any():
+            return -1
+        score = np.where(candidates, reduced ** 2 / self.weights, -1.0)
+        return int(np.argmax(score))
+
+    def update(self, solver, enter_index, depart_index):
+        alpha = solver.tableau_row(depart_index)
+        d = solver.tableau_column(enter_index)
+        cross = solver.tableau_columns_dot(d)
+        alpha_q = alpha[enter_index]
+        ratio = alpha / alpha_q
+        g_q = self.weights[enter_index]
+        leaving = solver.entering.index(solver.departing[depart_index])
+        self.weights = np.maximum(
+            self.weights - 2 * ratio * cross + ratio ** 2 * g_q,
+            1.0 + ratio ** 2)
+        self.weights[leaving] = max(g_q / alpha_q ** 2,
+                                    1.0 + 1.0 / alpha_q ** 2)
+
+
+PRICING_RULES = {
+    'dantzig': DantzigPricing,
+    'partial': PartialPricing,
+    'devex': DevexPricing,
+    'steepest': SteepestEdgePricing,
+}
+
+
+def make_pricing(rule):
+    ''' Aceita o nome de uma regra ou uma instância de PricingRule.
+    '''
+    if isinstance(rule, PricingRule):
+        return rule
+    if rule not in PRICING_RULES:
+        raise ValueError("Regra de precificação desconhecida: %s" % rule)
+    return PRICING_RULES[rule]()
@@ -0,0 +1,315 @@
+import json
+from fractions import Fraction
+
+
+class Report():
+    ''' Relatório do SimplexSolver, escrito incrementalmente em um stream
+    (ou em um arquivo, se stream for um caminho) à medida que o simplex
+    avança, sem acumular o documento em memória.
+
+    every=k registra só um a cada k tableaux intermediários (o inicial
+    sempre é registrado); summaries_only=True omite todos os tableaux e
+    sistemas, deixando só o problema, os pivôs e a solução. Subclasses
+    definem o formato.
+    '''
+
+    def __init__(self, stream='solution.tex', every=1, summaries_only=False):
+        self.stream = stream
+        self.every = max(1, every)
+        self.summaries_only = summaries_only
+        self.file = None
+        self.closed = False
+
+    def wants_tableau(self, iteration=None):
+        ''' Se o tableau da iteração deve ser registrado (None: tableau
+        inicial ou de início de fase).
+        '''
+        if self.summaries_only:
+            return False
+        return iteration is None or iteration % self.every == 0
+
+    def write(self, text):
+        if self.closed:
+            return
+        if self.file is None:
+            if isinstance(self.stream, str):
+                self.file = open(self.stream, 'w')
+                self._owns_file = True
+            else:
+                self.file = self.stream
+                self._owns_file = False
+        self.file.write(text)
+
+    def end(self):
+        if self.closed:
+            return
+        self.footer()
+        self.closed = True
+        if self.file is not None and self._owns_file:
+            self.file.close()
+        elif self.file is not None and hasattr(self.file, 'flush'):
+            self.file.flush()
+
+    def begin(self):
+        pass
+
+    def footer(self):
+        pass
+
+    def problem(self, prob, c, matrix, names, ineq):
+        raise NotImplementedError
+
+    def linear_system(self, matrix, names, ineq):
+        raise NotImplementedError
+
+    def text(self, text):
+        raise NotImplementedError
+
+    def tableau(self, names, rows, basis, iteration=None):
+        raise NotImplementedError
+
+    def pivot(self, entering, departing, iteration=None):
+        raise NotImplementedError
+
+    def solution(self, solution):
+        raise NotImplementedError
+
+
+class LatexReport(Report):
+    ''' Documento LaTeX (formato original do solution.tex).
+    '''
+    latex_ineq = {'=': '=', '<=': r'\leq', '>=': r'\geq'}
+
+    def begin(self):
+        self.write(r"\documentclass{article}"
+                   r"\usepackage{amsmath}"
+                   r"\begin{document}"
+                   r"\title{Simplex Solver}"
+                   r"\maketitle"
+                   r"\begin{flushleft}"
+                   r"\textbf{Problem}"
+                   r"\end{flushleft}")
+
+    def footer(self):
+        self.write(r"\end{document}")
+
+    def problem(self, prob, c, matrix, names, ineq):
+        self.write(r"\begin{flushleft}"
+                   r"Dado o seguinte sistema linear e objetivo"
+                   r"função, encontre a solução ideal."
+                   r"\end{flushleft}"
+                   r"\begin{equation*}")
+        func = ""
+        found_value = False
+        for index, x in enumerate(c):
+            opp = '+'
+            if x == 0:
+                continue
+            if x < 0:
+                opp = ' - '
+            elif index == 0 or not found_value:
+                opp = ''
+            if x == 1 or x == -1:
+                x = ''
+            func += (r"%s %sx_%s "  % (opp, str(x), str(index+1)))
+            found_value = True
+        self.write(r"\%s{%s} \\ "
+                   r"\end{equation*}" % (prob, func))
+        self.linear_system(matrix, names, ineq)
+        self.write(r"\begin{flushleft}"
+                   r"\textbf{Solution}"
+                   r"\end{flushleft}")
+
+    def linear_system(self, matrix, names, ineq):
+        self.write(r"\["
+                   r"\left\{"
+                   r"\begin{array}{c}")
+        for i in range(0, len(matrix)):
+            found_value = False
+            line = []
+            for index, x in enumerate(matrix[i]):
+                opp = '+'
+                if x == 0 and index != len(matrix[i]) - 1:
+                    continue
+                if x < 0:
+                    opp = '-'
+                elif index == 0 or not found_value:
+                    opp = ''
+                if index != len(matrix[i]) - 1:
+                    if x == 1 or x == -1:
+                        x = ''
+                    line.append(r"%s %s%s "  % (opp, str(x),
+                                                str(names[index])))
+                else:
+                    line.append(r"%s %s"  % (self.latex_ineq[ineq[i]],
+                                             str(x)))
+                found_value = True
+                if (index == len(matrix[i]) - 1):
+                    line.append(r" \\ ")
+            self.write("".join(line))
+        self.write(r"\end{array}"
+                   r"\right."
+                   r"\]")
+
+    def text(self, text):
+        self.write(r"\begin{flushleft}"
+                   r"%s"
+                   r"\end{flushleft}" % text)
+
+    def tableau(self, names, rows, basis, iteration=None):
+        width = len(names)
+        self.write(r"\begin{equation*}"
+                   r"\begin{bmatrix}"
+                   r"\begin{array}{%s|c}" % ("c" * (width - 1)))
+        self.write(r" &".join(str(var) for var in names[:-1]) +
+                   r" &%s \\ \hline" % names[-1])
+        for indexr, row in enumerate(rows):
+            values = [str(value) for value in row]
+            end = r" \\ \hline" if indexr == len(rows) - 2 else r" \\"
+            self.write(r" & ".join(values[:-1]) + r" & " + values[-1] + end)
+        self.write(r"\end{array}"
+                   r"\end{bmatrix}"
+                   r"\begin{array}{c}"
+                   r"\\")
+        self.write("".join(r"%s \\" % var for var in basis))
+        self.write(r"\\"
+                   r"\end{array}"
+                   r"\end{equation*}")
+
+    def pivot(self, entering, departing, iteration=None):
+        self.write(r"\begin{flushleft}"
+                   r"Existem elementos negativos na linha inferior,"
+                   r"então a solução atual não é a ideal."
+                   r"Assim, gire para melhorar a solução atual. O "
+                   r"a variável de entrada é $%s$ e a variável de saída "
+                   r"variável é $%s$."
+                   r"\end{flushleft}" % (str(entering), str(departing)))
+        self.write(r"\begin{flushleft}"
+                   r"Execute operações elementares de linha até "
+                   r"o elemento pivô é 1 e todos os outros elementos no "
+                   r"coluna de entrada é 0."
+                   r"\end{flushleft}")
+
+    def solution(self, solution):
+        self.write(r"\begin{equation*}")
+        self.write(r", ".join(r"%s = %s" % (key, self._fraction_to_latex(value))
+                              for key, value in sorted(solution.items())))
+        self.write(r"\end{equation*}")
+
+    def _fraction_to_latex(self, fract):
+        if not isinstance(fract, (int, Fraction)):
+            return "%g" % fract
+        fract = Fraction(fract)
+        if fract.denominator == 1:
+            return str(fract.numerator)
+        else:
+            return r"\frac{%s}{%s}" % (str(fract.numerator), str(fract.denominator))
+
+
+class MarkdownReport(Report):
+    ''' Markdown, com os tableaux como tabelas.
+    '''
+
+    def begin(self):
+        self.write("# Simplex Solver\n\n## Problem\n\n")
+
+    def problem(self, prob, c, matrix, names, ineq):
+        terms = " + ".join("%s x_%d" % (_text(x), index + 1)
+                           for index, x in enumerate(c) if x != 0)
+        self.write("%s %s\n\n" % (prob, terms or "0"))
+        self.linear_system(matrix, names, ineq)
+        self.write("## Solution\n\n")
+
+    def linear_system(self, matrix, names, ineq):
+        for i, row in enumerate(matrix):
+            terms = " + ".join("%s %s" % (_text(x), names[index])
+                               for index, x in enumerate(row[:-1]) if x != 0)
+            self.write("    %s %s %s\n" % (terms or "0", ineq[i],
+                                          _text(row[-1])))
+        self.write("\n")
+
+    def text(self, text):
+        self.write("%s\n\n" % text)
+
+    def tableau(self, names, rows, basis, iteration=None):
+        if iteration is not None:
+            self.write("Tableau após a iteração %d:\n\n" % iteration)
+        self.write("| | %s |\n" % " | ".join(str(var) for var in names))
+        self.write("|---" * (len(names) + 1) + "|\n")
+        for index, row in enumerate(rows):
+            label = basis[index] if index < len(basis) else "z"
+            self.write("| %s | %s |\n" % (label, " | ".join(
+                _text(value) for value in row)))
+        self.write("\n")
+
+    def pivot(self, entering, departing, iteration=None):
+        self.write("- pivô: `%s` entra, `%s` sai\n\n" %
+                   (entering, departing))
+
+    def solution(self, solution):
+        self.write(", ".join("`%s = %s`" % (key, _text(value))
+                             for key, value in sorted(solution.items())))
+        self.write("\n\n")
+
+
+class JsonReport(Report):
+    ''' JSON Lines: um objeto por evento, fácil de consumir em streaming.
+    '''
+
+    def _event(self, **fields):
+        self.write(json.dumps(fields, default=_format) + "\n")
+
+    def problem(self, prob, c, matrix, names, ineq):
+        self._event(event='problem', prob=prob, c=list(c),
+                    rows=[list(row) for row in matrix], ineq=list(ineq))
+
+    def linear_system(self, matrix, names, ineq):
+        self._event(event='system', columns=list(names[:-1]),
+                    rows=[list(row) for row in matrix], ineq=list(ineq))
+
+    def text(self, text):
+        self._event(event='text', text=text)
+
+    def tableau(self, names, rows, basis, iteration=None):
+        self._event(event='tableau', iteration=iteration,
+                    columns=list(names), basis=list(basis),
+                    rows=[[_format(value) for value in row] for row in rows])
+
+    def pivot(self, entering, departing, iteration=None):
+        self._event(event='pivot', iteration=iteration, entering=entering,
+                    departing=departing)
+
+    def solution(self, solution):
+        self._event(event='solution', values=dict(
+            (key, _format(value)) for key, value in solution.items()))
+
+
+def _text(value):
+    value = _format(value)
+    return "%g" % value if isinstance(value, float) else str(value)
+
+
+def _format(value):
+    ''' Frações como "p/q", inteiros como int e o resto como float.
+    '''
+    if isinstance(value, Fraction):
+        return str(value) if value.denominator != 1 else value.numerator
+    if isinstance(value, int):
+        return value
+    return float(value)
+
+
+REPORTS = {
+    'latex': LatexReport,
+    'markdown': MarkdownReport,
+    'json': JsonReport,
+}
+
+
+def make_report(format='latex', stream='solution.tex', every=1,
+                summaries_only=False):
+    ''' Cria o relatório no formato pedido.
+    '''
+    if format not in REPORTS:
+        raise ValueError("Formato de relatório desconhecido: %s" % format)
+    return REPORTS[format](stream, every, summaries_only)
@@ -0,0 +1,506 @@
+import copy
+
+import numpy as np
+
+
+def is_sparse(M):
+    ''' Verdadeiro para matrizes esparsas do scipy (CSR, CSC, ...).
+    '''
+    return hasattr(M, 'tocsc') and hasattr(M, 'nnz')
+
+
+def lu_factor(B):
+    ''' Fatoração LU densa com pivoteamento parcial: P B = L U.
+
+    Retorna a matriz LU compacta (L unitária abaixo da diagonal, U na
+    diagonal e acima) e o vetor de permutação das linhas.
+    '''
+    LU = np.array(B, dtype=np.float64, copy=True)
+    m = LU.shape[0]
+    perm = np.arange(m)
+    for k in range(m):
+        p = k + int(np.argmax(np.abs(LU[k:, k])))
+        if LU[p, k] == 0:
+            raise np.linalg.LinAlgError("Base singular.")
+        if p != k:
+            LU[[k, p]] = LU[[p, k]]
+            perm[[k, p]] = perm[[p, k]]
+        LU[k + 1:, k] /= LU[k, k]
+        LU[k + 1:, k + 1:] -= np.outer(LU[k + 1:, k], LU[k, k + 1:])
+    return LU, perm
+
+
+def lu_solve(LU, perm, rhs):
+    ''' Resolve B x = rhs a partir da fatoração de lu_factor.
+    '''
+    x = np.array(rhs, dtype=np.float64)[perm]
+    m = len(x)
+    for i in range(1, m):
+        x[i] -= LU[i, :i] @ x[:i]
+    for i in range(m - 1, -1, -1):
+        x[i] = (x[i] - LU[i, i + 1:] @ x[i + 1:]) / LU[i, i]
+    return x
+
+
+def lu_solve_transposed(LU, perm, rhs):
+    ''' Resolve B^T y = rhs a partir da fatoração de lu_factor.
+    '''
+    w = np.array(rhs, dtype=np.float64)
+    m = len(w)
+    for i in range(m):
+        w[i] = (w[i] - LU[:i, i] @ w[:i]) / LU[i, i]
+    for i in range(m - 2, -1, -1):
+        w[i] -= LU[i + 1:, i] @ w[i + 1:]
+    y = np.empty(m)
+    y[perm] = w
+    return y
+
+
+class BasisFactorization():
+    ''' Inversa da base na forma produto: B = B_0 E_1 ... E_k, com B_0
+    fatorada em LU e cada E_i uma matriz eta gerada por um pivoteamento.
+    '''
+
+    def __init__(self, B):
+        self.LU, self.perm = lu_factor(B)
+        self.etas = []
+
+    def _solve(self, a):
+        return lu_solve(self.LU, self.perm, a)
+
+    def _solve_transposed(self, c):
+        return lu_solve_transposed(self.LU, self.perm, c)
+
+    def ftran(self, a):
+        ''' Resolve B x = a.
+        '''
+        x = self._solve(a)
+        for r, d in self.etas:
+            x_r = x[r] / d[r]
+            x -= x_r * d
+            x[r] = x_r
+        return x
+
+    def btran(self, c):
+        ''' Resolve y^T B = c^T.
+        '''
+        w = np.array(c, dtype=np.float64)
+        for r, d in reversed(self.etas):
+            # Only component r changes when multiplying by E^-1 on the right.
+            w_r = w[r]
+            w[r] = 0.0
+            w[r] = (w_r - w @ d) / d[r]
+        return self._solve_transposed(w)
+
+    def update(self, r, d):
+        ''' Registra a troca da coluna r da base, sendo d = B^-1 a_q.
+        '''
+        self.etas.append((r, d.copy()))
+
+
+class SparseBasisFactorization(BasisFactorization):
+    ''' Mesma forma produto, mas com B_0 esparsa fatorada por SuperLU.
+    '''
+
+    def __init__(self, B):
+        from scipy.sparse.linalg import splu
+        self.lu = splu(B.tocsc())
+        self.etas = []
+
+    def _solve(self, a):
+        return self.lu.solve(np.asarray(a, dtype=np.float64))
+
+    def _solve_transposed(self, c):
+        return self.lu.solve(np.asarray(c, dtype=np.float64), trans='T')
+
+
+class RevisedSimplex():
+    ''' Estado do simplex revisado: guarda só a base e sua fatoração e
+    calcula preços e colunas sob demanda. As colunas n..n+m-1 são as
+    folgas, mantidas implícitas. A pode ser densa ou uma matriz esparsa
+    do scipy (guardada em CSC).
+
+    Com variáveis limitadas (set_bounds), a coluna j representa
+    t_j = sign_j (x_j - base_j): A e c continuam os originais e os
+    sinais e deslocamentos são aplicados nas colunas, nos custos e no
+    lado direito b - A base.
+    '''
+
+    def __init__(self, A, b, c, feas_tol=1e-9, opt_tol=1e-9,
+                 refactor_every=50):
+        self.sparse = is_sparse(A)
+        if self.sparse:
+            self.A = A.tocsc().astype(np.float64)
+        else:
+            self.A = np.asarray(A, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.c = np.asarray(c, dtype=np.float64)
+        self.m, self.n = self.A.shape
+        self.feas_tol = feas_tol
+        self.opt_tol = opt_tol
+        self.refactor_every = refactor_every
+        self.basis = list(range(self.n, self.n + self.m))
+        self.x_B = self.b.copy()
+        if self.sparse:
+            from scipy.sparse import identity
+            self.factor = SparseBasisFactorization(
+                identity(self.m, format='csc'))
+        else:
+            self.factor = BasisFactorization(np.eye(self.m))
+        self.d = None
+        self.y = None
+        self.reduced = None
+        # Slack-column costs (phase I of the two-phase method) and columns
+        # that may never enter the basis.
+        self.slack_c = None
+        self.blocked = []
+        self.sign = None
+        self.base = None
+        self.costs = None
+
+    def __getstate__(self):
+        # SuperLU objects cannot be pickled: ship the basis and refactor
+        # on arrival (used by the parallel branch and bound).
+        state = self.__dict__.copy()
+        state['factor'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.factor = None
+        self.refactor()
+
+    def column(self, j):
+        ''' Coluna j da matriz [A I].
+        '''
+        if j < self.n and not self.sparse:
+            if self.sign is not None and self.sign[j] < 0:
+                return -self.A[:, j]
+            return self.A[:, j]
+        e = np.zeros(self.m)
+        if j < self.n:
+            start, end = self.A.indptr[j], self.A.indptr[j + 1]
+            e[self.A.indices[start:end]] = self.A.data[start:end]
+            if self.sign is not None:
+                e *= self.sign[j]
+        else:
+            e[j - self.n] = 1.0
+        return e
+
+    def cost(self, j):
+        return self.cost_vector()[j]
+
+    def cost_vector(self):
+        ''' Custos de todas as colunas de [A I], com os sinais das colunas
+        estruturais; refeito só quando c, os sinais ou as folgas mudam.
+        '''
+        if self.costs is None:
+            slack = np.zeros(self.m) if self.slack_c is None \
+                else self.slack_c
+            self.costs = np.concatenate((self._signed(self.c), slack))
+        return self.costs
+
+    def basic_costs(self):
+        ''' c_B, os custos das variáveis básicas.
+        '''
+        return self.cost_vector()[self.basis]
+
+    def rhs(self):
+        ''' Lado direito b - A base das variáveis t.
+        '''
+        if self.base is None:
+            return self.b
+        return self.b - self.A @ self.base
+
+    def set_bounds(self, base, sign, row=None):
+        ''' Novos deslocamentos e sinais das colunas estruturais. Com
+        row, a variável básica dessa linha foi complementada: a coluna da
+        base troca de sinal (uma matriz eta -e_row).
+        '''
+        self.base = np.asarray(base, dtype=np.float64)
+        self.sign = np.asarray(sign, dtype=np.float64)
+        if row is not None:
+            e = np.zeros(self.m)
+            e[row] = -1.0
+            self.factor.update(row, e)
+            if self.d is not None:
+                self.d = self.d.copy()
+                self.d[row] = -self.d[row]
+        else:
+            self.d = None
+        self.x_B = self.factor.ftran(self.rhs())
+        self.y = None
+        self.reduced = None
+        self.costs = None
+
+    def duals(self):
+        ''' Preços-sombra y = c_B B^-1.
+        '''
+        if self.y is None:
+            self.y = self.factor.btran(self.basic_costs())
+        return self.y
+
+    def objective(self):
+        value = float(self.basic_costs() @ self.x_B)
+        if self.base is not None:
+            value += float(self.c @ self.base)
+        return value
+
+    def _signed(self, values):
+        ''' Aplica os sinais das colunas estruturais (nas linhas de
+        A^T ...).
+        '''
+        if self.sign is None:
+            return values
+        return values * (self.sign if values.ndim == 1 else
+                         self.sign[:, None])
+
+    def bottom_row(self):
+        ''' Linha inferior do tableau equivalente: custos reduzidos
+        y A - c, seguidos de y (colunas de folga) e de z.
+        '''
+        return np.append(self._reduce(), self.objective())
+
+    def _reduce(self):
+        ''' Custos reduzidos y [A I] - c; o valor do objetivo fica fora
+        do laço de pivôs.
+        '''
+        if self.reduced is None:
+            y = self.duals()
+            self.reduced = np.concatenate((self._signed(self.A.T @ y), y)) \
+                - self.cost_vector()
+        return self.reduced
+
+    def _priced(self):
+        ''' Custos reduzidos com as colunas bloqueadas em +inf.
+        '''
+        self._reduce()
+        if not self.blocked:
+            return self.reduced
+        reduced = self.reduced.copy()
+        reduced[self.blocked] = np.inf
+        return reduced
+
+    def price(self):
+        ''' Dantzig: coluna com o custo reduzido mais negativo.
+        '''
+        return int(np.argmin(self._priced()))
+
+    def reduced_costs(self, cols=None):
+        ''' Custos reduzidos de todas as colunas ou apenas das colunas
+        cols (precificação parcial).
+        '''
+        if cols is None:
+            return self._priced()
+        y = self.duals()
+        cols = np.asarray(cols)
+        structural = cols < self.n
+        result = np.empty(len(cols))
+        result[structural] = (self.A[:, cols[structural]].T @ y
+                              - self.c[cols[structural]])
+        if self.sign is not None:
+            result[structural] *= self.sign[cols[structural]]
+        result[~structural] = y[cols[~structural] - self.n]
+        if self.slack_c is not None:
+            result[~structural] -= self.slack_c[cols[~structural] - self.n]
+        result[np.isin(cols, self.blocked)] = np.inf
+        return result
+
+    def transposed_product(self, v):
+        ''' (B^-1 [A I])^T v, usando um BTRAN.
+        '''
+        w = self.factor.btran(v)
+        return np.concatenate((self._signed(self.A.T @ w), w))
+
+    def row(self, r):
+        ''' Linha r de B^-1 [A I].
+        '''
+        e = np.zeros(self.m)
+        e[r] = 1.0
+        return self.transposed_product(e)
+
+    def basis_column(self, q):
+        ''' B^-1 a_q (reaproveita o FTRAN do teste da razão).
+        '''
+        if self.d is None:
+            self.d = self.factor.ftran(self.column(q))
+        return self.d
+
+    def column_norms(self):
+        ''' ||B^-1 a_j||^2 para todas as colunas de [A I].
+        '''
+        if self.basis == list(range(self.n, self.n + self.m)):
+            if self.sparse:
+                structural = np.asarray(self.A.multiply(self.A).sum(axis=0))
+                structural = structural.ravel()
+            else:
+                structural = (self.A ** 2).sum(axis=0)
+            return np.concatenate((structural, np.ones(self.m)))
+        return np.array([np.square(self.factor.ftran(self.column(j))).sum()
+                         for j in range(self.n + self.m)])
+
+    def is_optimal(self):
+        return bool((self._priced() >= -self.opt_tol).all())
+
+    def ratio_test(self, q, bland=False):
+        ''' Teste da razão para a coluna q; retorna -1 se for ilimitado.
+        Com bland=True, empates vão para a menor variável básica.
+        '''
+        self.d = self.factor.ftran(self.column(q))
+        candidates = self.d > self.feas_tol
+        if not candidates.any():
+            return -1
+        ratios = np.full(self.m, np.inf)
+        ratios[candidates] = self.x_B[candidates] / self.d[candidates]
+        r = int(np.argmin(ratios))
+        if bland:
+            ties = np.flatnonzero(ratios <= ratios[r] + self.feas_tol)
+            r = int(min(ties, key=lambda i: self.basis[i]))
+        return r
+
+    def pivot(self, q, r):
+        ''' Coluna q entra na base no lugar da linha r.
+        '''
+        d = self.d if self.d is not None else \
+            self.factor.ftran(self.column(q))
+        theta = self.x_B[r] / d[r]
+        self.x_B -= theta * d
+        self.x_B[r] = theta
+        self.basis[r] = q
+        self.factor.update(r, d)
+        self.d = None
+        self.y = None
+        self.reduced = None
+        if len(self.factor.etas) >= self.refactor_every:
+            self.refactor()
+
+    def snapshot(self):
+        ''' Cópia do estado da base (A e a fatoração são compartilhados,
+        pois nunca são alterados no lugar).
+        '''
+        state = copy.copy(self)
+        state.basis = self.basis[:]
+        state.x_B = self.x_B.copy()
+        state.factor = copy.copy(self.factor)
+        state.factor.etas = self.factor.etas[:]
+        return state
+
+    def add_row(self, coeffs, rhs):
+        ''' Acrescenta a linha coeffs . x <= rhs com sua folga na base e
+        refatora.
+        '''
+        row = np.zeros((1, self.n))
+        row[0, :len(coeffs)] = coeffs
+        if self.sparse:
+            from scipy.sparse import vstack
+            self.A = vstack([self.A, row]).tocsc()
+        else:
+            self.A = np.vstack((self.A, row))
+        self.b = np.append(self.b, rhs)
+        # Slack columns keep their indices: the new one is n + m.
+        self.basis.append(self.n + self.m)
+        self.m += 1
+        if self.slack_c is not None:
+            self.slack_c = np.append(self.slack_c, 0.0)
+        self.costs = None
+        self.y = None
+        self.reduced = None
+        self.d = None
+        self.refactor()
+
+    def set_rhs(self, b):
+        ''' Novo vetor b com a mesma base.
+        '''
+        self.b = np.asarray(b, dtype=np.float64)
+        self.x_B = self.factor.ftran(self.rhs())
+
+    def set_objective(self, c):
+        ''' Novo vetor c com a mesma base.
+        '''
+        self.c = np.asarray(c, dtype=np.float64)
+        self.costs = None
+        self.y = None
+        self.reduced = None
+
+    def set_slack_costs(self, costs):
+        ''' Custos das colunas de folga/artificiais (zero fora da fase I).
+        '''
+        costs = np.asarray(costs, dtype=np.float64)
+        self.slack_c = costs if costs.any() else None
+        self.costs = None
+        self.y = None
+        self.reduced = None
+
+    def block(self, cols):
+        ''' Impede que as colunas cols entrem na base.
+        '''
+        self.blocked = list(cols)
+        self.reduced = None
+
+    def set_basis(self, basis):
+        ''' Nova base (índices das colunas básicas por linha), refatorada.
+        '''
+        self.basis = list(basis)
+        self.d = None
+        self.y = None
+        self.reduced = None
+        self.refactor()
+
+    def dual_ratio_row(self):
+        ''' Linha básica mais negativa; -1 se a base é primal viável.
+        '''
+        r = int(np.argmin(self.x_B))
+        return r if self.x_B[r] < -self.feas_tol else -1
+
+    def dual_ratio_test(self, r):
+        ''' Teste da razão dual sobre a linha r de B^-1 [A I].
+        '''
+        self.d = None
+        alpha = self.row(r)
+        self._reduce()
+        candidates = alpha < -self.feas_tol
+        candidates[self.blocked] = False
+        if not candidates.any():
+            return -1
+        ratios = np.full(alpha.shape, np.inf)
+        ratios[candidates] = self.reduced[candidates] / -alpha[candidates]
+        return int(np.argmin(ratios))
+
+    def refactor(self):
+        ''' Refatora a base atual e descarta os etas acumulados.
+        '''
+        if self.sparse:
+            self.factor = SparseBasisFactorization(self.basis_matrix())
+        else:
+            B = np.column_stack([self.column(j) for j in self.basis])
+            self.factor = BasisFactorization(B)
+        self.x_B = self.factor.ftran(self.rhs())
+
+    def basis_matrix(self):
+        ''' Matriz da base em CSC, montada direto dos índices de A.
+        '''
+        from scipy.sparse import csc_matrix
+        rows, cols, vals = [], [], []
+        for k, j in enumerate(self.basis):
+            if j < self.n:
+                start, end = self.A.indptr[j], self.A.indptr[j + 1]
+                rows.append(self.A.indices[start:end])
+                vals.append(self.A.data[start:end] if self.sign is None
+                            else self.A.data[start:end] * self.sign[j])
+                cols.append(np.full(end - start, k))
+            else:
+                rows.append([j - self.n])
+                vals.append([1.0])
+                cols.append([k])
+        return csc_matrix((np.concatenate(vals),
+                           (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(self.m, self.m))
+
+    def tableau(self):
+        ''' Materializa o tableau completo (para relatório e exibição).
+        '''
+        B_inv = np.column_stack([self.factor.ftran(e)
+                                 for e in np.eye(self.m)])
+        rows = np.hstack((self._signed(self.A.T @ B_inv.T).T, B_inv,
+                          self.x_B[:, None]))
+        return np.vstack((rows, self.bottom_row()))
@@ -0,0 +1,283 @@
+from simplex import OPTIMAL
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the numeric backends.
+    np = None
+
+INF = float('inf')
+
+
+def _check(solver):
+    if solver.status != OPTIMAL:
+        raise ValueError("A análise de sensibilidade requer uma solução "
+                         "ótima (status %s)." % solver.status)
+    if getattr(solver, 'presolved', None) is not None:
+        raise ValueError("A análise de sensibilidade não suporta presolve.")
+    if solver.lower is not None:
+        raise ValueError("A análise de sensibilidade não suporta limites "
+                         "nas variáveis.")
+
+
+def _tol(solver):
+    return 0 if solver.backend == 'fraction' else solver.feas_tol
+
+
+def _internal(solver):
+    ''' Base ótima na forma resolvida internamente: (n, m, colunas
+    básicas por linha, valores básicos, linha inferior sem z), com n
+    colunas estruturais seguidas das m colunas identidade.
+    '''
+    n, m = solver._num_vars(), len(solver.b)
+    position = dict((var, index) for index, var
+                    in enumerate(solver.entering))
+    basic = [position[var] for var in solver.departing]
+    if solver.backend == 'revised':
+        rhs = list(solver.revised.x_B)
+        reduced = list(solver.revised.bottom_row()[:-1])
+    else:
+        rhs = [row[len(row) - 1] for row in solver.tableau[:-1]]
+        bottom_row = solver.tableau[len(solver.tableau) - 1]
+        reduced = list(bottom_row[:len(bottom_row) - 1])
+    return n, m, basic, rhs, reduced
+
+
+def _ftran(solver, v):
+    ''' B^-1 v (as colunas identidade do tableau guardam B^-1).
+    '''
+    if solver.backend == 'revised':
+        return list(solver.revised.factor.ftran(np.asarray(v, dtype=np.float64)))
+    n, m = solver._num_vars(), len(solver.b)
+    if solver.backend == 'float':
+        return list(solver.tableau[:-1, n:n + m] @ np.asarray(v, dtype=np.float64))
+    return [sum(row[n + k] * x for k, x in enumerate(v) if x)
+            for row in solver.tableau[:-1]]
+
+
+def _combine_rows(solver, w):
+    ''' w^T B^-1 [A I]: combinação das linhas do tableau.
+    '''
+    if solver.backend == 'revised':
+        return list(solver.revised.transposed_product(np.asarray(w, dtype=np.float64)))
+    if solver.backend == 'float':
+        return list(solver.tableau[:-1, :-1].T @ np.asarray(w, dtype=np.float64))
+    width = len(solver.tableau[0]) - 1
+    return [sum(x * row[j] for x, row in zip(w, solver.tableau[:-1]) if x)
+            for j in range(width)]
+
+
+def _step_range(values, direction, tol, index=None):
+    ''' Intervalo [low, high] de delta com values + delta direction >= 0
+    nas posições index (todas, por padrão), e as posições que limitam
+    cada lado (-1 se o lado é infinito).
+    '''
+    low, high, low_at, high_at = -INF, INF, -1, -1
+    for i in (range(len(values)) if index is None else index):
+        d = direction[i]
+        if d > tol:
+            bound = -values[i] / d
+            if bound > low:
+                low, low_at = bound, i
+        elif d < -tol:
+            bound = values[i] / -d
+            if bound < high:
+                high, high_at = bound, i
+    return low, high, low_at, high_at
+
+
+def _unit(m, k, zero):
+    v = [zero] * m
+    v[k] = zero + 1
+    return v
+
+
+def _flip(interval, sign):
+    low, high = interval
+    return (low, high) if sign > 0 else (-high, -low)
+
+
+def sensitivity(solver):
+    ''' Análise de sensibilidade a partir do tableau ótimo de um
+    SimplexSolver, sem re-resolver o problema. Retorna um dicionário com,
+    no problema como dado a run_simplex:
+
+      duals: preço-sombra de cada restrição (dz/db_i);
+      reduced_costs: custo reduzido de cada variável (c_j - y A_j; zero
+      nas básicas);
+      b_ranges: para cada b_i, o intervalo (inferior, superior) em que a
+      base atual continua ótima (só b_i variando);
+      c_ranges: o mesmo para cada c_j;
+      objective: valor ótimo.
+
+    Os intervalos usam -inf/inf quando são ilimitados e valem para a base
+    encontrada (com degenerescência, outra base ótima pode ter outros).
+    '''
+    _check(solver)
+    n, m, basic, rhs, reduced = _internal(solver)
+    tol = _tol(solver)
+    zero = solver.b[0] * 0 if solver.b else 0
+    row_of = dict((j, r) for r, j in enumerate(basic))
+
+    # Internal rhs ranging: x_B + delta B^-1 e_k >= 0.
+    b_ranges = []
+    for k in range(m):
+        low, high, _, _ = _step_range(rhs, _ftran(solver, _unit(m, k, zero)), tol)
+        b_ranges.append((solver.b[k] + low, solver.b[k] + high))
+
+    # Internal cost ranging: the bottom row must stay >= 0 on the
+    # nonbasic columns (artificial columns never enter again).
+    nonbasic = [k for k in range(n + m)
+                if k not in row_of and k not in solver.blocked]
+    c_ranges = []
+    for j in range(n):
+        if j in row_of:
+            row = _combine_rows(solver, _unit(m, row_of[j], zero))
+            low, high, _, _ = _step_range(reduced, row, tol, nonbasic)
+        else:
+            low, high = -INF, reduced[j]
+        c_ranges.append((solver.c[j] + low, solver.c[j] + high))
+
+    values = [zero] * (n + m)
+    for r, j in enumerate(basic):
+        values[j] = rhs[r]
+    objective = solver.get_current_solution()['z']
+    if solver.method == 'dual':
+        # Transposed problem: its variables are the duals of the original
+        # rows, its slacks the reduced costs of the original variables,
+        # and b and c swap roles.
+        return {'duals': values[:n], 'reduced_costs': values[n:],
+                'b_ranges': c_ranges, 'c_ranges': b_ranges,
+                'objective': objective}
+    sigma = -1 if solver.prob == 'min' else 1
+    signs = solver.row_signs if solver.method == 'two_phase' else [1] * m
+    n_user = solver.n_original if solver.method == 'two_phase' else n
+    return {'duals': [sigma * sign * reduced[n + i]
+                      for i, sign in enumerate(signs)],
+            'reduced_costs': [-sigma * reduced[j] for j in range(n_user)],
+            'b_ranges': [_flip(interval, sign)
+                         for interval, sign in zip(b_ranges, signs)],
+            'c_ranges': [_flip(interval, sigma)
+                         for interval in c_ranges[:n_user]],
+            'objective': objective}
+
+
+def _point(solver, t):
+    solution = solver.get_current_solution()
+    return {'t': t, 'z': solution['z'], 'solution': solution,
+            'basis': solver.departing[:]}
+
+
+def _append(points, point):
+    # Degenerate pivots give several bases at the same t: keep the last.
+    if points and points[-1]['t'] == point['t']:
+        points[-1] = point
+    else:
+        points.append(point)
+
+
+def _sweep_rhs(solver, d, t_max, max_breakpoints):
+    ''' b(t) = b + t d na forma interna, trocando de base pelo simplex
+    dual em cada ponto de quebra.
+    '''
+    tol = _tol(solver)
+    b0 = list(solver.b)
+    t = 0
+    points = [_point(solver, t)]
+    for _ in range(max_breakpoints):
+        _, _, _, rhs, _ = _internal(solver)
+        _, step, _, row = _step_range(rhs, _ftran(solver, d), tol)
+        step = max(step, 0)
+        if t_max is not None and t + step >= t_max:
+            solver.update_rhs([x + t_max * y for x, y in zip(b0, d)])
+            _append(points, _point(solver, t_max))
+            return points, 'complete'
+        if row < 0:
+            return points, 'complete'
+        t = t + step
+        solver.update_rhs([x + t * y for x, y in zip(b0, d)])
+        _append(points, _point(solver, t))
+        # The basic variable of this row turns negative past t.
+        column = solver.get_dual_entering_var(row)
+        if column < 0:
+            return points, 'infeasible'
+        solver.pivot([column, row])
+        _append(points, _point(solver, t))
+    return points, 'limit'
+
+
+def _sweep_cost(solver, e, t_max, max_breakpoints):
+    ''' c(t) = c + t e na forma interna, trocando de base pelo simplex
+    primal em cada ponto de quebra.
+    '''
+    tol = _tol(solver)
+    c0 = list(solver.c)
+    t = 0
+    points = [_point(solver, t)]
+    for _ in range(max_breakpoints):
+        n, m, basic, _, reduced = _internal(solver)
+        row_of = set(basic)
+        # Derivative of the bottom row: e_B B^-1 [A I] - e.
+        slope = _combine_rows(solver, [e[j] if j < n else 0 for j in basic])
+        slope = [x - e[k] if k < n else x for k, x in enumerate(slope)]
+        nonbasic = [k for k in range(n + m)
+                    if k not in row_of and k not in solver.blocked]
+        _, step, _, column = _step_range(reduced, slope, tol, nonbasic)
+        step = max(step, 0)
+        if t_max is not None and t + step >= t_max:
+            solver.update_objective([x + t_max * y for x, y in zip(c0, e)])
+            _append(points, _point(solver, t_max))
+            return points, 'complete'
+        if column < 0:
+            return points, 'complete'
+        t = t + step
+        solver.update_objective([x + t * y for x, y in zip(c0, e)])
+        _append(points, _point(solver, t))
+        # The reduced cost of this column turns negative past t.
+        row = solver.get_departing_var(column)
+        if row < 0:
+            return points, 'unbounded'
+        solver.pivot([column, row])
+        _append(points, _point(solver, t))
+    return points, 'limit'
+
+
+def parametric_rhs(solver, direction, t_max=None, max_breakpoints=1000):
+    ''' Re-otimização paramétrica de b(t) = b + t direction, com t de 0
+    até t_max (sem limite se None), a partir da base ótima de solver (que
+    não é alterado). Em cada ponto de quebra a base muda com alguns pivôs
+    do simplex dual, em vez de uma nova solução completa.
+
+    Retorna (pontos, status). Cada ponto é um dicionário com t, z,
+    solution e basis (variáveis básicas) no início de cada trecho em que a
+    base é a mesma (z e a solução são lineares em t dentro do trecho); o
+    último é o fim da varredura. status é 'complete', 'infeasible' (não
+    há solução para t além do último ponto), 'unbounded' ou 'limit'
+    (max_breakpoints atingido).
+    '''
+    _check(solver)
+    work = solver.snapshot()
+    if solver.method == 'dual':
+        # b of the original problem is the objective of the solved one.
+        return _sweep_cost(work, [work.c[0] * 0 + x for x in direction],
+                           t_max, max_breakpoints)
+    signs = solver.row_signs if solver.method == 'two_phase' else \
+        [1] * len(direction)
+    return _sweep_rhs(work, [work.b[0] * 0 + x * sign
+                             for x, sign in zip(direction, signs)],
+                      t_max, max_breakpoints)
+
+
+def parametric_cost(solver, direction, t_max=None, max_breakpoints=1000):
+    ''' Como parametric_rhs, para c(t) = c + t direction; nos pontos de
+    quebra a base muda pelo simplex primal.
+    '''
+    _check(solver)
+    work = solver.snapshot()
+    zero = work.c[0] * 0
+    if solver.method == 'dual':
+        return _sweep_rhs(work, [zero + x for x in direction], t_max,
+                          max_breakpoints)
+    sigma = -1 if solver.prob == 'min' else 1
+    e = [zero + sigma * x for x in direction]
+    return _sweep_cost(work, e + [zero] * (len(work.c) - len(e)), t_max,
+                       max_breakpoints)
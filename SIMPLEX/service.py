@@ -0,0 +1,540 @@
+import asyncio, getopt, io, itertools, json, math, os, signal, sys, time
+import multiprocessing
+from fractions import Fraction
+
+# Job states.
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# Options that write files or need Python objects: not accepted in jobs.
+_FORBIDDEN = ('latex', 'report', 'callback', 'enable_msg')
+# Arguments that _solve passes from the job's own fields; as options they
+# would be passed twice.
+_JOB_FIELDS = ('time_limit', 'bounds', 'integer', 'prob', 'ineq')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BRANCH_AND_BOUND = os.path.join(HERE, '..', 'BRANCH-AND-BOUND')
+
+
+def _plain(value):
+    ''' Converte resultados do solver em valores JSON: frações inteiras
+    viram int, as demais texto "p/q"; escalares numpy viram números do
+    Python e infinitos viram None.
+    '''
+    if isinstance(value, dict):
+        return dict((str(k), _plain(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, Fraction):
+        return int(value) if value.denominator == 1 else str(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _solve(spec, send, interval):
+    ''' Resolve um job no processo do worker. Os módulos do solver são
+    importados só aqui, de modo que o servidor não carrega numpy.
+    '''
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    options = dict(spec.get('options') or {})
+    backend = options.get('backend', 'float')
+    time_limit = spec.get('time_limit')
+    model = None
+    if spec.get('model') is not None:
+        from modelio import read_model
+        model = read_model(io.StringIO(spec['model']), spec.get('format', 'lp'))
+    last = [0.0]
+
+    def due():
+        now = time.perf_counter()
+        if now - last[0] < interval:
+            return False
+        last[0] = now
+        return True
+
+    if spec['kind'] == 'lp':
+        from simplex import SimplexSolver
+        bounds = spec.get('bounds')
+        if model is not None:
+            A, b, c, prob, ineq = model.problem(sparse=backend == 'revised',
+                                                exact=backend == 'fraction',
+                                                bound_rows=False)
+            if model.lower or model.upper:
+                bounds = model.variable_bounds()
+        else:
+            A, b, c = spec['A'], spec['b'], spec['c']
+            prob, ineq = spec.get('prob', 'max'), spec.get('ineq') or []
+
+        def callback(event, solver, info):
+            if event == 'pivot' and due():
+                send('pivot', info)
+
+        solver = SimplexSolver()
+        solution = solver.run_simplex(A, b, c, prob, ineq, enable_msg=False,
+                                      time_limit=time_limit,
+                                      callback=callback, bounds=bounds,
+                                      **options)
+        result = {'status': solver.status,
+                  'iterations': solver.stats['iterations'],
+                  'solution': solution}
+        if model is not None and solution is not None:
+            result['objective'] = solution['z'] + model.offset
+            result['variables'] = dict(
+                (name, solution['x_%d' % (j + 1)])
+                for j, name in enumerate(model.columns))
+        return result
+
+    if BRANCH_AND_BOUND not in sys.path:
+        sys.path.insert(0, BRANCH_AND_BOUND)
+    from branchAndBound import branch_and_bound
+    if model is not None:
+        profits, constraints, limits = model.canonical(
+            sparse=backend == 'revised')
+        integer = sorted(model.integer) if model.integer else None
+    else:
+        profits, constraints, limits = spec['c'], spec['A'], spec['b']
+        integer = spec.get('integer')
+    deadline = None if time_limit is None else \
+        time.perf_counter() + time_limit
+    timed_out = [False]
+
+    def callback(event, info):
+        if event == 'incumbent':
+            send('incumbent', {'profit': info['profit'],
+                               'nodes': info['nodes'],
+                               'heuristic': info.get('heuristic')})
+        elif due():
+            send('node', info)
+        if deadline is not None and time.perf_counter() > deadline:
+            timed_out[0] = True
+            return True
+        return False
+
+    solution, profit, stats = branch_and_bound(
+        profits, constraints, limits, callback=callback, integer=integer,
+        **options)
+    status = 'time_limit' if timed_out[0] else stats['status']
+    result = {'status': status, 'solution': solution, 'objective': profit,
+              'stats': stats}
+    if model is not None and profit > -math.inf:
+        sign = -1 if model.prob == 'min' else 1
+        result['objective'] = sign * profit + model.offset
+        result['variables'] = dict(zip(model.columns, solution))
+    return result
+
+
+def _run_job(spec, conn, interval):
+    ''' Corpo do processo de um job: envia ('event', nome, dados) durante a
+    execução e termina com ('result', resultado) ou ('error', mensagem).
+    '''
+    if hasattr(os, 'setpgrp'):
+        # The job and any pool it starts (IP jobs with workers) form one
+        # process group, terminated together.
+        os.setpgrp()
+
+    def send(event, info):
+        conn.send(('event', event, _plain(info)))
+
+    try:
+        conn.send(('result', _plain(_solve(spec, send, interval))))
+    except Exception as error:
+        conn.send(('error', '%s: %s' % (type(error).__name__, error)))
+    finally:
+        conn.close()
+
+
+def _terminate(process):
+    ''' Termina o processo de um job e os processos que ele criou.
+    '''
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            return
+        except OSError:
+            # The job has not created its process group yet.
+            pass
+    process.terminate()
+
+
+class Job():
+    ''' Um pedido de solução e seu histórico de eventos. Os eventos ficam
+    na lista events (na ordem), de modo que um cliente que começa a
+    acompanhar o job no meio recebe todos desde o início.
+    '''
+
+    def __init__(self, id, spec):
+        self.id = id
+        self.spec = spec
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.events = []
+        self.process = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.changed = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def publish(self, event, info=None):
+        record = {'event': event}
+        record.update(info or {})
+        self.events.append(record)
+        # Wake every follower; later waits use a fresh event.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        self.publish('status', self.describe(False))
+
+    def describe(self, full=True):
+        info = {'id': self.id, 'status': self.status}
+        if full:
+            info.update({'created': self.created, 'started': self.started,
+                         'finished': self.finished})
+        if self.result is not None:
+            info['result'] = self.result
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+    async def follow(self):
+        ''' Eventos do job, desde o primeiro, até ele terminar.
+        '''
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await self.changed.wait()
+
+
+class SolveService():
+    ''' Servidor assíncrono de soluções (asyncio) com fila de jobs.
+
+    Cada job (LP pelo SimplexSolver ou IP pelo branch_and_bound) roda em
+    um processo próprio, com no máximo workers processos ao mesmo tempo;
+    os demais esperam na fila. Um processo por job permite cancelar um
+    job em execução (o processo é terminado) e impor o tempo limite: o
+    limite é passado ao solver, que para sozinho com status time_limit, e
+    o processo é terminado se passar do limite mais grace segundos.
+
+    O progresso (pivôs do simplex; incumbentes e nós do branch and bound,
+    no máximo um evento de pivô/nó a cada interval segundos) é mantido em
+    Job.events e transmitido aos clientes. Só os history jobs terminados
+    mais recentes são guardados.
+
+    Especificação de um job (JSON):
+      kind: 'lp' ou 'ip';
+      A, b, c (e, em 'lp', prob, ineq e bounds; em 'ip', integer) como em
+      run_simplex / branch_and_bound, ou model (texto LP ou MPS) e format;
+      options: argumentos extras do solver (backend, pricing, workers...);
+      time_limit: segundos.
+    '''
+
+    def __init__(self, workers=None, interval=0.2, grace=2.0, history=1000):
+        self.workers = workers or os.cpu_count() or 1
+        self.interval = interval
+        self.grace = grace
+        self.history = history
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.slots = None
+        methods = multiprocessing.get_all_start_methods()
+        # Forking a process that runs an event loop and threads is unsafe;
+        # a fork server keeps job start-up cheap where available.
+        self.context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in methods else 'spawn')
+
+    def submit(self, spec):
+        ''' Valida e enfileira um job; retorna o Job.
+        '''
+        if not isinstance(spec, dict):
+            raise ValueError("O job deve ser um objeto JSON.")
+        if spec.get('kind') not in ('lp', 'ip'):
+            raise ValueError("kind deve ser 'lp' ou 'ip'.")
+        if spec.get('model') is None and \
+                any(spec.get(key) is None for key in ('A', 'b', 'c')):
+            raise ValueError("O job precisa de model ou de A, b e c.")
+        options = spec.get('options') or {}
+        if not isinstance(options, dict):
+            raise ValueError("options deve ser um objeto JSON.")
+        for name in _FORBIDDEN:
+            if name in options:
+                raise ValueError("Opção não permitida: %s" % name)
+        for name in _JOB_FIELDS:
+            if name in options:
+                raise ValueError("%s é um campo do job, não uma opção."
+                                 % name)
+        time_limit = spec.get('time_limit')
+        if time_limit is not None and not (
+                isinstance(time_limit, (int, float)) and time_limit > 0):
+            raise ValueError("time_limit deve ser um número positivo.")
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.workers)
+        job = Job(str(next(self.ids)), spec)
+        self.jobs[job.id] = job
+        job.publish('status', job.describe(False))
+        asyncio.ensure_future(self._run(job))
+        self._forget()
+        return job
+
+    def cancel(self, id):
+        ''' Cancela um job na fila ou em execução; False se ele já tinha
+        terminado.
+        '''
+        job = self.jobs[id]
+        if job.done:
+            return False
+        if job.process is not None and job.process.is_alive():
+            _terminate(job.process)
+        job.finish(CANCELLED)
+        return True
+
+    def close(self):
+        for job in list(self.jobs.values()):
+            if not job.done:
+                self.cancel(job.id)
+
+    def _forget(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job.id]
+
+    async def _run(self, job):
+        async with self.slots:
+            if job.done:
+                return
+            try:
+                await self._execute(job)
+            except Exception as error:
+                # Otherwise the job would stay queued or running forever
+                # and its followers would never return.
+                if job.process is not None and job.process.is_alive():
+                    _terminate(job.process)
+                if not job.done:
+                    job.finish(FAILED, error='%s: %s' % (
+                        type(error).__name__, error))
+        self._forget()
+
+    async def _execute(self, job):
+        loop = asyncio.get_running_loop()
+        receiver, sender = self.context.Pipe(duplex=False)
+        try:
+            # Not daemonic: IP jobs with workers start their own process
+            # pool. close() terminates running jobs on shutdown.
+            job.process = self.context.Process(
+                target=_run_job, args=(job.spec, sender, self.interval))
+            try:
+                job.process.start()
+            finally:
+                sender.close()
+            job.status = RUNNING
+            job.started = time.time()
+            job.publish('status', job.describe(False))
+            limit = job.spec.get('time_limit')
+            timeout = None if limit is None else limit + self.grace
+            pump = loop.run_in_executor(None, self._pump, job, receiver, loop)
+            try:
+                outcome = await asyncio.wait_for(asyncio.shield(pump), timeout)
+            except asyncio.TimeoutError:
+                _terminate(job.process)
+                outcome = await pump
+                if outcome is None:
+                    outcome = ('error', "Tempo limite excedido.")
+            await loop.run_in_executor(None, job.process.join)
+        finally:
+            receiver.close()
+        # A cancelled job is already finished.
+        if job.done:
+            pass
+        elif outcome is None:
+            job.finish(FAILED, error="O processo do job terminou com "
+                       "código %s." % job.process.exitcode)
+        elif outcome[0] == 'result':
+            job.finish(DONE, result=outcome[1])
+        else:
+            job.finish(FAILED, error=outcome[1])
+
+    def _pump(self, job, receiver, loop):
+        # Runs in a thread: relays the worker's events to the event loop
+        # and returns its final message (None if the process died).
+        while True:
+            try:
+                message = receiver.recv()
+            except (EOFError, OSError):
+                return None
+            if message[0] != 'event':
+                return message
+            loop.call_soon_threadsafe(job.publish, message[1], message[2])
+
+    async def handle(self, reader, writer):
+        ''' Atende uma conexão HTTP/1.1 (uma requisição por conexão).
+
+          POST   /jobs              enfileira o job do corpo JSON
+          GET    /jobs              lista os jobs e seus estados
+          GET    /jobs/<id>         estado e resultado do job
+          GET    /jobs/<id>/events  eventos em JSON, um por linha, até o
+                                    job terminar
+          DELETE /jobs/<id>         cancela o job
+        '''
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            method, path, body = request
+            parts = [part for part in path.split('?', 1)[0].split('/')
+                     if part]
+            if not parts or parts[0] != 'jobs' or len(parts) > 3:
+                return await _respond(writer, 404, {'error': "Não encontrado."})
+            if len(parts) == 1:
+                if method == 'POST':
+                    try:
+                        job = self.submit(json.loads(body or b'null'))
+                    except ValueError as error:
+                        return await _respond(writer, 400,
+                                              {'error': str(error)})
+                    return await _respond(writer, 202, job.describe())
+                if method == 'GET':
+                    return await _respond(writer, 200, [
+                        job.describe(False) for job in self.jobs.values()])
+                return await _respond(writer, 405, {'error': "Método inválido."})
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return await _respond(writer, 404, {'error': "Job desconhecido."})
+            if len(parts) == 3:
+                if parts[2] != 'events' or method != 'GET':
+                    return await _respond(writer, 404,
+                                          {'error': "Não encontrado."})
+                writer.write(_head(200, 'application/x-ndjson'))
+                async for event in job.follow():
+                    writer.write(json.dumps(event).encode() + b'\n')
+                    await writer.drain()
+                return
+            if method == 'GET':
+                return await _respond(writer, 200, job.describe())
+            if method == 'DELETE':
+                self.cancel(job.id)
+                return await _respond(writer, 200, job.describe())
+            return await _respond(writer, 405, {'error': "Método inválido."})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as error:
+            await _respond(writer, 400, {'error': str(error)})
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8750, path=None):
+        ''' Atende em host:port ou, com path, num socket Unix, até ser
+        interrompido.
+        '''
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        if hasattr(signal, 'SIGTERM'):
+            try:
+                # A terminated server still terminates its running jobs
+                # (they are not daemonic).
+                loop.add_signal_handler(signal.SIGTERM, task.cancel)
+            except NotImplementedError:
+                pass
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+MAX_BODY = 256 * 1024 * 1024
+
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed'}
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ValueError("Requisição HTTP inválida.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise ValueError("Corpo da requisição grande demais.")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, body
+
+
+def _head(code, content_type, length=None):
+    head = 'HTTP/1.1 %d %s\r\nContent-Type: %s\r\nConnection: close\r\n' % (
+        code, REASONS[code], content_type)
+    if length is not None:
+        head += 'Content-Length: %d\r\n' % length
+    return (head + '\r\n').encode('latin-1')
+
+
+async def _respond(writer, code, payload):
+    body = json.dumps(payload).encode()
+    writer.write(_head(code, 'application/json', len(body)) + body)
+    await writer.drain()
+
+
+if __name__ == '__main__':
+    host, port, path, workers = '127.0.0.1', 8750, None, None
+    usage = ('service.py [--host <endereço>] [--port <porta>] '
+             '[--socket <caminho>] [--workers <n>]')
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h", [
+            "host=", "port=", "socket=", "workers="])
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            print('Servidor HTTP de soluções: POST /jobs com o job em JSON '
+                  '(kind lp/ip, A, b, c ou model, options, time_limit), GET '
+                  '/jobs/<id>, GET /jobs/<id>/events (progresso, um JSON '
+                  'por linha) e DELETE /jobs/<id>. Com --socket atende num '
+                  'socket Unix em vez de host:porta.')
+            sys.exit()
+        elif opt == "--host":
+            host = arg.strip()
+        elif opt == "--port":
+            port = int(arg)
+        elif opt == "--socket":
+            path = arg.strip()
+        elif opt == "--workers":
+            workers = int(arg)
+    service = SolveService(workers)
+    try:
+        asyncio.run(service.serve(host, port, path))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -1,19 +1,32 @@
-import ast, getopt, sys, copy, os
+import ast, getopt, sys, copy, os, time
 from fractions import Fraction
 
+try:
+    import numpy as np
+    from revised import RevisedSimplex, is_sparse
+    from pricing import make_pricing
+except ImportError:  # numpy is only required by the numeric backends.
+    np = None
+from presolve import Presolve
+
 clear = lambda: os.system('cls' if os.name == 'nt' else 'clear')
 
+# Values of SimplexSolver.status after a solve.
+OPTIMAL = 'optimal'
+INFEASIBLE = 'infeasible'
+UNBOUNDED = 'unbounded'
+ITERATION_LIMIT = 'iteration_limit'
+TIME_LIMIT = 'time_limit'
+ABORTED = 'aborted'
+
+INF = float('inf')
+
 
 class SimplexSolver():
     ''' Resolve programas lineares usando algoritmo simplex e
         etapas do problema de saída no arquivo LaTeX.
     '''
 
-    # Table for converting inequality list to LaTeX    
-    latex_ineq = {'=': '=',
-                  '<=': r'\leq',
-                  '>=': r'\geq'}
-
     def __init__(self):
         self.A = []
         self.b = []
@@ -24,26 +37,187 @@ class SimplexSolver():
         self.ineq = []
         self.prob = "max"
         self.gen_doc = False
-        self.doc = ""
+        self.report = None
+        self.backend = "fraction"
+        self.feas_tol = 1e-9
+        self.opt_tol = 1e-9
+        self.revised = None
+        self.pricing = None
+        self.stats = {}
+        self.status = None
+        self.max_iter = None
+        self.time_limit = None
+        self.bland_after = 50
+        self.bland = False
+        self.method = 'standard'
+        self.blocked = []
+        self.row_signs = None
+        self.artificial_rows = []
+        self.callback = None
+        self.timers = None
+        self.lower = None
+        self.upper = None
+        self.flipped = None
 
     def run_simplex(self, A, b, c, prob='max', ineq=[],
-                    enable_msg=False, latex=False):
+                    enable_msg=False, latex=False, report=None,
+                    backend='fraction',
+                    feas_tol=1e-9, opt_tol=1e-9, pricing='dantzig',
+                    max_iter=None, time_limit=None, bland_after=50,
+                    presolve=False, callback=None, profile=False,
+                    bounds=None):
         ''' Rodagem do simplex.
+
+        backend: 'fraction' (exato, para auditoria), 'float' (tableau
+        NumPy float64 com pivoteamento vetorizado) ou 'revised' (simplex
+        revisado com base fatorada em LU). feas_tol e opt_tol são as
+        tolerâncias de viabilidade e otimalidade dos backends numéricos.
+        pricing: 'dantzig', 'partial', 'devex', 'steepest' ou uma
+        instância de pricing.PricingRule. Ao final, self.stats traz o
+        número de iterações e o tempo de execução.
+
+        Após bland_after pivôs degenerados seguidos, a escolha do pivô
+        passa a seguir a regra de Bland (anticiclagem) até o próximo pivô
+        não degenerado. max_iter e time_limit (segundos) interrompem a
+        execução. self.status indica o resultado: OPTIMAL, INFEASIBLE,
+        UNBOUNDED, ITERATION_LIMIT ou TIME_LIMIT; nos limites, retorna a
+        solução viável corrente.
+
+        Problemas 'max' só com '<=' e b >= 0 partem direto da base de
+        folgas, e problemas 'min' sem ineq, com b e c >= 0, são
+        resolvidos pelo dual (como antes). Qualquer outra combinação de
+        '<=', '>=' e '=' em ineq (ou b ou c negativo) é resolvida pelo
+        método das duas fases, sem transpor o problema.
+
+        Com presolve=True o problema passa antes por presolve.Presolve; o
+        simplex roda sobre o problema reduzido e a solução retornada volta
+        aos x_j e s_i originais (s_i = folga ou excesso da linha i).
+
+        latex=True grava o passo a passo em LaTeX no solution.tex. report
+        pode ser um caminho ou stream (LaTeX) ou um report.Report criado por
+        report.make_report, com formato LaTeX, Markdown ou JSON e as
+        opções every e summaries_only. O relatório é escrito durante a
+        execução.
+
+        callback(event, solver, info) é chamado a cada pivô ('pivot', com
+        iteration, entering, departing e simplex = 'primal' ou 'dual') e
+        ao final de toda execução ('finish', com status, também quando o
+        problema é inviável, ilimitado ou um limite é atingido); se
+        retornar um valor verdadeiro num pivô, a execução para com status
+        ABORTED. Com profile=True, self.stats['timers'] acumula o tempo (s)
+        de precificação, teste da razão e atualização das linhas.
+        Desligados, não custam nada além de um teste por pivô.
+
+        bounds: lista de pares (inferior, superior) por variável (None
+        = 0 no inferior, sem limite no superior). Os limites são tratados
+        pelo teste da razão do simplex com variáveis limitadas, sem
+        linhas extras; o inferior pode ser negativo, mas não -inf.
         '''
+        if backend not in ('fraction', 'float', 'revised'):
+            raise ValueError("Backend desconhecido: %s" % backend)
+        if backend != 'fraction' and np is None:
+            raise ImportError("O backend '%s' requer numpy." % backend)
+        if bounds is not None:
+            if presolve:
+                raise ValueError("presolve não suporta limites nas "
+                                 "variáveis.")
+            if any(low is not None and low == -INF for low, _ in bounds):
+                raise ValueError("Variáveis livres não são suportadas.")
+            if prob == 'min' and not ineq:
+                # The dual (transposed) path has no variable bounds.
+                ineq = ['>='] * len(b)
         self.prob = prob
-        self.gen_doc = latex
+        self.gen_doc = latex or report is not None
+        self.report = None
+        if self.gen_doc:
+            from report import Report, make_report
+            if report is None or not isinstance(report, Report):
+                report = make_report('latex', report or 'solution.tex')
+            self.report = report
         self.ineq = ineq
+        self.backend = backend
+        self.feas_tol = feas_tol
+        self.opt_tol = opt_tol
+        self.max_iter = max_iter
+        self.time_limit = time_limit
+        self.bland_after = bland_after
+        if pricing == 'dantzig':
+            self.pricing = None
+        elif np is None:
+            raise ImportError("A precificação '%s' requer numpy." % pricing)
+        else:
+            self.pricing = make_pricing(pricing)
+        self._start = time.perf_counter()
+        self.stats = {'pricing': self.pricing.name if self.pricing
+                      else 'dantzig', 'iterations': 0, 'time': 0.0}
+        self.callback = callback
+        self.timers = None
+        if profile:
+            self.timers = {'pricing': 0.0, 'ratio_test': 0.0,
+                           'row_update': 0.0}
+            self.stats['timers'] = self.timers
+
+        self.presolved = None
+        if presolve:
+            self.presolved = Presolve(A, b, c, prob, ineq,
+                                      exact=backend == 'fraction',
+                                      tol=feas_tol)
+            self.stats['presolve'] = self.presolved.stats
+            if self.presolved.infeasible or self.presolved.unbounded:
+                self.status = INFEASIBLE if self.presolved.infeasible \
+                    else UNBOUNDED
+                self._finish_callback()
+                return None
+            if self.presolved.solved:
+                self.status = OPTIMAL
+                self._finish_callback()
+                return self.presolved.postsolve({})
+            A, b, c, self.ineq = self.presolved.reduced()
 
         # Create the header for the latex doc.        
         self.start_doc()
 
         # Add slack & artificial variables
-        self.set_simplex_input(A, b, c)
-            
+        self.set_simplex_input(A, b, c, bounds)
+        if self.lower is not None and any(
+                low > up for low, up in zip(self.lower, self.upper)):
+            self.status = INFEASIBLE
+            self._finish_callback()
+            self.infeasible_doc()
+            self.print_doc()
+            return None
+        if self.method == 'two_phase':
+            solution = self._two_phase(enable_msg)
+        else:
+            solution = self.iterate(enable_msg)
+        if self.presolved and solution is not None:
+            solution = self.presolved.postsolve(solution)
+        return solution
+
+    def iterate(self, enable_msg=False, finish=True):
+        ''' Pivoteamentos do simplex primal a partir da base atual, até a
+        otimalidade ou um dos limites; usado por run_simplex e pelas
+        re-otimizações. Com finish=False (fase I) o relatório não é
+        encerrado.
+        '''
+        self.status = None
+        self.bland = False
+        degenerate = 0
+        if self.pricing:
+            self.pricing.start(self)
+
         # Are there any negative elements on the bottom (disregarding
         # right-most element...)
-        while (not self.should_terminate()):
-            # ... if so, continue.
+        while (not self._timed_should_terminate()):
+            # ... if so, continue (unless a limit was reached).
+            if (self.max_iter is not None and
+                    self.stats['iterations'] >= self.max_iter):
+                self.status = ITERATION_LIMIT
+                break
+            if (self.time_limit is not None and
+                    time.perf_counter() - self._start >= self.time_limit):
+                self.status = TIME_LIMIT
+                break
             if(enable_msg):
                 clear()
                 self._print_tableau()
@@ -53,12 +227,24 @@ class SimplexSolver():
             
             # Attempt to find a non-negative pivot.
             pivot = self.find_pivot()
+            if pivot[1] is None:
+                # The entering variable reached its own bound first: it
+                # is complemented and stays nonbasic (no pivot).
+                self._complement_column(pivot[0])
+                self.stats['iterations'] += 1
+                continue
             if pivot[1] < 0:
                 if (enable_msg):
                     print("Não existe pivô não negativo. "
                           "Assim, a solução é inviável.")
                 self.infeasible_doc()
                 self.print_doc()
+                # An unbounded dual means an infeasible min problem.
+                self.status = INFEASIBLE if self.method == 'dual' \
+                    else UNBOUNDED
+                self.stats['time'] = time.perf_counter() - self._start
+                if finish:
+                    self._finish_callback()
                 return None
             else:
                 self.pivot_doc(pivot)
@@ -77,11 +263,36 @@ class SimplexSolver():
                     "pivô é um e todos os outros elementos do "
                     "coluna inserida é zero.\n")
 
+            # Switch to Bland's rule after too many degenerate pivots.
+            if self._pivot_rhs(pivot[1]) <= self.price_tol():
+                degenerate += 1
+            else:
+                degenerate = 0
+            self.bland = degenerate >= self.bland_after
+
             # Do row operations to make every other element in column zero.
-            self.pivot(pivot)
-            self.tableau_doc()
+            if self.pricing:
+                self.pricing.update(self, pivot[0], pivot[1])
+            if self.callback is not None:
+                info = {'iteration': self.stats['iterations'] + 1,
+                        'entering': self.entering[pivot[0]],
+                        'departing': self.departing[pivot[1]],
+                        'simplex': 'primal'}
+            self._timed_pivot(pivot)
+            self.stats['iterations'] += 1
+            self.tableau_doc(self.stats['iterations'])
+            if self.callback is not None and \
+                    self.callback('pivot', self, info):
+                self.status = ABORTED
+                break
 
+        if self.status is None:
+            self.status = OPTIMAL
         solution = self.get_current_solution()
+        self.stats['time'] = time.perf_counter() - self._start
+        if not finish:
+            return solution
+        self._finish_callback()
         self.final_solution_doc(solution)
         if (enable_msg):
             clear()
@@ -89,26 +300,151 @@ class SimplexSolver():
             print(("Solução atual: %s\n" % str(solution)))
         self.print_doc()
         return solution
+
+    def _two_phase(self, enable_msg=False):
+        ''' Fase I maximiza -(soma das artificiais); se o ótimo é zero, as
+        artificiais saem da base, suas colunas são bloqueadas e a fase II
+        otimiza o objetivo original a partir da base viável encontrada.
+        '''
+        if self.artificial_rows:
+            self.phase_doc("Fase I: maximize o negativo da soma das "
+                           "variáveis artificiais.")
+            self._phase_one_objective()
+            self.iterate(enable_msg, finish=False)
+            if self.status != OPTIMAL:
+                self._finish_callback()
+                self.print_doc()
+                return None
+            if self.objective_value() < -self.price_tol():
+                self.status = INFEASIBLE
+                self._finish_callback()
+                self.infeasible_doc()
+                self.print_doc()
+                return None
+            self._drive_out_artificials()
+            self.phase_doc("Fase II: otimize o objetivo original a partir "
+                           "da base viável da fase I.")
+            self._phase_two_objective()
+            self.tableau_doc()
+        return self.iterate(enable_msg)
+
+    def _finish_callback(self):
+        # Every way out of a solve reports its final status, so observers
+        # also see infeasible, unbounded and limited runs.
+        if self.callback is not None:
+            self.callback('finish', self, {'status': self.status})
+
+    def _artificial_columns(self):
+        return [self.entering.index("a_%s" % str(i + 1))
+                for i in self.artificial_rows]
+
+    def _phase_one_objective(self):
+        art_cols = self._artificial_columns()
+        if self.backend == 'revised':
+            self.revised.set_objective([0] * self._num_vars())
+            self.revised.set_slack_costs(
+                [-1 if i in self.artificial_rows else 0
+                 for i in range(len(self.b))])
+            return
+        if self.backend == 'float':
+            T = self.tableau
+            T[-1] = -T[self.artificial_rows].sum(axis=0)
+            T[-1, art_cols] = 0.0
+            return
+        bottom_row = [-sum(self.tableau[i][j] for i in self.artificial_rows)
+                      for j in range(len(self.tableau[0]))]
+        for j in art_cols:
+            bottom_row[j] = Fraction(0)
+        self.tableau[-1] = bottom_row
+
+    def _phase_two_objective(self):
+        if self.backend == 'revised':
+            self.revised.set_slack_costs([0] * len(self.b))
+        self.update_objective(self.c)
+
+    def objective_value(self):
+        ''' Valor de z na base atual (do problema resolvido internamente).
+        '''
+        if self.backend == 'revised':
+            return self.revised.objective()
+        return self.tableau[len(self.tableau) - 1][len(self.tableau[0]) - 1]
+
+    def _drive_out_artificials(self):
+        ''' Troca por colunas não artificiais as artificiais que ficaram
+        na base (em nível zero) e bloqueia as colunas artificiais. Uma
+        artificial que não pode sair indica uma linha redundante e fica
+        na base, sempre em zero.
+        '''
+        art_cols = self._artificial_columns()
+        for r, var in enumerate(self.departing):
+            if not var.startswith('a_'):
+                continue
+            row = self.tableau[r][:-1] if self.backend == 'fraction' \
+                else self.tableau_row(r)
+            for j, value in enumerate(row):
+                if j not in art_cols and abs(value) > self.price_tol():
+                    self.pivot([j, r])
+                    break
+        basic = set(self.departing)
+        self.blocked = [j for j in art_cols
+                        if self.entering[j] not in basic]
+        if self.backend == 'revised':
+            self.revised.block(self.blocked)
         
-    def set_simplex_input(self, A, b, c):
+    def set_simplex_input(self, A, b, c, bounds=None):
         ''' Defina variáveis ​​iniciais e crie tableau.
+
+        A também pode ser uma matriz esparsa do scipy (CSR/CSC); nesse
+        caso o problema é resolvido sempre pelo simplex revisado. bounds
+        como em run_simplex.
         '''
-        # Convert all entries to fractions for readability.
-        for a in A:
-            self.A.append([Fraction(x) for x in a])    
-        self.b = [Fraction(x) for x in b]
-        self.c = [Fraction(x) for x in c]
-        if not self.ineq:
-            if self.prob == 'max':
-                self.ineq = ['<='] * len(b)
-            elif self.prob == 'min':
-                self.ineq = ['>='] * len(b)
+        sparse_input = np is not None and is_sparse(A)
+        if sparse_input:
+            self.backend = 'revised'
+        # Convert all entries to fractions for readability (or to plain
+        # floats for the numeric backends).
+        num = Fraction if self.backend == 'fraction' else float
+        self.A = []
+        self.method, self.blocked, self.artificial_rows = 'standard', [], []
+        if sparse_input:
+            self.A = A.tocsc().astype(np.float64)
+        else:
+            for a in A:
+                self.A.append([num(x) for x in a])    
+        self.b = [num(x) for x in b]
+        self.c = [num(x) for x in c]
+        self.lower = self.upper = self.flipped = None
+        if bounds is not None:
+            self._init_bounds(bounds)
+        if self.ineq:
+            self.ineq = list(self.ineq)
+            self.method = 'two_phase' if (self.prob == 'min' or
+                                         set(self.ineq) != set(['<=']))\
+                else 'standard'
+        elif self.prob == 'max':
+            self.ineq = ['<='] * len(b)
+        elif self.prob == 'min':
+            self.ineq = ['>='] * len(b)
+            # The transposed problem starts from its slack basis, which is
+            # only feasible when c >= 0; problems with negative c or b
+            # are solved by the two phases instead.
+            self.method = 'dual' if all(x >= 0 for x in self.c) and \
+                all(x >= 0 for x in self.b) else 'two_phase'
+        if self.prob == 'max' and any(x < 0 for x in self._shifted_b()):
+            self.method = 'two_phase'
             
-        self.update_enter_depart(self.get_Ab())
+        self.update_enter_depart(width=self._num_vars() + 1)
         self.init_problem_doc()
 
+        if self.method == 'two_phase':
+            self._set_two_phase_input(sparse_input)
+        # If this is a minimization problem the sparse matrix is simply
+        # transposed (no copy of the nonzeros is made).
+        elif self.prob == 'min' and sparse_input:
+            self.A, self.b, self.c = self.A.T.tocsc(), self.c, self.b
+            self.ineq = ['<='] * len(self.b)
         # If this is a minimization problem...
-        if self.prob == 'min':
+        elif self.prob == 'min':
             # ... find the dual maximum and solve that.
             m = self.get_Ab()
             m.append(self.c + [0])
@@ -121,23 +457,265 @@ class SimplexSolver():
             self.c.pop()
             self.ineq = ['<='] * len(self.b)
 
-        self.create_tableau()
+        if self.backend == 'revised':
+            self.revised = RevisedSimplex(self.A, self.b, self.c,
+                                          self.feas_tol, self.opt_tol)
+            self._sync_revised_bounds()
+        else:
+            self.create_tableau()
         self.ineq = ['='] * len(self.b)
-        self.update_enter_depart(self.tableau)
+        if self.method == 'two_phase':
+            self._two_phase_names()
+        else:
+            self.update_enter_depart(width=self._num_vars() + len(self.b)
+                                     + 1)
         self.slack_doc()
         self.init_tableau_doc()
 
-    def update_enter_depart(self, matrix):
+    def _set_two_phase_input(self, sparse_input):
+        ''' Forma padrão para o método das duas fases: linhas com b < 0
+        são multiplicadas por -1, linhas '>=' ganham uma coluna de
+        excesso e linhas '>=' e '=' usam a coluna identidade como
+        variável artificial. Problemas 'min' maximizam -c.
+        '''
+        m = len(self.b)
+        self.row_signs = [-1 if x < 0 else 1 for x in self._shifted_b()]
+        flip = {'<=': '>=', '>=': '<=', '=': '='}
+        senses = [flip[ineq] if sign < 0 else ineq
+                  for ineq, sign in zip(self.ineq, self.row_signs)]
+        surplus_rows = [i for i in range(m) if senses[i] == '>=']
+        self.artificial_rows = [i for i in range(m) if senses[i] != '<=']
+        self.senses = senses
+        self.b = [x * sign for x, sign in zip(self.b, self.row_signs)]
+        if sparse_input:
+            from scipy.sparse import csc_matrix, diags, hstack
+            surplus = csc_matrix((-np.ones(len(surplus_rows)),
+                                  (surplus_rows,
+                                   list(range(len(surplus_rows))))),
+                                 shape=(m, len(surplus_rows)))
+            self.A = hstack([diags(np.asarray(self.row_signs, dtype=float))
+                             @ self.A,
+                             surplus]).tocsc()
+        else:
+            zero = self.c[0] * 0
+            self.A = [[x * sign for x in row] +
+                      [zero - 1 if i == k else zero for k in surplus_rows]
+                      for i, (row, sign) in enumerate(zip(self.A,
+                                                          self.row_signs))]
+        self.n_original = len(self.c)
+        if self.prob == 'min':
+            self.c = [-x for x in self.c]
+        self.c = self.c + [self.c[0] * 0] * len(surplus_rows)
+        self.surplus_rows = surplus_rows
+        if self.lower is not None:
+            # Surplus columns are plain x >= 0 columns.
+            self.lower += [self.c[0] * 0] * len(surplus_rows)
+            self.upper += [INF] * len(surplus_rows)
+            self.flipped += [False] * len(surplus_rows)
+
+    def _init_bounds(self, bounds=None):
+        ''' Limites lower_j <= x_j <= upper_j das colunas estruturais. A
+        coluna j do tableau representa t_j = x_j - lower_j ou, se
+        flipped_j (variável complementada, no limite superior quando não
+        básica), t_j = upper_j - x_j; em ambos os casos 0 <= t_j <=
+        upper_j - lower_j.
+        '''
+        num = Fraction if self.backend == 'fraction' else float
+        n = self._num_vars()
+        self.lower = [num(0)] * n
+        self.upper = [INF] * n
+        self.flipped = [False] * n
+        for j, (low, up) in enumerate(bounds or []):
+            if low is not None:
+                self.lower[j] = num(low)
+            if up is not None and up != INF:
+                self.upper[j] = num(up)
+
+    def _bound_base(self, j):
+        return self.upper[j] if self.flipped[j] else self.lower[j]
+
+    def _width(self, j):
+        ''' Largura do intervalo da coluna j (inf fora das estruturais).
+        '''
+        if self.lower is None or j >= len(self.lower):
+            return INF
+        return self.upper[j] - self.lower[j]
+
+    def _shifted_b(self, b=None):
+        ''' Lado direito das variáveis t: b - A base, onde base_j é o
+        limite em que está x_j com t_j = 0.
+        '''
+        b = self.b if b is None else b
+        if self.lower is None:
+            return b
+        base = [self._bound_base(j) for j in range(len(self.lower))]
+        if not any(base):
+            return b
+        if np is not None and is_sparse(self.A):
+            shift = self.A[:, :len(base)] @ np.asarray(base, dtype=np.float64)
+            return list(np.asarray(b, dtype=np.float64) - shift)
+        return [x - sum(a * v for a, v in zip(row, base) if v)
+                for x, row in zip(b, self.A)]
+
+    def _objective_offset(self):
+        ''' Parte constante c . base do objetivo nas variáveis t.
+        '''
+        if self.lower is None:
+            return 0
+        return sum(self.c[j] * self._bound_base(j)
+                   for j in range(len(self.lower)) if self._bound_base(j))
+
+    def _bound_signs(self):
+        return [-1 if flipped else 1 for flipped in self.flipped]
+
+    def _sync_revised_bounds(self, row=None):
+        if self.lower is None:
+            return
+        self.revised.set_bounds([self._bound_base(j)
+                                 for j in range(len(self.lower))],
+                                self._bound_signs(), row)
+
+    def _basic_rows(self):
+        return dict((var, row) for row, var in enumerate(self.departing))
+
+    def _basic_columns(self):
+        position = dict((var, index) for index, var
+                        in enumerate(self.entering))
+        return [position[var] for var in self.departing]
+
+    def _complement_column(self, j):
+        ''' Complementa a coluna não básica j (x_j passa para o outro
+        limite): t_j' = largura - t_j.
+        '''
+        w = self._width(j)
+        self.flipped[j] = not self.flipped[j]
+        if self.backend == 'revised':
+            self._sync_revised_bounds()
+        elif self.backend == 'float':
+            T = self.tableau
+            T[:, -1] -= w * T[:, j]
+            T[:, j] *= -1
+        else:
+            for row in self.tableau:
+                row[len(row) - 1] -= w * row[j]
+                row[j] = -row[j]
+
+    def _complement_row(self, r, j):
+        ''' Complementa a variável básica j da linha r, que atinge (ou
+        passa de) seu limite superior: a linha troca de sinal e o lado
+        direito vira largura - valor.
+        '''
+        w = self._width(j)
+        self.flipped[j] = not self.flipped[j]
+        if self.backend == 'revised':
+            self._sync_revised_bounds(r)
+        elif self.backend == 'float':
+            T = self.tableau
+            T[r] *= -1
+            T[r, -1] += w
+            T[r, j] = 1.0
+        else:
+            row = [-x for x in self.tableau[r]]
+            row[len(row) - 1] += w
+            row[j] = Fraction(1)
+            self.tableau[r] = row
+
+    def _bounded_ratio_test(self, q):
+        ''' Teste da razão com variáveis limitadas: t_q cresce até uma
+        básica chegar a 0, uma básica chegar à largura do seu intervalo
+        (ela é complementada antes do pivô) ou a própria t_q chegar à sua
+        largura. Retorna a linha que sai, None no último caso (troca de
+        limite, sem pivô) ou -1 se for ilimitado.
+        '''
+        basic = self._basic_columns()
+        entering_width = self._width(q)
+        row, upper = None, False
+        if self.backend == 'fraction':
+            best = entering_width
+            for i, tableau_row in enumerate(self.tableau[:-1]):
+                d, rhs = tableau_row[q], tableau_row[len(tableau_row) - 1]
+                w = self._width(basic[i])
+                if d > 0:
+                    ratio, up = rhs / d, False
+                elif d < 0 and w != INF:
+                    ratio, up = (w - rhs) / -d, True
+                else:
+                    continue
+                if ratio < best:
+                    best, row, upper = ratio, i, up
+        else:
+            if self.backend == 'float':
+                d, rhs = self.tableau[:-1, q], self.tableau[:-1, -1]
+            else:
+                d, rhs = self.revised.basis_column(q), self.revised.x_B
+            widths = np.array([self._width(j) for j in basic],
+                              dtype=np.float64)
+            down = d > self.feas_tol
+            up = (d < -self.feas_tol) & (widths < INF)
+            ratios = np.full(len(d), INF)
+            ratios[down] = rhs[down] / d[down]
+            ratios[up] = (widths[up] - rhs[up]) / -d[up]
+            index = int(np.argmin(ratios))
+            best = entering_width
+            if ratios[index] < entering_width:
+                best, row, upper = ratios[index], index, bool(up[index])
+        if row is None:
+            return None if best != INF else -1
+        if upper:
+            self._complement_row(row, basic[row])
+        return row
+
+    def _bounded_dual_row(self):
+        ''' Linha com a básica mais violada (abaixo de 0 ou acima da
+        largura do intervalo, caso em que é complementada); -1 se a base
+        é primal viável.
+        '''
+        basic = self._basic_columns()
+        if self.backend == 'fraction':
+            best, row, upper = 0, -1, False
+            for i, j in enumerate(basic):
+                value = self.tableau[i][len(self.tableau[i]) - 1]
+                w = self._width(j)
+                if -value > best:
+                    best, row, upper = -value, i, False
+                if w != INF and value - w > best:
+                    best, row, upper = value - w, i, True
+        else:
+            rhs = self.revised.x_B if self.backend == 'revised' \
+                else self.tableau[:-1, -1]
+            widths = np.array([self._width(j) for j in basic],
+                              dtype=np.float64)
+            below, above = -rhs, rhs - widths
+            violation = np.maximum(below, above)
+            row = int(np.argmax(violation))
+            if violation[row] <= self.feas_tol:
+                return -1
+            upper = bool(above[row] > below[row])
+        if upper:
+            self._complement_row(row, basic[row])
+        return row
+
+    def _two_phase_names(self):
+        self.entering = ["x_%s" % str(j + 1) for j in range(self.n_original)]
+        self.entering += ["s_%s" % str(i + 1) for i in self.surplus_rows]
+        self.departing = [("s_%s" if sense == '<=' else "a_%s") % str(i + 1)
+                          for i, sense in enumerate(self.senses)]
+        self.entering += self.departing + ["b"]
+
+    def update_enter_depart(self, matrix=None, width=None):
         self.entering = []
         self.departing = []
+        if width is None:
+            width = len(matrix[0])
+        n = self._num_vars()
         # Create tables for entering and departing variables
-        for i in range(0, len(matrix[0])):
-            if i < len(self.A[0]):
+        for i in range(0, width):
+            if i < n:
                 prefix = 'x' if self.prob == 'max' else 'y'
                 self.entering.append("%s_%s" % (prefix, str(i + 1)))
-            elif i < len(matrix[0]) - 1:
-                self.entering.append("s_%s" % str(i + 1 - len(self.A[0])))
-                self.departing.append("s_%s" % str(i + 1 - len(self.A[0])))
+            elif i < width - 1:
+                self.entering.append("s_%s" % str(i + 1 - n))
+                self.departing.append("s_%s" % str(i + 1 - n))
             else:
                 self.entering.append("b")
 
@@ -146,32 +724,90 @@ class SimplexSolver():
         todas as desigualdades em igualdades.
         '''
         slack_vars = self._generate_identity(len(self.tableau))
+        b = self._shifted_b()
         for i in range(0, len(slack_vars)):
             self.tableau[i] += slack_vars[i]
-            self.tableau[i] += [self.b[i]]
+            self.tableau[i] += [b[i]]
 
     def create_tableau(self):
         ''' Tableau inicial.
         '''
+        if self.backend == 'float':
+            self._create_float_tableau()
+            return
         self.tableau = copy.deepcopy(self.A)
         self.add_slack_variables()
         c = copy.deepcopy(self.c)
         for index, value in enumerate(c):
             c[index] = -value
         self.tableau.append(c + [0] * (len(self.b)+1))
+        self.tableau[-1][-1] = self._objective_offset()
+
+    def _create_float_tableau(self):
+        ''' Tableau inicial como um único array float64 contíguo de
+        dimensão (m+1) x (n+m+1).
+        '''
+        m, n = len(self.b), len(self.A[0])
+        T = np.zeros((m + 1, n + m + 1), dtype=np.float64)
+        T[:m, :n] = self.A
+        T[:m, n:n + m] = np.eye(m)
+        T[:m, -1] = self._shifted_b()
+        T[m, :n] = np.negative(self.c)
+        T[m, -1] = self._objective_offset()
+        self.tableau = T
 
     def find_pivot(self):
         ''' Pivot index.
         '''
-        enter_index = self.get_entering_var()
-        depart_index = self.get_departing_var(enter_index)
+        timers = self.timers
+        if timers is not None:
+            start = time.perf_counter()
+        if self.bland:
+            enter_index = self._bland_entering_var()
+        elif self.pricing:
+            enter_index = self._next_entering
+        else:
+            enter_index = self.get_entering_var()
+        if timers is not None:
+            now = time.perf_counter()
+            timers['pricing'] += now - start
+            start = now
+        if self.lower is not None:
+            depart_index = self._bounded_ratio_test(enter_index)
+        else:
+            depart_index = self.get_departing_var(enter_index)
+        if timers is not None:
+            timers['ratio_test'] += time.perf_counter() - start
         return [enter_index, depart_index]
 
+    def _timed_should_terminate(self):
+        if self.timers is None:
+            return self.should_terminate()
+        start = time.perf_counter()
+        result = self.should_terminate()
+        self.timers['pricing'] += time.perf_counter() - start
+        return result
+
+    def _timed_pivot(self, pivot):
+        if self.timers is None:
+            return self.pivot(pivot)
+        start = time.perf_counter()
+        self.pivot(pivot)
+        self.timers['row_update'] += time.perf_counter() - start
+
     def pivot(self, pivot_index):
         ''' Operações com Pivot.
         '''
         j,i = pivot_index
 
+        if self.backend == 'float':
+            self._pivot_float(i, j)
+            return
+        if self.backend == 'revised':
+            self.revised.pivot(j, i)
+            self.departing[i] = self.entering[j]
+            return
+
         pivot = self.tableau[i][j]
         self.tableau[i] = [element / pivot for
                            element in self.tableau[i]]
@@ -184,16 +820,35 @@ class SimplexSolver():
                                          row_scale)]
 
         self.departing[i] = self.entering[j]
+
+    def _pivot_float(self, i, j):
+        ''' Pivoteamento do backend float: atualização de posto 1 feita
+        no próprio tableau.
+        '''
+        T = self.tableau
+        T[i] /= T[i, j]
+        col = T[:, j].copy()
+        col[i] = 0.0
+        T -= np.outer(col, T[i])
+        # Remove round-off left in the pivot column.
+        T[:, j] = 0.0
+        T[i, j] = 1.0
+        self.departing[i] = self.entering[j]
         
     def get_entering_var(self):
         ''' Obtenha a variável de entrada determinando o 'mais negativo'
         elemento da linha inferior.
         '''
+        if self.backend == 'float':
+            return int(np.argmin(self._unblocked(self.tableau[-1, :-1])))
+        if self.backend == 'revised':
+            return self.revised.price()
         bottom_row = self.tableau[len(self.tableau) - 1]
         most_neg_ind = 0
         most_neg = bottom_row[most_neg_ind]
-        for index, value in enumerate(bottom_row):
-            if value < most_neg:
+        # The last entry is z, not a column.
+        for index, value in enumerate(bottom_row[:-1]):
+            if value < most_neg and index not in self.blocked:
                 most_neg = value
                 most_neg_ind = index
         return most_neg_ind
@@ -202,246 +857,667 @@ class SimplexSolver():
     def get_departing_var(self, entering_index):
         ''' Para calcular a variável de partida, obtenha o mínimo da razão
         de b (b_i) para o valor correspondente na coluna de entrada.
+        Razões nulas (pivôs degenerados) são válidas; empates vão para a
+        primeira linha ou, no modo Bland, para a de menor variável básica.
+        Retorna -1 se nenhum elemento da coluna é positivo (ilimitado).
         '''
-        skip = 0
+        if self.backend == 'float':
+            return self._float_ratio_test(entering_index)
+        if self.backend == 'revised':
+            return self.revised.ratio_test(entering_index, self.bland)
         min_ratio_index = -1
-        min_ratio = 0
-        for index, x in enumerate(self.tableau):
-            if x[entering_index] != 0 and x[len(x)-1]/x[entering_index] > 0:
-                skip = index
-                min_ratio_index = index
-                min_ratio = x[len(x)-1]/x[entering_index]
-                break
-        
-        if min_ratio > 0:
-            for index, x in enumerate(self.tableau):
-                if index > skip and x[entering_index] > 0:
-                    ratio = x[len(x)-1]/x[entering_index]
-                    if min_ratio > ratio:
-                        min_ratio = ratio
-                        min_ratio_index = index
+        min_ratio = None
+        for index, x in enumerate(self.tableau[:-1]):
+            if x[entering_index] > 0:
+                ratio = x[len(x)-1]/x[entering_index]
+                if (min_ratio is None or ratio < min_ratio or
+                        (ratio == min_ratio and self.bland and
+                         self._basic_position(index) <
+                         self._basic_position(min_ratio_index))):
+                    min_ratio = ratio
+                    min_ratio_index = index
         
         return min_ratio_index
 
+    def _basic_position(self, row):
+        ''' Índice (na ordem de entering) da variável básica da linha.
+        '''
+        return self.entering.index(self.departing[row])
+
+    def _bland_entering_var(self):
+        ''' Regra de Bland: primeira coluna com custo reduzido negativo.
+        '''
+        if self.backend == 'fraction':
+            bottom_row = self.tableau[len(self.tableau) - 1]
+            candidates = [j for j in range(len(bottom_row) - 1)
+                          if bottom_row[j] < 0 and j not in self.blocked]
+        else:
+            candidates = np.flatnonzero(self.reduced_costs() < -self.opt_tol)
+        return int(candidates[0]) if len(candidates) else -1
+
+    def _pivot_rhs(self, row):
+        if self.backend == 'revised':
+            return self.revised.x_B[row]
+        return self.tableau[row][len(self.tableau[row]) - 1]
+
+    def _float_ratio_test(self, entering_index):
+        ''' Teste da razão mínima vetorizado; só considera elementos da
+        coluna maiores que feas_tol. Retorna -1 se não houver candidato.
+        '''
+        col = self.tableau[:-1, entering_index]
+        rhs = self.tableau[:-1, -1]
+        candidates = col > self.feas_tol
+        if not candidates.any():
+            return -1
+        ratios = np.full(col.shape, np.inf)
+        ratios[candidates] = rhs[candidates] / col[candidates]
+        index = int(np.argmin(ratios))
+        if self.bland:
+            ties = np.flatnonzero(ratios <= ratios[index] + self.feas_tol)
+            index = min(ties, key=self._basic_position)
+        return int(index)
+
+    def _num_vars(self):
+        if np is not None and is_sparse(self.A):
+            return self.A.shape[1]
+        return len(self.A[0])
+
     def get_Ab(self):
         ''' Obtenha uma matriz A com o vetor b anexado.
         '''
-        matrix = copy.deepcopy(self.A)
+        if np is not None and is_sparse(self.A):
+            matrix = self.A.toarray().tolist()
+        else:
+            matrix = copy.deepcopy(self.A)
         for i in range(0, len(matrix)):
             matrix[i] += [self.b[i]]
         return matrix
 
     def should_terminate(self):
         ''' Determina se existem elementos negativos
-        na linha inferior
+        na linha inferior (com uma regra de precificação, se ela ainda
+        encontra uma coluna que entra).
         '''
+        if self.pricing:
+            self._next_entering = self.pricing.select(self)
+            return self._next_entering < 0
+        if self.backend == 'float':
+            return bool((self._unblocked(self.tableau[-1, :-1])
+                         >= -self.opt_tol).all())
+        if self.backend == 'revised':
+            return self.revised.is_optimal()
         result = True
         index = len(self.tableau) - 1
         for i, x in enumerate(self.tableau[index]):
-            if x < 0 and i != len(self.tableau[index]) - 1:
+            if (x < 0 and i != len(self.tableau[index]) - 1 and
+                    i not in self.blocked):
                 result = False
         return result
 
+    def num_columns(self):
+        ''' Número de colunas do tableau, sem contar b.
+        '''
+        return len(self.entering) - 1
+
+    def price_tol(self):
+        return 0 if self.backend == 'fraction' else self.opt_tol
+
+    def reduced_costs(self, cols=None):
+        ''' Linha inferior (sem b) como array float, opcionalmente só nas
+        colunas cols. Usado pelas regras de precificação.
+        '''
+        if self.backend == 'revised':
+            return self.revised.reduced_costs(cols)
+        row = np.asarray(self.tableau[len(self.tableau) - 1][:-1],
+                         dtype=np.float64)
+        row = self._unblocked(row)
+        return row if cols is None else row[cols]
+
+    def _unblocked(self, row):
+        ''' Custos reduzidos com as colunas bloqueadas (artificiais fora
+        da base após a fase I) em +inf, para que nunca entrem.
+        '''
+        if not self.blocked:
+            return row
+        row = np.array(row, dtype=np.float64)
+        row[self.blocked] = np.inf
+        return row
+
+    def tableau_row(self, i):
+        ''' Linha i de B^-1 [A I] como array float.
+        '''
+        if self.backend == 'revised':
+            return self.revised.row(i)
+        return np.asarray(self.tableau[i][:-1], dtype=np.float64)
+
+    def tableau_column(self, j):
+        ''' Coluna j de B^-1 [A I] como array float.
+        '''
+        if self.backend == 'revised':
+            return self.revised.basis_column(j)
+        return np.array([row[j] for row in self.tableau[:-1]],
+                        dtype=np.float64)
+
+    def tableau_columns_dot(self, v):
+        ''' (B^-1 [A I])^T v.
+        '''
+        if self.backend == 'revised':
+            return self.revised.transposed_product(v)
+        T = np.asarray(self.tableau[:-1], dtype=np.float64)
+        return T[:, :-1].T @ v
+
+    def tableau_column_norms(self):
+        ''' ||B^-1 a_j||^2 para todas as colunas.
+        '''
+        if self.backend == 'revised':
+            return self.revised.column_norms()
+        T = np.asarray(self.tableau[:-1], dtype=np.float64)
+        return (T[:, :-1] ** 2).sum(axis=0)
+
     def get_current_solution(self):
         ''' Obtenha a solução atual do tableau.
         '''
+        if self.backend == 'revised':
+            rhs = self.revised.x_B
+            bottom_row = self.revised.bottom_row()
+        else:
+            rhs = [row[len(row) - 1] for row in self.tableau[:-1]]
+            bottom_row = self.tableau[len(self.tableau) - 1]
+        rows = self._basic_rows()
         solution = {}
         for x in self.entering:
-            if x is not 'b':
-                if x in self.departing:
-                    solution[x] = self.tableau[self.departing.index(x)]\
-                                  [len(self.tableau[self.departing.index(x)])-1]
-                else:
-                    solution[x] = 0
-        solution['z'] = self.tableau[len(self.tableau) - 1]\
-                          [len(self.tableau[0]) - 1]
+            if x != 'b' and not x.startswith('a_'):
+                solution[x] = rhs[rows[x]] if x in rows else 0
+        solution['z'] = bottom_row[len(bottom_row) - 1]
+        if self.method == 'two_phase' and self.prob == 'min':
+            solution['z'] = -solution['z']
         
-        # If this is a minimization problem...
-        if (self.prob == 'min'):
+        # If this is a minimization problem solved through its dual...
+        if self.method == 'dual':
             # ... then get x_1, ..., x_n  from last element of
             # the slack columns.
-            bottom_row = self.tableau[len(self.tableau) - 1]
-            for v in self.entering:
+            for j, v in enumerate(self.entering):
                 if 's' in v:
-                    solution[v.replace('s', 'x')] = bottom_row[self.entering.index(v)]    
+                    solution[v.replace('s', 'x')] = bottom_row[j]    
 
+        # Bounded variables: back from t_j to x_j.
+        if self.lower is not None:
+            for j in range(len(self.lower)):
+                name = self.entering[j]
+                if self.flipped[j]:
+                    solution[name] = self.upper[j] - solution[name]
+                elif self.lower[j]:
+                    solution[name] = self.lower[j] + solution[name]
         return solution
 
+    def snapshot(self):
+        ''' Cópia independente do estado resolvido (tableau, entering e
+        departing), usada como ponto de partida para re-otimizar.
+        '''
+        state = copy.copy(self)
+        state.entering = self.entering[:]
+        state.departing = self.departing[:]
+        state.gen_doc = False
+        state.report = None
+        if self.lower is not None:
+            state.lower = self.lower[:]
+            state.upper = self.upper[:]
+            state.flipped = self.flipped[:]
+        if self.backend == 'revised':
+            state.revised = self.revised.snapshot()
+        elif self.backend == 'float':
+            state.tableau = self.tableau.copy()
+        else:
+            state.tableau = [row[:] for row in self.tableau]
+        return state
+
+    def basis(self):
+        ''' Base atual: variáveis básicas por linha e, com limites, as
+        colunas complementadas. Basta para refazer o tableau a partir de
+        outro solver do mesmo problema com set_basis.
+        '''
+        flipped = None if self.lower is None else tuple(self.flipped)
+        return tuple(self.departing), flipped
+
+    def set_basis(self, basis):
+        ''' Leva o tableau à base basis (de basis()), complementando
+        colunas e pivotando nas variáveis que faltam. Retorna False se
+        nenhuma linha aceita um pivô (a base é singular aqui).
+        '''
+        departing, flipped = basis
+        if flipped is not None and list(flipped) != self.flipped:
+            if self.backend == 'revised':
+                self.flipped = list(flipped)
+                self._sync_revised_bounds()
+            else:
+                rows = self._basic_rows()
+                for j, target in enumerate(flipped):
+                    if self.flipped[j] != target:
+                        if self.entering[j] in rows:
+                            self._complement_row(rows[self.entering[j]], j)
+                        else:
+                            self._complement_column(j)
+        position = dict((var, index) for index, var
+                        in enumerate(self.entering))
+        if self.backend == 'revised':
+            self.revised.set_basis([position[var] for var in departing])
+            self.departing = list(departing)
+            return True
+        target, basic = set(departing), set(self.departing)
+        for var in departing:
+            if var in basic:
+                continue
+            j = position[var]
+            column = np.abs(self.tableau_column(j))
+            free = [r for r, basic in enumerate(self.departing)
+                    if basic not in target]
+            r = max(free, key=lambda r: column[r])
+            if column[r] <= self.price_tol():
+                return False
+            self.pivot([j, r])
+        return True
+
+    def add_row(self, coeffs, rhs):
+        ''' Acrescenta a restrição coeffs . x <= rhs (sobre x_1, ..., x_n)
+        a um tableau já resolvido, com uma nova folga básica. O tableau
+        continua dual viável e pode ser re-otimizado com dual_simplex.
+        '''
+        if self.prob != 'max':
+            raise ValueError("add_row só é suportado em problemas 'max'.")
+        name = "s_%s" % str(len(self.departing) + 1)
+        if self.backend == 'revised':
+            self.revised.add_row(coeffs, rhs)
+        else:
+            if self.lower is not None:
+                # Written in the t variables of the tableau columns.
+                rhs = rhs - sum(x * self._bound_base(j)
+                                for j, x in enumerate(coeffs) if x)
+                coeffs = [-x if j < len(self.flipped) and self.flipped[j]
+                          else x for j, x in enumerate(coeffs)]
+            position = dict((var, index) for index, var
+                            in enumerate(self.entering))
+            basic_cols = [position[var] for var in self.departing]
+            if self.backend == 'float':
+                self._add_row_float(coeffs, rhs, basic_cols)
+            else:
+                self._add_row_fraction(coeffs, rhs, basic_cols)
+        self.entering.insert(len(self.entering) - 1, name)
+        self.departing.append(name)
+
+    def _add_row_float(self, coeffs, rhs, basic_cols):
+        T = self.tableau
+        m, width = T.shape[0] - 1, T.shape[1]
+        row = np.zeros(width + 1)
+        row[:len(coeffs)] = coeffs
+        row[-2] = 1.0
+        row[-1] = rhs
+        # New slack column goes right before b.
+        T = np.insert(T, width - 1, 0.0, axis=1)
+        # Express the new row in terms of the current nonbasic variables.
+        row -= row[basic_cols] @ T[:m]
+        self.tableau = np.insert(T, m, row, axis=0)
+
+    def _add_row_fraction(self, coeffs, rhs, basic_cols):
+        for row in self.tableau:
+            row.insert(len(row) - 1, Fraction(0))
+        width = len(self.tableau[0])
+        row = [Fraction(x) for x in coeffs]
+        row += [Fraction(0)] * (width - len(row) - 2)
+        row += [Fraction(1), Fraction(rhs)]
+        for i, j in enumerate(basic_cols):
+            if row[j] != 0:
+                scale = row[j]
+                row = [x - scale * y for x, y in zip(row, self.tableau[i])]
+        self.tableau.insert(len(self.tableau) - 1, row)
+
+    def add_bound(self, var_index, value, sense='<='):
+        ''' Acrescenta x_j <= value ou x_j >= value (j a partir de 0).
+        '''
+        coeffs = [0] * self._num_vars()
+        if sense == '<=':
+            coeffs[var_index] = 1
+            self.add_row(coeffs, value)
+        elif sense == '>=':
+            coeffs[var_index] = -1
+            self.add_row(coeffs, -value)
+        else:
+            raise ValueError("Sentido inválido: %s" % sense)
+
+    def set_bound(self, var_index, value, sense='<='):
+        ''' Troca o limite superior ('<=') ou inferior ('>=') de x_j (j a
+        partir de 0) num problema já resolvido, sem acrescentar linhas (o
+        tableau mantém o tamanho). A base continua dual viável; re-otimize
+        com dual_simplex. Retorna False se o intervalo de x_j ficou vazio.
+        '''
+        if self.method == 'dual':
+            raise ValueError("set_bound não é suportado no problema dual.")
+        if sense not in ('<=', '>='):
+            raise ValueError("Sentido inválido: %s" % sense)
+        if self.lower is None:
+            self._init_bounds()
+        j = var_index
+        value = Fraction(value) if self.backend == 'fraction' \
+            else float(value)
+        base = self._bound_base(j)
+        if sense == '<=':
+            self.upper[j] = value
+        else:
+            self.lower[j] = value
+        if self.lower[j] > self.upper[j]:
+            return False
+        delta = self._bound_base(j) - base
+        if not delta:
+            return True
+        sign = -1 if self.flipped[j] else 1
+        rows = self._basic_rows()
+        if self.backend == 'revised':
+            self._sync_revised_bounds()
+        elif self.entering[j] in rows:
+            # t_j of a basic variable shifts by -sign * delta.
+            r = rows[self.entering[j]]
+            if self.backend == 'float':
+                self.tableau[r, -1] -= sign * delta
+            else:
+                self.tableau[r][-1] -= sign * delta
+        elif self.backend == 'float':
+            self.tableau[:, -1] -= sign * delta * self.tableau[:, j]
+        else:
+            for row in self.tableau:
+                row[len(row) - 1] -= sign * delta * row[j]
+        return True
+
+    def dual_simplex(self):
+        ''' Re-otimiza pelo simplex dual a partir de uma base dual viável
+        (por exemplo, após add_row ou add_bound). Retorna a solução, ou
+        None se o problema ficou inviável ou a execução foi interrompida
+        pelo callback; self.status é atualizado.
+        '''
+        iterations = 0
+        timers = self.timers
+        while True:
+            if timers is not None:
+                start = time.perf_counter()
+            depart_index = self.get_dual_departing_var()
+            if timers is not None:
+                now = time.perf_counter()
+                timers['pricing'] += now - start
+                start = now
+            if depart_index < 0:
+                self.status = OPTIMAL
+                break
+            if self.max_iter is not None and iterations >= self.max_iter:
+                self.status = ITERATION_LIMIT
+                return None
+            enter_index = self.get_dual_entering_var(depart_index)
+            if timers is not None:
+                timers['ratio_test'] += time.perf_counter() - start
+            if enter_index < 0:
+                self.status = INFEASIBLE
+                return None
+            if self.callback is not None:
+                info = {'iteration': iterations + 1,
+                        'entering': self.entering[enter_index],
+                        'departing': self.departing[depart_index],
+                        'simplex': 'dual'}
+            self._timed_pivot([enter_index, depart_index])
+            iterations += 1
+            self.stats['iterations'] = self.stats.get('iterations', 0) + 1
+            if self.callback is not None and \
+                    self.callback('pivot', self, info):
+                self.status = ABORTED
+                return None
+        return self.get_current_solution()
+
+    def get_dual_departing_var(self):
+        ''' Linha com o b mais negativo; -1 se a base é primal viável.
+        '''
+        if self.lower is not None:
+            return self._bounded_dual_row()
+        if self.backend == 'revised':
+            return self.revised.dual_ratio_row()
+        if self.backend == 'float':
+            rhs = self.tableau[:-1, -1]
+            index = int(np.argmin(rhs))
+            return index if rhs[index] < -self.feas_tol else -1
+        min_index, min_value = -1, 0
+        for index, row in enumerate(self.tableau[:-1]):
+            if row[len(row) - 1] < min_value:
+                min_index, min_value = index, row[len(row) - 1]
+        return min_index
+
+    def get_dual_entering_var(self, departing_index):
+        ''' Teste da razão dual: entre as colunas com elemento negativo
+        na linha que sai, a de menor |custo reduzido / elemento|.
+        '''
+        if self.backend == 'revised':
+            return self.revised.dual_ratio_test(departing_index)
+        if self.backend == 'float':
+            row = self.tableau[departing_index, :-1]
+            bottom_row = self.tableau[-1, :-1]
+            candidates = row < -self.feas_tol
+            candidates[self.blocked] = False
+            if not candidates.any():
+                return -1
+            ratios = np.full(row.shape, np.inf)
+            ratios[candidates] = bottom_row[candidates] / -row[candidates]
+            return int(np.argmin(ratios))
+        row = self.tableau[departing_index]
+        bottom_row = self.tableau[len(self.tableau) - 1]
+        min_index, min_ratio = -1, None
+        for index in range(len(row) - 1):
+            if row[index] < 0 and index not in self.blocked:
+                ratio = bottom_row[index] / -row[index]
+                if min_ratio is None or ratio < min_ratio:
+                    min_index, min_ratio = index, ratio
+        return min_index
+
+    def update_rhs(self, b):
+        ''' Troca o vetor b do problema (na forma de maximização resolvida
+        internamente) mantendo a base atual: b' = B^-1 b.
+        '''
+        num = Fraction if self.backend == 'fraction' else float
+        self.b = [num(x) for x in b]
+        if self.backend == 'revised':
+            self.revised.set_rhs(self.b)
+            return
+        n, m = self._num_vars(), len(self.b)
+        c_B = self._basic_costs()
+        b = self._shifted_b()
+        if self.backend == 'float':
+            T = self.tableau
+            T[:-1, -1] = T[:-1, n:n + m] @ np.asarray(b, dtype=np.float64)
+            T[-1, -1] = c_B @ T[:-1, -1] + self._objective_offset()
+            return
+        for row in self.tableau[:-1]:
+            row[len(row) - 1] = sum(x * y for x, y in zip(row[n:n + m], b))
+        self.tableau[-1][-1] = sum(x * row[len(row) - 1] for x, row
+                                   in zip(c_B, self.tableau[:-1])) + \
+            self._objective_offset()
+
+    def update_objective(self, c):
+        ''' Troca o vetor c mantendo a base atual e recalcula a linha
+        inferior: c_B B^-1 [A I b] - [c 0 0].
+        '''
+        num = Fraction if self.backend == 'fraction' else float
+        self.c = [num(x) for x in c]
+        if self.backend == 'revised':
+            self.revised.set_objective(self.c)
+            return
+        c_B = self._basic_costs()
+        width = len(self.entering)
+        costs = self.c + [0] * (width - len(self.c))
+        if self.lower is not None:
+            costs = [-x if j < len(self.flipped) and self.flipped[j] else x
+                     for j, x in enumerate(costs)]
+        if self.backend == 'float':
+            T = self.tableau
+            T[-1] = c_B @ T[:-1] - np.asarray(costs, dtype=np.float64)
+            T[-1, -1] += self._objective_offset()
+            return
+        self.tableau[-1] = [sum(x * row[j] for x, row
+                                in zip(c_B, self.tableau[:-1])) - costs[j]
+                            for j in range(width)]
+        self.tableau[-1][-1] += self._objective_offset()
+
+    def _basic_costs(self):
+        n = self._num_vars()
+        position = dict((var, index) for index, var
+                        in enumerate(self.entering))
+        c_B = [self.c[position[var]] if position[var] < n else 0
+               for var in self.departing]
+        if self.lower is not None:
+            c_B = [-x if position[var] < len(self.flipped) and
+                   self.flipped[position[var]] else x
+                   for x, var in zip(c_B, self.departing)]
+        return np.asarray(c_B) if self.backend == 'float' else c_B
+
+    def reoptimize(self):
+        ''' Re-otimiza após update_rhs/update_objective: simplex primal se
+        a base ainda é primal viável, dual se ainda é dual viável e, senão,
+        recomeça da base de folgas.
+        '''
+        self._start = time.perf_counter()
+        self.stats['iterations'] = 0
+        if not self._redundant_rows_hold():
+            self.status = INFEASIBLE
+            self._finish_callback()
+            return None
+        if self.get_dual_departing_var() < 0:
+            return self.iterate()
+        if self._is_dual_feasible():
+            solution = self.dual_simplex()
+            self._finish_callback()
+            return solution
+        self._reset_basis()
+        if self.method == 'two_phase':
+            return self._two_phase()
+        return self.iterate()
+
+    def _redundant_rows_hold(self):
+        # An artificial left in the basis marks a redundant row: the row
+        # is zero in every other column, so its value depends on b alone
+        # and no pivot can bring it back to zero.
+        tol = 0 if self.backend == 'fraction' else self.feas_tol
+        return all(abs(self._pivot_rhs(r)) <= tol
+                   for r, var in enumerate(self.departing)
+                   if var.startswith('a_'))
+
+    def _is_dual_feasible(self):
+        if self.backend == 'fraction':
+            bottom_row = self.tableau[len(self.tableau) - 1]
+            return all(x >= 0 for j, x in enumerate(bottom_row[:-1])
+                       if j not in self.blocked)
+        return bool((self.reduced_costs() >= -self.opt_tol).all())
+
+    def _reset_basis(self):
+        if self.lower is not None:
+            self.flipped = [False] * len(self.flipped)
+        if self.backend == 'revised':
+            self.revised = RevisedSimplex(self.A, self.b, self.c,
+                                          self.feas_tol, self.opt_tol)
+            self._sync_revised_bounds()
+        else:
+            self.create_tableau()
+        self.blocked = []
+        if self.method == 'two_phase':
+            self._two_phase_names()
+        else:
+            self.update_enter_depart(width=self._num_vars() + len(self.b)
+                                     + 1)
+
+    def update_problem(self, b=None, c=None):
+        ''' Troca b e/ou c dados como em run_simplex (mesmo prob e ineq)
+        e os leva para a forma resolvida internamente: troca de papéis no
+        dual, sinais das linhas e de c nas duas fases. Depois, chame
+        reoptimize.
+        '''
+        if self.method == 'dual':
+            b, c = c, b
+        elif self.method == 'two_phase':
+            if b is not None:
+                b = [x * sign for x, sign in zip(b, self.row_signs)]
+            if c is not None:
+                zero = self.c[0] * 0
+                c = [-x if self.prob == 'min' else x for x in c]
+                c = c + [zero] * (len(self.c) - len(c))
+        if c is not None:
+            self.update_objective(c)
+        if b is not None:
+            self.update_rhs(b)
+
     def start_doc(self):
         if not self.gen_doc:
             return
-        self.doc = (r"\documentclass{article}"
-                    r"\usepackage{amsmath}"
-                    r"\begin{document}"
-                    r"\title{Simplex Solver}"
-                    r"\maketitle"
-                    r"\begin{flushleft}"
-                    r"\textbf{Problem}"
-                    r"\end{flushleft}")
+        self.report.begin()
 
     def init_problem_doc(self):
         if not self.gen_doc:
             return
-        # Objective function.
-        self.doc += (r"\begin{flushleft}"
-                    r"Dado o seguinte sistema linear e objetivo"
-                    r"função, encontre a solução ideal."
-                    r"\end{flushleft}"
-                    r"\begin{equação*}")
-        func = ""
-        found_value = False
-        for index, x in enumerate(self.c):
-            opp = '+'
-            if x == 0:
-                continue
-            if x < 0:
-                opp = ' - '
-            elif index == 0 or not found_value:
-                opp = ''
-            if x == 1 or x == -1:
-                x = ''
-            func += (r"%s %sx_%s "  % (opp, str(x), str(index+1)))
-            found_value = True
-        self.doc += (r"\max{%s} \\ "
-                     r"\end{equation*}" % func)
-        self.linear_system_doc(self.get_Ab())
-        self.doc += (r"\begin{flushleft}"
-                     r"\textbf{Solution}"
-                     r"\end{flushleft}")
+        self.report.problem(self.prob, self.c, self.get_Ab(), self.entering,
+                            self.ineq)
 
     def linear_system_doc(self, matrix):
         if not self.gen_doc:
             return
-        self.doc += (r"\["
-                     r"\left\{"
-                     r"\begin{array}{c}")
-        for i in range(0, len(matrix)):
-            found_value = False
-            for index, x in enumerate(matrix[i]):
-                opp = '+'
-                if x == 0 and index != len(matrix[i]) - 1:
-                    continue
-                if x < 0:
-                    opp = '-'
-                elif index == 0 or not found_value:
-                    opp = ''
-                if index != len(matrix[i]) - 1:
-                    if x == 1 or x == -1:
-                        x = ''
-                    self.doc += (r"%s %s%s "  % (opp, str(x),
-                                                 str(self.entering[index])))
-                else:
-                    self.doc += (r"%s %s"  % (self.latex_ineq[self.ineq[i]],str(x)))
-                found_value = True
-                if (index == len(matrix[i]) - 1):
-                    self.doc += r" \\ "        
-        self.doc += (r"\end{array}"
-                     r"\right."
-                     r"\]")
+        self.report.linear_system(matrix, self.entering, self.ineq)
  
     def slack_doc(self):
-        if not self.gen_doc:
+        if not self.gen_doc or not self.report.wants_tableau():
             return
-        self.doc += (r"\begin{flushleft}"
-                    r"Adicione variáveis ​​de folga para girar"
-                    r"todas as desigualdades em igualdades."
-                    r"\end{flushleft}")
+        self.report.text("Adicione variáveis de folga para girar "
+                         "todas as desigualdades em igualdades.")
+        self._sync_tableau()
         self.linear_system_doc(self.tableau[:len(self.tableau)-1])
 
     def init_tableau_doc(self):
-        if not self.gen_doc:
+        if not self.gen_doc or not self.report.wants_tableau():
             return
-        self.doc += (r"\begin{flushleft}"
-                    r"Crie o quadro inicial do novo sistema linear."
-                    r"\end{flushleft}")
+        self.report.text("Crie o quadro inicial do novo sistema linear.")
         self.tableau_doc()
             
-    def tableau_doc(self):
+    def tableau_doc(self, iteration=None):
+        # Only materialize the tableau when the report records it.
+        if not self.gen_doc or not self.report.wants_tableau(iteration):
+            return
+        self._sync_tableau()
+        self.report.tableau(self.entering, self.tableau, self.departing,
+                            iteration)
+
+    def phase_doc(self, text):
         if not self.gen_doc:
             return
-        self.doc += r"\begin{equation*}"
-        self.doc += r"\begin{bmatrix}"
-        self.doc += r"\begin{array}{%s|c}" % ("c" * (len(self.tableau[0])-1))
-        for index, var in enumerate(self.entering):
-            if index != len(self.entering) - 1:
-                self.doc += r"%s &" % var
-            else:
-                self.doc += r"%s \\ \hline" % var
-        for indexr, row in enumerate(self.tableau):
-            for indexv, value in enumerate(row):
-                if indexv != (len(row)-1):
-                    self.doc += r"%s & " % (str(value))
-                elif indexr != (len(self.tableau)-2):
-                    self.doc += r"%s \\" % (str(value))
-                else:
-                    self.doc += r"%s \\ \hline" % (str(value))
-        self.doc += r"\end{array}"
-        self.doc += r"\end{bmatrix}"
-        self.doc += (r"\begin{array}{c}"
-                     r"\\")
-        for var in self.departing:
-            self.doc += (r"%s \\" % var)
-        self.doc += r"\\"
-        self.doc += r"\end{array}"
-        self.doc += r"\end{equation*}"
+        self.report.text(text)
 
     def infeasible_doc(self):
         if not self.gen_doc:
             return
-        self.doc += (r"\begin{flushleft}"
-                    r"Não há candidatos não negativos para o pivô."
-                    r"Assim, a solução é inviável."
-                    r"\end{flushleft}")
+        self.report.text("Não há candidatos não negativos para o pivô."
+                         "Assim, a solução é inviável.")
 
     def pivot_doc(self, pivot):
         if not self.gen_doc:
             return
-        self.doc += (r"\begin{flushleft}"
-                    r"Existem elementos negativos na linha inferior,"
-                    r"então a solução atual não é a ideal."
-                    r"Assim, gire para melhorar a solução atual. O "
-                    r"a variável de entrada é $%s$ e a variável de saída "
-                    r"variável é $%s$."
-                    r"\end{flushleft}"%
-        (str(self.entering[pivot[0]]),
-        str(self.departing[pivot[1]])))
-        self.doc += (r"\begin{flushleft}"
-                    r"Execute operações elementares de linha até "
-                    r"o elemento pivô é 1 e todos os outros elementos no "
-                    r"coluna de entrada é 0."
-                    r"\end{flushleft}")
+        self.report.pivot(self.entering[pivot[0]], self.departing[pivot[1]],
+                          self.stats['iterations'] + 1)
     
     def current_solution_doc(self, solution):
         if not self.gen_doc:
             return
-        self.doc += r"\begin{equation*}"
-        for key,value in sorted(solution.items()):
-            self.doc += r"%s = %s" % (key, self._fraction_to_latex(value))
-            if key != 'z':
-                self.doc += r", "
-        self.doc += r"\end{equation*}"
+        self.report.solution(solution)
 
     def final_solution_doc(self, solution):
         if not self.gen_doc:
             return
-        self.doc += (r"\begin{flushleft}"
-                    r"Não há elementos negativos na linha inferior, então "
-                    r"sabemos que a solução é ótima. Assim, a solução é: "
-                    r"\end{flushleft}")
+        self.report.text("Não há elementos negativos na linha inferior, "
+                         "então sabemos que a solução é ótima. Assim, a "
+                         "solução é: ")
         self.current_solution_doc(solution)
 
     def print_doc(self):
         if not self.gen_doc:
             return
-        self.doc += (r"\end{document}")
-        with open("solution.tex", "w") as tex:
-            tex.write(self.doc)
-
-    def _fraction_to_latex(self, fract):
-        if fract.denominator == 1:
-            return str(fract.numerator)
-        else:
-            return r"\frac{%s}{%s}" % (str(fract.numerator), str(fract.denominator))
+        self.report.end()
+        self.gen_doc = False
 
     def _generate_identity(self, n):
         ''' Função auxiliar para gerar uma matriz identidade quadrada.
@@ -466,9 +1542,17 @@ class SimplexSolver():
                 print('{:^5}'.format(str(val)), end=' ')
             print('|')
 
+    def _sync_tableau(self):
+        ''' No simplex revisado o tableau só é materializado quando
+        precisa ser exibido.
+        '''
+        if self.backend == 'revised':
+            self.tableau = self.revised.tableau()
+
     def _print_tableau(self):
         ''' Print simplex tableau.
         '''
+        self._sync_tableau()
         print(' ', end=' ')
         for val in self.entering:
             print('{:^5}'.format(str(val)), end=' ')
@@ -492,11 +1576,26 @@ if __name__ == '__main__':
     b = []
     c = []
     p = ''
+    backend = 'fraction'
+    pricing = 'dantzig'
+    report = 'solution.tex'
+    report_format = 'latex'
+    every = 1
+    summary = False
+    model = None
     argv = sys.argv[1:]    
     try:
-        opts, args = getopt.getopt(argv,"hA:b:c:p:",["A=","b=","c=","p="])
+        opts, args = getopt.getopt(argv,"hA:b:c:p:",["A=","b=","c=","p=",
+                                                    "backend=","pricing=",
+                                                    "report=","format=",
+                                                    "every=","summary",
+                                                    "model="])
     except getopt.GetoptError:
-        print('simplex.py -A <matrix> -b <vector> -c <vector> -p <type>')
+        print('simplex.py -A <matrix> -b <vector> -c <vector> -p <type> '
+              '[--model <arquivo.mps|.lp>] [--backend fraction|float|revised] '
+              '[--pricing dantzig|partial|devex|steepest] '
+              '[--report <arquivo>] [--format latex|markdown|json] '
+              '[--every <k>] [--summary]')
         sys.exit(2)
     for opt, arg in opts:
         if opt == '-h':
@@ -505,6 +1604,14 @@ if __name__ == '__main__':
             print('b: Ax <= b')
             print('c: Coeficientes da função objetivo.')
             print('p: Indica função objetivo máxima ou mínima.')
+            print('backend: fraction (exato), float (NumPy float64) ou '
+                  'revised (simplex revisado).')
+            print('pricing: dantzig, partial, devex ou steepest.')
+            print('report: arquivo do relatório (padrão solution.tex); '
+                  'format: latex, markdown ou json; every: registra um a '
+                  'cada k tableaux; summary: só pivôs e solução.')
+            print('model: lê A, b, c, p e as restrições de um arquivo MPS '
+                  'livre ou LP (no lugar de -A, -b, -c e -p).')
             sys.exit()
         elif opt in ("-A"):
             A = ast.literal_eval(arg)
@@ -514,11 +1621,51 @@ if __name__ == '__main__':
             c = ast.literal_eval(arg)
         elif opt in ("-p"):
             p = arg.strip()
-    if not A or not b or not c:
+        elif opt == "--backend":
+            backend = arg.strip()
+        elif opt == "--pricing":
+            pricing = arg.strip()
+        elif opt == "--report":
+            report = arg.strip()
+        elif opt == "--format":
+            report_format = arg.strip()
+        elif opt == "--every":
+            every = int(arg)
+        elif opt == "--summary":
+            summary = True
+        elif opt == "--model":
+            model = arg.strip()
+    ineq = []
+    bounds = None
+    if model is not None:
+        # Large models go straight to a sparse matrix (revised backend);
+        # variable bounds go to the bounded ratio test, not to new rows.
+        from modelio import read_model
+        model = read_model(model)
+        A, b, c, p, ineq = model.problem(sparse=backend == 'revised',
+                                         exact=backend == 'fraction',
+                                         bound_rows=False)
+        if model.lower or model.upper:
+            bounds = model.variable_bounds()
+    elif not A or not b or not c:
         sys.exit()
 
     # Assume maximization problem as default.
     if p not in ('max', 'min'):
         p = 'max'
     
-    SimplexSolver().run_simplex(A,b,c,prob=p,enable_msg=False,latex=True)
+    from report import make_report
+    solver = SimplexSolver()
+    solution = solver.run_simplex(A,b,c,prob=p,ineq=ineq,enable_msg=False,
+                                  report=make_report(report_format, report,
+                                                     every, summary),
+                                  backend=backend, pricing=pricing,
+                                  bounds=bounds)
+    if model is not None:
+        print("Status: %s" % solver.status)
+        if solution is not None:
+            print("Objetivo: %s" % (solution['z'] + model.offset))
+            for j, name in enumerate(model.columns):
+                value = solution['x_%d' % (j + 1)]
+                if value:
+                    print("%s = %s" % (name, value))
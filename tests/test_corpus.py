@@ -0,0 +1,230 @@
+import itertools, os, random, sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'SIMPLEX'))
+sys.path.insert(0, os.path.join(ROOT, 'BRANCH-AND-BOUND'))
+from simplex import SimplexSolver, OPTIMAL, INFEASIBLE, UNBOUNDED
+from batch import solve_batch
+from cache import SolutionCache
+from branchAndBound import (branch_and_bound, NodePool, BoundPropagation,
+                            restore_node)
+
+# Corpus compartilhado: os três backends resolvem os mesmos problemas e
+# devem concordar no status e no valor ótimo. O backend 'fraction' é
+# exato e serve de referência.
+
+BACKENDS = ('fraction', 'float', 'revised')
+TOL = 1e-6
+
+FIXED = [
+    # (A, b, c, prob, ineq, status esperado, z esperado)
+    ([[1, 1], [2, 1]], [4, 6], [3, 2], 'max', [], OPTIMAL, 10),
+    ([[6, 3, 5], [5, 4, 3], [3, 2, 2], [0, 0, 1]], [500, 350, 150, 20],
+     [5, 5, 5], 'max', [], OPTIMAL, 375),
+    ([[1, 2], [3, 1]], [4, 6], [2, 3], 'min', [], OPTIMAL, 6.8),
+    ([[1, -1]], [1], [1, 1], 'max', [], UNBOUNDED, None),
+    ([[1], [1]], [1, 2], [1], 'max', ['<=', '>='], INFEASIBLE, None),
+    ([[1, 1], [1, -1]], [4, 1], [1, 2], 'max', ['=', '<='], OPTIMAL, 8),
+    # min com c ou b negativo: não pode passar pelo dual transposto.
+    ([[4]], [1], [-1], 'min', [], UNBOUNDED, None),
+    ([[2]], [-2], [-2], 'min', [], UNBOUNDED, None),
+    ([[1, 1]], [2], [1, -1], 'min', [], UNBOUNDED, None),
+    # Linha de igualdade redundante.
+    ([[1, 1], [2, 2]], [3, 6], [1, 2], 'max', ['=', '='], OPTIMAL, 6),
+    ([[1, 0], [-1, 0]], [1, -2], [0, 1], 'max', [], INFEASIBLE, None),
+]
+
+
+def random_corpus(count=60, seed=2024):
+    rng = random.Random(seed)
+    problems = []
+    for k in range(count):
+        m, n = rng.randint(1, 5), rng.randint(1, 5)
+        A = [[rng.randint(-3, 9) for _ in range(n)] for _ in range(m)]
+        b = [rng.randint(-5, 25) for _ in range(m)]
+        c = [rng.randint(-4, 9) for _ in range(n)]
+        prob = rng.choice(['max', 'min'])
+        ineq = [rng.choice(['<=', '>=', '=']) for _ in range(m)] \
+            if k % 3 else []
+        problems.append((A, b, c, prob, ineq))
+    return problems
+
+
+def solve(A, b, c, prob, ineq, backend):
+    solver = SimplexSolver()
+    solution = solver.run_simplex(A, b, c, prob, ineq, backend=backend)
+    return solver.status, None if solution is None else float(solution['z'])
+
+
+def same(z1, z2):
+    return z1 is None and z2 is None or (
+        z1 is not None and z2 is not None and
+        abs(z1 - z2) <= TOL * max(1.0, abs(z1)))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('case', FIXED)
+def test_fixed_corpus(case, backend):
+    A, b, c, prob, ineq, status, z = case
+    result = solve(A, b, c, prob, ineq, backend)
+    assert result[0] == status
+    assert same(result[1], None if z is None else float(z))
+
+
+@pytest.mark.parametrize('problem', random_corpus())
+def test_backends_agree(problem):
+    reference = solve(*problem, backend='fraction')
+    for backend in BACKENDS[1:]:
+        status, z = solve(*problem, backend=backend)
+        assert status == reference[0], backend
+        assert same(z, reference[1]), backend
+
+
+def test_batch_and_cache_match_cold_solves():
+    # Cenários com b e c mudando juntos, incluindo os que passam por um
+    # problema intermediário ilimitado.
+    rng = random.Random(7)
+    for _ in range(40):
+        m, n = rng.randint(1, 3), rng.randint(1, 3)
+        A = [[rng.randint(-3, 5) for _ in range(n)] for _ in range(m)]
+        bs = [[rng.randint(-4, 8) for _ in range(m)] for _ in range(4)]
+        cs = [[rng.randint(-3, 6) for _ in range(n)] for _ in range(4)]
+        prob = rng.choice(['max', 'min'])
+        ineq = [rng.choice(['<=', '>=', '=']) for _ in range(m)]
+        for backend in BACKENDS:
+            cold = [solve(A, b, c, prob, ineq, backend)
+                    for b, c in zip(bs, cs)]
+            for presolve in (False, True):
+                for index, solution, status in solve_batch(
+                        A, bs, cs, prob=prob, ineq=ineq, backend=backend,
+                        presolve=presolve):
+                    z = None if solution is None or status != OPTIMAL \
+                        else float(solution['z'])
+                    assert status == cold[index][0]
+                    assert same(z, cold[index][1] if status == OPTIMAL
+                                else None)
+            cache = SolutionCache()
+            for (b, c), expected in zip(zip(bs, cs), cold):
+                for _ in range(2):
+                    solution, _ = cache.solve(A, b, c, prob, ineq,
+                                              backend=backend)
+                    assert cache.status == expected[0]
+
+
+def brute_force(profits, constraints, bounds, limit):
+    best = None
+    for x in itertools.product(range(limit + 1), repeat=len(profits)):
+        if all(sum(a * v for a, v in zip(row, x)) <= bound + TOL
+               for row, bound in zip(constraints, bounds)):
+            value = sum(p * v for p, v in zip(profits, x))
+            best = value if best is None else max(best, value)
+    return best
+
+
+def test_branch_and_bound_optima():
+    rng = random.Random(11)
+    cases = [([1, 1], [[0.1, 0.1]], [0.3], 3)]
+    for _ in range(25):
+        n, m = rng.randint(1, 4), rng.randint(1, 3)
+        constraints = [[rng.randint(1, 6) for _ in range(n)]
+                       for _ in range(m)]
+        bounds = [rng.randint(3, 15) for _ in range(m)]
+        profits = [rng.randint(1, 9) for _ in range(n)]
+        cases.append((profits, constraints, bounds, max(bounds)))
+    for profits, constraints, bounds, limit in cases:
+        expected = brute_force(profits, constraints, bounds, limit)
+        for backend in BACKENDS:
+            for heuristics in (False, True):
+                _, profit, stats = branch_and_bound(
+                    profits, constraints, bounds, backend=backend,
+                    heuristics=heuristics)
+                assert abs(float(profit) - expected) <= TOL
+                assert stats['gap'] <= TOL
+                assert stats['status'] == 'optimal'
+
+
+def test_branch_and_bound_infeasible():
+    _, profit, stats = branch_and_bound([1], [[-1], [1]], [-1, 0.5])
+    assert profit == float('-inf')
+    assert stats['gap'] == float('inf')
+    assert stats['status'] == 'infeasible'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('problem', [
+    ([1, 1], [[1, -1]], [1]),
+    ([1, 1], [[1, 0]], [3]),
+])
+def test_branch_and_bound_unbounded(problem, backend):
+    _, _, stats = branch_and_bound(*problem, backend=backend)
+    assert stats['status'] == 'unbounded'
+    assert stats['best_bound'] == float('inf')
+    assert stats['gap'] == float('inf')
+
+
+@pytest.mark.parametrize('selection', ['best', 'depth', 'estimate'])
+def test_node_pool_best_bound(selection, tmp_path):
+    rng = random.Random(5)
+    pool = NodePool(selection, max_open=20, directory=str(tmp_path))
+    opened = {}
+    for step in range(600):
+        if opened and rng.random() < 0.4:
+            node, bound, _ = pool.pop()
+            assert opened.pop(node) == bound
+        else:
+            bound = rng.uniform(0, 100)
+            node = pool.add(-1, None, bound)
+            pool.push(node, estimate=bound - rng.uniform(0, 10))
+            opened[node] = bound
+        if opened:
+            # Lotes em disco contam pelo maior limitante do lote.
+            assert pool.best_bound() == max(opened.values())
+    pool.close()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_branch_and_bound_workers(backend):
+    # Poucos solvers guardados e mergulhos frequentes: nós refeitos pela
+    # base e pelo simplex dual a partir da raiz.
+    rng = random.Random(13)
+    for _ in range(3):
+        n, m = rng.randint(2, 4), rng.randint(1, 3)
+        constraints = [[rng.randint(1, 6) for _ in range(n)] for _ in range(m)]
+        bounds = [rng.randint(3, 15) for _ in range(m)]
+        profits = [rng.randint(1, 9) for _ in range(n)]
+        expected = brute_force(profits, constraints, bounds, max(bounds))
+        _, profit, stats = branch_and_bound(
+            profits, constraints, bounds, backend=backend, workers=2,
+            keep_solvers=2, dive_every=2)
+        assert abs(float(profit) - expected) <= TOL
+        assert stats['status'] == 'optimal'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_restore_node_from_basis(backend):
+    rng = random.Random(17)
+    for _ in range(20):
+        n, m = rng.randint(2, 5), rng.randint(1, 4)
+        constraints = [[rng.randint(-2, 6) for _ in range(n)]
+                       for _ in range(m)]
+        bounds = [rng.randint(-2, 15) for _ in range(m)]
+        profits = [rng.randint(1, 9) for _ in range(n)]
+        root = SimplexSolver()
+        if root.run_simplex(constraints, bounds, profits,
+                            backend=backend) is None:
+            continue
+        problem = (profits, constraints, bounds,
+                   BoundPropagation(constraints, bounds), None)
+        changes = []
+        for _ in range(3):
+            j = rng.randrange(n)
+            changes.append((j, rng.choice(['<=', '>=']), rng.randint(0, 3)))
+            node = restore_node(problem, root, changes)
+            if node is None:
+                break
+            again = restore_node(problem, root, changes, node[0].basis())
+            assert set(again[0].departing) == set(node[0].departing)
+            assert all(abs(float(a) - float(b)) <= TOL
+                       for a, b in zip(again[1], node[1]))
@@ -0,0 +1,33 @@
+import io, os, sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'SIMPLEX'))
+from modelio import read_model, write_model
+
+
+@pytest.mark.parametrize('objective, offset', [
+    ('5 + 3 x + 2 y', 5.0),
+    ('3 x - 5 + 2 y + 1', -4.0),
+    ('3 x + 2 y - 7', -7.0),
+    ('-2\n + 3 x + 2 y', -2.0),
+])
+def test_lp_objective_constant(objective, offset):
+    text = "Maximize\n obj: %s\nSubject To\n c1: x + y <= 4\nEnd\n" \
+        % objective
+    model = read_model(io.StringIO(text), 'lp')
+    assert model.offset == offset
+    assert list(model.c) == [3.0, 2.0]
+    for format in ('lp', 'mps'):
+        out = io.StringIO()
+        write_model(model, out, format)
+        again = read_model(io.StringIO(out.getvalue()), format)
+        assert again.offset == offset
+        assert list(again.c) == [3.0, 2.0]
+
+
+def test_lp_constraint_constant():
+    text = "Maximize\n x + y\nSubject To\n c1: x + 2 + y <= 6\nEnd\n"
+    model = read_model(io.StringIO(text), 'lp')
+    assert list(model.b) == [4.0]
@@ -0,0 +1,54 @@
+import asyncio, os, sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'SIMPLEX'))
+from service import SolveService, DONE, FAILED
+
+LP = {'kind': 'lp', 'A': [[1, 1], [2, 1]], 'b': [4, 6], 'c': [3, 2]}
+IP = {'kind': 'ip', 'A': [[6, 3, 5], [5, 4, 3], [3, 2, 2], [0, 0, 1]],
+      'b': [500, 350, 150, 20], 'c': [5, 5, 5]}
+
+
+def run_jobs(*specs):
+    async def main():
+        service = SolveService(workers=2)
+        jobs = [service.submit(spec) for spec in specs]
+        for job in jobs:
+            async for _ in job.follow():
+                pass
+        service.close()
+        return jobs
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('name, value', [
+    ('time_limit', 5), ('bounds', [[0, 1], [0, 1]]), ('integer', [0]),
+    ('prob', 'min'), ('ineq', ['<=', '<=']), ('latex', True),
+])
+def test_job_fields_are_not_options(name, value):
+    async def main():
+        service = SolveService(workers=1)
+        with pytest.raises(ValueError):
+            service.submit(dict(LP, options={name: value}))
+        assert not service.jobs
+    asyncio.run(main())
+
+
+def test_lp_and_ip_jobs():
+    lp, ip, workers, limited = run_jobs(
+        LP, IP, dict(IP, options={'workers': 2}),
+        dict(LP, time_limit=5, bounds=[[0, 1], [None, None]]))
+    assert lp.status == DONE and lp.result['solution']['z'] == 10
+    assert ip.status == DONE and ip.result['status'] == 'optimal'
+    assert ip.result['objective'] == 375
+    assert workers.status == DONE, workers.error
+    assert workers.result['objective'] == 375
+    assert limited.status == DONE and limited.result['solution']['z'] == 9
+
+
+def test_unbounded_ip_job():
+    job, = run_jobs({'kind': 'ip', 'A': [[1, -1]], 'b': [1], 'c': [1, 1]})
+    assert job.status == DONE
+    assert job.result['status'] == 'unbounded'